@@ -0,0 +1,251 @@
+import time
+from datetime import datetime
+
+from networkx import DiGraph
+
+from aux import config
+from aux.BDDParser import BDDParser
+from core.Benchmark import Benchmark
+from core.GraphTopology import GraphTopology
+
+
+class AIGBDDParser(BDDParser):
+
+    def __init__(self, benchmark: Benchmark, shared: bool = False):
+        """
+        Constructs the BDDs of a benchmark directly from its AIG, without ABC.
+        The BDD of every AND node of the AIG is computed bottom-up with the apply operation, in the order of the input
+        variables of the benchmark. The BDDs are written as graphs in the same format as the BDDs from ABC.
+        :param benchmark: The benchmark, of which the AIG is built by the parser of the benchmark.
+        :param shared: If True, a single SBDD of all outputs is constructed. Otherwise, an ROBDD is constructed for
+        every output.
+        """
+        super(AIGBDDParser, self).__init__(benchmark)
+        if getattr(benchmark, "aig", None) is None:
+            raise Exception("The benchmark has no AIG.")
+        self.aig = benchmark.aig
+        self.shared = shared
+        # Nodes 0 and 1 are the terminal nodes
+        self.levels = [len(self.aig.input_variables), len(self.aig.input_variables)]
+        self.lows = [None, None]
+        self.highs = [None, None]
+        self.unique = dict()
+        self.and_cache = dict()
+        self.not_cache = dict()
+        self.deadline = None
+
+    def _make(self, level: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        node = self.unique.get((level, low, high))
+        if node is None:
+            node = len(self.levels)
+            self.levels.append(level)
+            self.lows.append(low)
+            self.highs.append(high)
+            self.unique[(level, low, high)] = node
+        return node
+
+    def _check_deadline(self):
+        if self.deadline is not None and time.time() > self.deadline:
+            self.log += 'BDD construct time (s): {}\n'.format(config.time_limit_bdd)
+            self.log += 'Timeout'
+            config.log.add(self.get_log())
+            raise Exception("\tBDD construction timeout.\n")
+
+    def _get_not(self, f: int):
+        """
+        Returns the negation of f if it is a terminal node or computed before, or None otherwise.
+        """
+        if f < 2:
+            return 1 - f
+        return self.not_cache.get(f)
+
+    def _not(self, f: int) -> int:
+        """
+        Negates f. The apply operation uses an explicit stack instead of recursion, such that the depth of the BDD is
+        not limited by the recursion limit.
+        """
+        result = self._get_not(f)
+        if result is not None:
+            return result
+        stack = [f]
+        while len(stack) > 0:
+            node = stack[-1]
+            if node in self.not_cache:
+                stack.pop()
+                continue
+            low = self._get_not(self.lows[node])
+            high = self._get_not(self.highs[node])
+            if low is None or high is None:
+                if low is None:
+                    stack.append(self.lows[node])
+                if high is None:
+                    stack.append(self.highs[node])
+                continue
+            stack.pop()
+            self.not_cache[node] = self._make(self.levels[node], low, high)
+        return self.not_cache[f]
+
+    def _get_and(self, f: int, g: int):
+        """
+        Returns the conjunction of f and g if it is trivial or computed before, or None otherwise.
+        """
+        if f == 0 or g == 0:
+            return 0
+        if f == 1 or f == g:
+            return g
+        if g == 1:
+            return f
+        return self.and_cache.get((min(f, g), max(f, g)))
+
+    def _and(self, f: int, g: int) -> int:
+        """
+        Computes the conjunction of f and g with an explicit stack of pairs, of which the cofactors are computed first.
+        The deadline is checked every 4096 pairs, such that a single large apply operation is stopped in time.
+        """
+        result = self._get_and(f, g)
+        if result is not None:
+            return result
+        key = (min(f, g), max(f, g))
+        stack = [key]
+        steps = 0
+        while len(stack) > 0:
+            pair = stack[-1]
+            if pair in self.and_cache:
+                stack.pop()
+                continue
+            steps += 1
+            if steps % 4096 == 0:
+                self._check_deadline()
+            (f, g) = pair
+            level = min(self.levels[f], self.levels[g])
+            (f0, f1) = (self.lows[f], self.highs[f]) if self.levels[f] == level else (f, f)
+            (g0, g1) = (self.lows[g], self.highs[g]) if self.levels[g] == level else (g, g)
+            low = self._get_and(f0, g0)
+            high = self._get_and(f1, g1)
+            if low is None or high is None:
+                if low is None:
+                    stack.append((min(f0, g0), max(f0, g0)))
+                if high is None:
+                    stack.append((min(f1, g1), max(f1, g1)))
+                continue
+            stack.pop()
+            self.and_cache[pair] = self._make(level, low, high)
+        return self.and_cache[key]
+
+    def _get_bdds(self) -> dict:
+        """
+        Returns the BDD node of every output.
+        """
+        # Only the nodes in the cones of the outputs are converted
+        cone = set()
+        stack = [literal >> 1 for literal in self.aig.outputs.values()]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node in cone:
+                continue
+            cone.add(node)
+            fanins = self.aig.get_fanins(node)
+            if fanins is not None:
+                stack.extend([fanins[0] >> 1, fanins[1] >> 1])
+
+        input_levels = dict((input_variable, level) for (level, input_variable) in enumerate(self.aig.input_variables))
+        bdds = {0: 0}
+        for node in sorted(cone):
+            if node == 0:
+                continue
+            self._check_deadline()
+            if self.aig.is_input(node):
+                bdds[node] = self._make(input_levels[self.aig.get_input_variable(node)], 0, 1)
+                continue
+            (a, b) = self.aig.get_fanins(node)
+            bdd_a = self._not(bdds[a >> 1]) if a & 1 else bdds[a >> 1]
+            bdd_b = self._not(bdds[b >> 1]) if b & 1 else bdds[b >> 1]
+            bdds[node] = self._and(bdd_a, bdd_b)
+
+        roots = dict()
+        for output_variable in self.benchmark.output_variables:
+            literal = self.aig.get_output(output_variable)
+            roots[output_variable] = self._not(bdds[literal >> 1]) if literal & 1 else bdds[literal >> 1]
+        return roots
+
+    def _to_graph(self, roots: dict) -> DiGraph:
+        """
+        Writes the BDDs of the given outputs as a single graph, with the terminal one node, and the terminal zero node
+        if it is reachable.
+        """
+        output_variables = dict()
+        for (output_variable, root) in roots.items():
+            output_variables.setdefault(root, []).append(output_variable)
+
+        nodes = set()
+        stack = list(output_variables.keys())
+        while len(stack) > 0:
+            node = stack.pop()
+            if node in nodes or node < 2:
+                continue
+            nodes.add(node)
+            stack.extend([self.lows[node], self.highs[node]])
+
+        bdd = DiGraph()
+        input_variables = self.aig.input_variables
+        for node in sorted(nodes, key=lambda node: self.levels[node]):
+            bdd.add_node(node, variable=input_variables[self.levels[node]], terminal=False,
+                         root=node in output_variables, output_variables=output_variables.get(node, []))
+        bdd.add_node(1, variable='1', terminal=True, root=1 in output_variables,
+                     output_variables=output_variables.get(1, []))
+        if 0 in output_variables or any(self.lows[node] == 0 or self.highs[node] == 0 for node in nodes):
+            bdd.add_node(0, variable='0', terminal=True, root=0 in output_variables,
+                         output_variables=output_variables.get(0, []))
+        for node in nodes:
+            variable = input_variables[self.levels[node]]
+            bdd.add_edge(node, self.highs[node], variable=variable, positive=True)
+            bdd.add_edge(node, self.lows[node], variable=variable, positive=False)
+        return bdd
+
+    def parse(self) -> GraphTopology:
+        print("Started constructing BDDs from AIG")
+        print("\t{}".format(datetime.now()))
+
+        if self.shared:
+            self.log += 'BDD type: SBDD (AIG)\n'
+        else:
+            self.log += 'BDD type: ROBDD (AIG)\n'
+
+        start_time = time.time()
+        if config.time_limit_bdd is not None:
+            self.deadline = start_time + config.time_limit_bdd
+        roots = self._get_bdds()
+        self.bdd_construct_time = time.time() - start_time
+        self.log += 'BDD construct time (s): {}\n'.format(self.bdd_construct_time)
+
+        if self.shared:
+            bdd = self._to_graph(roots)
+            self._check_size_bound(len(bdd.nodes) - int(0 in bdd.nodes))
+            bdds = [(None, bdd)]
+        else:
+            bdds = []
+            for output_variable in self.benchmark.output_variables:
+                bdd = self._to_graph({output_variable: roots[output_variable]})
+                # The merged graph holds at least the nodes of every ROBDD, except for the terminal zero node
+                self._check_size_bound(len(bdd.nodes) - int(0 in bdd.nodes))
+                bdds.append((output_variable, bdd))
+
+        for (output_variable, bdd) in bdds:
+            self.benchmark_graph.add_graph(bdd)
+            bdd_log = ''
+            if output_variable is not None:
+                bdd_log += '\tOutput variable: {}\n'.format(output_variable)
+            bdd_log += '\tNodes: {}\n'.format(len(bdd.nodes))
+            bdd_log += '\tEdges: {}\n'.format(len(bdd.edges))
+            self.log += bdd_log
+
+            for line in bdd_log.splitlines():
+                print("\t{}".format(line))
+
+        config.log.add(self.get_log())
+        print("Stopped constructing BDDs from AIG")
+        print()
+
+        return self.benchmark_graph
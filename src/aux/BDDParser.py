@@ -1,4 +1,6 @@
+import filecmp
 import os
+import shutil
 import subprocess
 from abc import ABC, abstractmethod
 
@@ -18,8 +20,31 @@ class BDDParser(ABC):
         self.reversed_graph = DiGraph()
         self.bdd_construct_time = None
         self.bdd_show_times = dict()
+        # A shared value with the size of a smaller BDD of the same benchmark, that is constructed concurrently
+        # (negative as long as there is none, see BDDPortfolio)
+        self.size_bound = None
         self.log = ''
 
+    def _copy_benchmark(self, abc_file_path):
+        """
+        Copies the benchmark file to the folder of ABC. The file is not copied again if it is already there, as another
+        parser may be reading it concurrently. Otherwise, it is written to a temporary file that atomically replaces
+        the file, such that a concurrent reader never sees a partial file.
+        """
+        if abc_file_path.exists() and filecmp.cmp(self.benchmark.file_path, abc_file_path, shallow=False):
+            return
+        temporary_file_path = abc_file_path.with_name('{}.{}.tmp'.format(abc_file_path.name, os.getpid()))
+        shutil.copy(self.benchmark.file_path, temporary_file_path)
+        os.replace(temporary_file_path, abc_file_path)
+
+    def _check_size_bound(self, size: int):
+        """
+        Stops the construction if the BDD has more nodes than the size bound.
+        :param size: A lower bound on the number of nodes of the BDD.
+        """
+        if self.size_bound is not None and 0 <= self.size_bound.value < size:
+            raise Exception("\tBDD exceeds the size bound.\n")
+
     def _write_dot_file(self, graph, dot_file_name):
         content = ""
         content += "graph sbdd {\n"
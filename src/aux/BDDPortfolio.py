@@ -0,0 +1,166 @@
+import copy
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from typing import List
+
+from aux import config
+from aux.AIGBDDParser import AIGBDDParser
+from aux.BDDParser import BDDParser
+from aux.Log import Log
+from aux.ParallelExecutor import ParallelExecutor
+from aux.ROBDDDOTParser import ROBDDDOTParser
+from aux.SBDDDOTParser import SBDDDOTParser
+from core.Benchmark import Benchmark
+
+
+def _construct(index: int, bdd_type: str, benchmark: Benchmark, size_bound, settings: dict, messages):
+    """
+    Constructs a single type of BDD. Defined at module level such that the BDDs can be constructed in separate
+    processes. The process leads its own process group, such that it can be killed together with ABC.
+    """
+    os.setpgrp()
+    ParallelExecutor.initialize(settings)
+    config.log = Log()
+
+    start_time = time.time()
+    try:
+        if config.aig_bdd:
+            parser = AIGBDDParser(benchmark, shared=bdd_type == "sbdd")
+        elif bdd_type == "robdd":
+            parser = ROBDDDOTParser(benchmark)
+        elif bdd_type == "sbdd":
+            parser = SBDDDOTParser(benchmark)
+        else:
+            raise Exception("Unsupported BDD type.")
+        parser.size_bound = size_bound
+        graph_topology = parser.parse()
+
+        # The BDDs are compared by the size of their merged graph, which is not logged
+        log = config.log
+        config.log = Log()
+        merged_graph_topology = copy.copy(graph_topology)
+        merged_graph_topology.merge()
+        config.log = log
+        size = len(merged_graph_topology.get_graphs()[0].nodes)
+    except Exception as e:
+        messages.put(("error", index, str(e).strip(), time.time() - start_time, config.log.content))
+        return
+    # A shared value cannot be sent to the main process
+    parser.size_bound = None
+    messages.put(("result", index, parser, size, time.time() - start_time, config.log.content))
+
+
+class BDDPortfolio:
+
+    def __init__(self, benchmark: Benchmark, bdd_types: List[str] = None, grace: float = 10):
+        """
+        Constructs several types of BDDs of a benchmark concurrently, each in a separate process, and keeps the BDD
+        with the smallest merged graph (fewest nodes).
+        As soon as a BDD is constructed, its size is shared with the other processes: an ROBDD construction stops as
+        soon as one of its ROBDDs has more nodes than this BDD, as the merged graph holds at least the nodes of every
+        ROBDD. The size of an SBDD is only known once ABC has constructed it, such that an SBDD construction runs
+        until then and stops before its graph is merged if it has more nodes. The construction of every BDD is limited
+        to config.time_limit_bdd.
+        :param benchmark: The benchmark.
+        :param bdd_types: The types of BDDs to construct. By default, "robdd" and "sbdd".
+        :param grace: The time in seconds that constructions may run beyond the time limit before they are stopped.
+        """
+        self.benchmark = benchmark
+        if bdd_types is None:
+            bdd_types = ["robdd", "sbdd"]
+        self.bdd_types = bdd_types
+        self.grace = grace
+        self.winner = None
+        self.parser = None
+        self.size = None
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    @staticmethod
+    def _kill(process):
+        if not process.is_alive():
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except OSError:
+            process.terminate()
+
+    def construct(self) -> BDDParser:
+        """
+        Constructs the BDDs.
+        :return: The parser of the smallest BDD, which holds the BDD as its benchmark graph.
+        """
+        self.start_time = time.time()
+
+        context = multiprocessing.get_context()
+        messages = context.Queue()
+        size_bound = context.Value('i', -1)
+        settings = ParallelExecutor.get_settings()
+        processes = []
+        for (index, bdd_type) in enumerate(self.bdd_types):
+            process = context.Process(target=_construct,
+                                      args=(index, bdd_type, self.benchmark, size_bound, settings, messages))
+            process.start()
+            processes.append(process)
+
+        deadline = None
+        if config.time_limit_bdd is not None:
+            deadline = self.start_time + config.time_limit_bdd + self.grace
+
+        done = set()
+        winner_log = ''
+        while len(done) < len(processes):
+            if deadline is not None and time.time() > deadline:
+                self.log += 'BDD portfolio time limit exceeded\n'
+                break
+
+            try:
+                message = messages.get(timeout=0.5)
+            except queue.Empty:
+                # A process that died without a message (e.g. out of memory) is done
+                for (index, process) in enumerate(processes):
+                    if index not in done and not process.is_alive() and messages.empty():
+                        done.add(index)
+                        self.log += 'BDD portfolio {}: died\n'.format(self.bdd_types[index])
+                continue
+
+            index = message[1]
+            bdd_type = self.bdd_types[index]
+            done.add(index)
+            if message[0] == "result":
+                (_, _, parser, size, duration, log) = message
+                self.log += 'BDD portfolio {}: nodes {}, time (s) {}\n'.format(bdd_type, size, duration)
+                if self.size is None or size < self.size:
+                    self.size = size
+                    self.parser = parser
+                    self.winner = bdd_type
+                    winner_log = log
+                    size_bound.value = size
+            else:
+                (_, _, error, duration, _) = message
+                self.log += 'BDD portfolio {}: stopped ({}), time (s) {}\n'.format(bdd_type, error, duration)
+
+        for process in processes:
+            self._kill(process)
+        for process in processes:
+            process.join()
+
+        self.end_time = time.time()
+
+        if self.parser is None:
+            config.log.add(self.get_log())
+            raise Exception("No BDD of the portfolio could be constructed.")
+
+        config.log.add(winner_log)
+        self.log += 'BDD portfolio winner: {}\n'.format(self.winner)
+        self.log += 'BDD portfolio time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        return self.parser
@@ -1,6 +1,9 @@
 import re
 from typing import Dict, List
 
+from networkx import DiGraph, NetworkXUnfeasible, topological_sort
+
+from core.AIG import AIG
 from core.Benchmark import Benchmark
 from aux.BenchmarkParser import BenchmarkParser
 
@@ -53,4 +56,77 @@ class BLIFParser(BenchmarkParser):
         if model is not None:
             self.benchmark.model = model
 
+        try:
+            self.benchmark.aig = self._get_aig(input_variables, output_variables)
+        except Exception as e:
+            print("\tNo AIG: {}".format(e))
+
         return self.benchmark
+
+    def _get_aig(self, input_variables: List[str], output_variables: List[str]) -> AIG:
+        """
+        Builds an AIG from the .names blocks. Every block is a cover of cubes: the cubes with output 1 form the
+        on-set of the signal, and the cubes with output 0 form its off-set.
+        """
+        # Lines that end with a backslash continue on the next line
+        content = re.sub(r'\\\s*\n', ' ', self.content)
+        definitions = dict()
+        signal = None
+        for raw_line in content.split("\n"):
+            line = raw_line.split("#")[0].strip()
+            if line == "":
+                continue
+            tokens = line.split()
+            if tokens[0] == ".names":
+                signal = tokens[-1]
+                definitions[signal] = (tokens[1:-1], [])
+            elif tokens[0] in [".latch", ".subckt", ".gate", ".mlatch"]:
+                raise Exception("Unsupported BLIF construct {}.".format(tokens[0]))
+            elif tokens[0].startswith("."):
+                signal = None
+            elif signal is not None:
+                definitions[signal][1].append(tokens)
+
+        dependencies = DiGraph()
+        for (signal, (fanins, _)) in definitions.items():
+            dependencies.add_node(signal)
+            for fanin in fanins:
+                dependencies.add_edge(fanin, signal)
+        try:
+            order = list(topological_sort(dependencies))
+        except NetworkXUnfeasible:
+            raise Exception("Combinational cycle.")
+
+        aig = AIG(self.benchmark.model, input_variables, output_variables)
+        literals = dict((input_variable, aig.get_input(input_variable)) for input_variable in input_variables)
+        for signal in order:
+            if signal in literals:
+                continue
+            if signal not in definitions:
+                raise Exception("Undefined signal {}.".format(signal))
+            (fanins, cubes) = definitions[signal]
+            products = []
+            on_set = True
+            for cube in cubes:
+                if len(fanins) == 0:
+                    (inputs, output) = ('', cube[0])
+                else:
+                    (inputs, output) = (cube[0], cube[1])
+                on_set = output == '1'
+                product = []
+                for (fanin, value) in zip(fanins, inputs):
+                    if value == '1':
+                        product.append(literals[fanin])
+                    elif value == '0':
+                        product.append(aig.get_not(literals[fanin]))
+                products.append(aig.add_and_all(product))
+            literal = aig.add_or_all(products)
+            if not on_set:
+                literal = aig.get_not(literal)
+            literals[signal] = literal
+
+        for output_variable in output_variables:
+            if output_variable not in literals:
+                raise Exception("Undefined output {}.".format(output_variable))
+            aig.set_output(output_variable, literals[output_variable])
+        return aig
@@ -37,6 +37,8 @@ class BenchmarkReader:
         self.log += 'Benchmark: {}\n'.format(benchmark.name)
         self.log += 'Inputs: {}\n'.format(len(benchmark.input_variables))
         self.log += 'Outputs: {}\n'.format(len(benchmark.output_variables))
+        if benchmark.aig is not None:
+            self.log += 'AIG nodes: {}\n'.format(benchmark.aig.get_number_of_ands())
 
         for line in self.log.splitlines():
             print("\t{}".format(line))
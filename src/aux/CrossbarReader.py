@@ -1,5 +1,7 @@
 import re
 
+import numpy as np
+
 from core.Literal import Literal
 from core.MemristorCrossbar import MemristorCrossbar
 
@@ -13,6 +15,8 @@ class CrossbarReader:
     def read(self):
         rows = 0
         columns = 0
+        layers = 1
+        sparse = False
         input_variables = None
         input_nanowires = dict()
         output_nanowires = dict()
@@ -28,6 +32,13 @@ class CrossbarReader:
                     (_, raw_value) = line.split()
                     columns = int(raw_value)
 
+                elif line.startswith(".layers "):
+                    (_, raw_value) = line.split()
+                    layers = int(raw_value)
+
+                elif line.startswith(".entries"):
+                    sparse = True
+
                 elif line.startswith(".inputs "):
                     raw_values = line.split()
                     input_variables = set(raw_values[1:])
@@ -40,11 +51,15 @@ class CrossbarReader:
                     raw_values = line.split()
                     output_nanowires[raw_values[1]] = (int(raw_values[2]), int(raw_values[3]))
 
-        self.crossbar = MemristorCrossbar(rows, columns)
+        self.crossbar = MemristorCrossbar(rows, columns, layers=layers, sparse=sparse)
         self.crossbar.input_variables = input_variables
         self.crossbar.input_nanowires = input_nanowires
         self.crossbar.output_nanowires = output_nanowires
 
+        if sparse:
+            self._read_entries()
+            return self.crossbar
+
         with open(self.file_name, 'r') as f:
             r = 0
             c = 0
@@ -56,15 +71,7 @@ class CrossbarReader:
 
                 if read:
                     for element in line.split("\t"):
-                        raw_literal = re.findall(r'(-|0|1|[\[\]a-z0-9]+|~[\[\]a-z0-9]+)', element)[0]
-                        if raw_literal == '0':
-                            self.crossbar.set_memristor(r, c, Literal('False', False))
-                        elif raw_literal == '1':
-                            self.crossbar.set_memristor(r, c, Literal('True', True))
-                        elif raw_literal[0] == '~':
-                            self.crossbar.set_memristor(r, c, Literal(raw_literal[1:], False))
-                        else:
-                            self.crossbar.set_memristor(r, c, Literal(raw_literal, True))
+                        self.crossbar.set_memristor(r, c, self._parse_literal(element))
                         c += 1
                     c = 0
                     r += 1
@@ -73,3 +80,41 @@ class CrossbarReader:
                     read = True
 
         return self.crossbar
+
+    @staticmethod
+    def _parse_literal(element: str) -> Literal:
+        raw_literal = re.findall(r'(-|0|1|[\[\]a-z0-9]+|~[\[\]a-z0-9]+)', element)[0]
+        if raw_literal == '0':
+            return Literal('False', False)
+        elif raw_literal == '1':
+            return Literal('True', True)
+        elif raw_literal[0] == '~':
+            return Literal(raw_literal[1:], False)
+        else:
+            return Literal(raw_literal, True)
+
+    def _read_entries(self):
+        """
+        Reads the memristors of a sparse crossbar (layer, row, column and literal per line), which are written in bulk
+        without building the matrix of the crossbar.
+        """
+        entries = [([], [], []) for _ in range(self.crossbar.layers)]
+        with open(self.file_name, 'r') as f:
+            read = False
+            for line in f.read().splitlines():
+                if line.startswith(".end"):
+                    read = False
+
+                if read:
+                    (raw_layer, raw_row, raw_column, element) = line.split()
+                    (rows, columns, codes) = entries[int(raw_layer)]
+                    rows.append(int(raw_row))
+                    columns.append(int(raw_column))
+                    codes.append(self.crossbar.get_literal_code(self._parse_literal(element)))
+
+                if line.startswith(".entries"):
+                    read = True
+
+        for (layer, (rows, columns, codes)) in enumerate(entries):
+            self.crossbar.set_memristors(np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64),
+                                         np.array(codes, dtype=np.int64), layer=layer)
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import tempfile
+import warnings
+from pathlib import Path
+
+from networkx import DiGraph, Graph, weisfeiler_lehman_graph_hash
+from networkx.algorithms.isomorphism import DiGraphMatcher, GraphMatcher
+
+from aux import config
+
+
+class LabelingCache:
+
+    def __init__(self, method: str, layers: int = 1):
+        """
+        Persistent cache of solved labelings.
+        Only labelings that the solver proved optimal are stored, such that the time limit and the stopping
+        criteria of the solver (target gap, stall time) do not affect the labeling and are not part of the key.
+        A labeling is stored under a hash of the graph and the options of the solver. The graph is hashed with the
+        Weisfeiler-Lehman graph hash over the attributes that affect the labeling (terminal and root nodes).
+        As different graphs may have the same hash, every entry is confirmed with an isomorphism check,
+        and the labeling is remapped onto the nodes of the given graph.
+        The cache holds at most config.cache_size entries. The least recently used entries are removed first.
+        :param method: The labeling method, e.g. "vh", "k" or "k-alt".
+        :param layers: The number of layers of memristors (only for K-labeling).
+        """
+        self.method = method
+        self.layers = layers
+        self.path = Path(config.cache_path)
+
+    def _get_options(self) -> list:
+        return [self.method, self.layers, config.solver, config.io_constraints, config.input_layer, config.output_layer,
+                config.objective, config.gamma, config.max_rows, config.max_columns]
+
+    @staticmethod
+    def _get_attributes(graph: Graph, v) -> str:
+        d = graph.nodes[v]
+        return "{}{}".format(int(bool(d.get("terminal"))), int(bool(d.get("root"))))
+
+    def _get_key(self, graph: Graph) -> str:
+        labeled_graph = graph.copy()
+        for v in labeled_graph.nodes:
+            labeled_graph.nodes[v]["label"] = self._get_attributes(graph, v)
+        with warnings.catch_warnings():
+            # Hashes may differ between versions of networkx, which only results in cache misses
+            warnings.simplefilter("ignore")
+            graph_hash = weisfeiler_lehman_graph_hash(labeled_graph, node_attr="label")
+        content = json.dumps([graph_hash, self._get_options()])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _get_file_path(self, key: str) -> Path:
+        return self.path.joinpath("{}.json".format(key))
+
+    def _read(self, key: str) -> list:
+        file_path = self._get_file_path(key)
+        if not file_path.is_file():
+            return []
+        try:
+            with open(file_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _to_graph(self, entry: dict) -> Graph:
+        if entry["directed"]:
+            graph = DiGraph()
+        else:
+            graph = Graph()
+        for i in range(len(entry["nodes"])):
+            graph.add_node(i, label=entry["nodes"][i])
+        graph.add_edges_from(entry["edges"])
+        return graph
+
+    def _match(self, entry: dict, graph: Graph):
+        """
+        Returns a mapping from the nodes of the cached graph to the nodes of the given graph, or None if both
+        graphs are not isomorphic.
+        """
+        cached_graph = self._to_graph(entry)
+        labeled_graph = DiGraph() if graph.is_directed() else Graph()
+        for v in graph.nodes:
+            labeled_graph.add_node(v, label=self._get_attributes(graph, v))
+        labeled_graph.add_edges_from(graph.edges)
+
+        def node_match(a, b):
+            return a["label"] == b["label"]
+
+        if graph.is_directed():
+            matcher = DiGraphMatcher(cached_graph, labeled_graph, node_match=node_match)
+        else:
+            matcher = GraphMatcher(cached_graph, labeled_graph, node_match=node_match)
+        if not matcher.is_isomorphic():
+            return None
+        return matcher.mapping
+
+    def _remap(self, labeling, mapping: dict):
+        if self.method == "vh":
+            return dict((mapping[int(i)], label) for (i, label) in labeling.items())
+        (rows, columns, node_assignments, edge_assignments) = labeling
+        node_assignments = dict((mapping[int(i)], layers) for (i, layers) in node_assignments.items())
+        edge_assignments = dict(((mapping[u], mapping[v]), (l0, l1)) for (u, v, l0, l1) in edge_assignments)
+        return rows, columns, node_assignments, edge_assignments
+
+    def get(self, graph: Graph):
+        """
+        Returns the cached labeling of the given graph, or None if the graph is not in the cache.
+        """
+        key = self._get_key(graph)
+        for entry in self._read(key):
+            if len(entry["nodes"]) != len(graph.nodes) or len(entry["edges"]) != len(graph.edges):
+                continue
+            mapping = self._match(entry, graph)
+            if mapping is not None:
+                # We mark the entry as recently used
+                try:
+                    os.utime(self._get_file_path(key))
+                except OSError:
+                    pass
+                return self._remap(entry["labeling"], mapping)
+        return None
+
+    def put(self, graph: Graph, labeling):
+        """
+        Stores the labeling of the given graph in the cache. The labeling must be optimal.
+        """
+        index = dict((v, i) for (i, v) in enumerate(graph.nodes))
+        if self.method == "vh":
+            stored_labeling = dict((index[v], label) for (v, label) in labeling.items())
+        else:
+            (rows, columns, node_assignments, edge_assignments) = labeling
+            stored_labeling = [rows, columns,
+                               dict((index[v], layers) for (v, layers) in node_assignments.items()),
+                               [[index[u], index[v], l0, l1] for ((u, v), (l0, l1)) in edge_assignments.items()]]
+        entry = {
+            "directed": graph.is_directed(),
+            "nodes": [self._get_attributes(graph, v) for v in graph.nodes],
+            "edges": [[index[u], index[v]] for (u, v) in graph.edges],
+            "labeling": stored_labeling
+        }
+
+        key = self._get_key(graph)
+        entries = self._read(key)
+        entries.append(entry)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        # The file is replaced atomically, such that concurrent processes never read a partial entry
+        (fd, temporary_path) = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        os.replace(temporary_path, self._get_file_path(key))
+
+        self._evict()
+
+    def _evict(self):
+        file_paths = list(self.path.glob("*.json"))
+        if len(file_paths) <= config.cache_size:
+            return
+        file_paths.sort(key=lambda file_path: file_path.stat().st_mtime)
+        for file_path in file_paths[:len(file_paths) - config.cache_size]:
+            try:
+                file_path.unlink()
+            except OSError:
+                pass
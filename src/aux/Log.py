@@ -17,9 +17,9 @@ class Log:
         self.content = ''
 
     def add(self, content):
-        if self.log_file_name is not None:
-            self.content += content
+        self.content += content
 
+        if self.log_file_name is not None:
             with open(self.log_file_name, "a") as f:
                 f.write(content)
 
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from aux import config
+from core.Benchmark import Benchmark
+
+
+class OrderCache:
+
+    def __init__(self, benchmark: Benchmark, method: str = None, cost: str = None):
+        """
+        Persistent cache of variable orders per benchmark.
+        The orders of a benchmark are stored in a single file under a hash of the content of the benchmark file, such
+        that the orders of a modified benchmark are not reused. Within the file, the orders are stored per reordering
+        method and cost, and per BDD under the output variables of the BDD.
+        :param benchmark: The benchmark of the BDDs.
+        :param method: The reordering method. By default, config.reorder is used.
+        :param cost: The cost of the reordering. By default, config.reorder_cost is used.
+        """
+        if method is None:
+            method = config.reorder
+        if cost is None:
+            cost = config.reorder_cost
+        self.key = "{}-{}".format(method, cost)
+        self.path = Path(config.order_path)
+        self.file_path = self.path.joinpath("{}-{}.json".format(benchmark.name, self._get_hash(benchmark)))
+
+    @staticmethod
+    def _get_hash(benchmark: Benchmark) -> str:
+        try:
+            with open(benchmark.file_path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()[:16]
+        except (OSError, TypeError):
+            return hashlib.sha256(benchmark.name.encode()).hexdigest()[:16]
+
+    def _read(self) -> Dict:
+        if not self.file_path.is_file():
+            return dict()
+        try:
+            with open(self.file_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+    def get(self, outputs: str) -> List[str]:
+        """
+        Returns the cached order of the BDD of the given output variables, or None if there is none.
+        """
+        return self._read().get(self.key, dict()).get(outputs)
+
+    def put(self, orders: Dict[str, List[str]]):
+        """
+        Stores the orders of the BDDs, keyed by their output variables.
+        """
+        entries = self._read()
+        entries.setdefault(self.key, dict()).update(orders)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        # The file is replaced atomically, such that concurrent processes never read a partial entry
+        (fd, temporary_path) = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        os.replace(temporary_path, self.file_path)
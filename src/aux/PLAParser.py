@@ -1,6 +1,7 @@
 import re
 from typing import Dict, List
 
+from core.AIG import AIG
 from core.Benchmark import Benchmark
 from aux.BenchmarkParser import BenchmarkParser
 
@@ -76,4 +77,38 @@ class PLAParser(BenchmarkParser):
 
         self.benchmark = Benchmark(self.file_path, input_variables, output_variables)
 
+        try:
+            self.benchmark.aig = self._get_aig(lines, input_variables, output_variables)
+        except Exception as e:
+            print("\tNo AIG: {}".format(e))
+
         return self.benchmark
+
+    def _get_aig(self, lines: List[str], input_variables: List[str], output_variables: List[str]) -> AIG:
+        """
+        Builds an AIG from the cubes. Every output is the disjunction of the cubes with a 1 for the output.
+        """
+        aig = AIG(self.benchmark.name, input_variables, output_variables)
+        literals = [aig.get_input(input_variable) for input_variable in input_variables]
+        products = dict((output_variable, []) for output_variable in output_variables)
+        for raw_line in lines:
+            line = raw_line.strip()
+            if line == "" or line.startswith('.') or line.startswith('#'):
+                continue
+            cube = line.replace(' ', '').replace('\t', '').replace('|', '')
+            if len(cube) != len(input_variables) + len(output_variables):
+                raise Exception("Invalid cube {}.".format(line))
+            product = []
+            for (literal, value) in zip(literals, cube[:len(input_variables)]):
+                if value == '1':
+                    product.append(literal)
+                elif value == '0':
+                    product.append(aig.get_not(literal))
+            literal = aig.add_and_all(product)
+            for (output_variable, value) in zip(output_variables, cube[len(input_variables):]):
+                if value == '1':
+                    products[output_variable].append(literal)
+
+        for output_variable in output_variables:
+            aig.set_output(output_variable, aig.add_or_all(products[output_variable]))
+        return aig
@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePath
+from typing import Callable, Dict, List, Tuple
+
+from aux import config
+from aux.Log import Log
+
+
+def _execute(function: Callable, arguments: Tuple):
+    # The log of a worker is collected and returned to the main process
+    config.log = Log()
+    result = function(*arguments)
+    return result, config.log.content
+
+
+class ParallelExecutor:
+
+    def __init__(self, jobs: int = None):
+        """
+        Executes independent tasks in a pool of worker processes.
+        :param jobs: The number of worker processes. By default, the number of jobs in the config is used.
+        """
+        if jobs is None:
+            jobs = config.jobs
+        self.jobs = max(1, jobs)
+
+    @staticmethod
+    def get_settings() -> Dict:
+        """
+        Returns the settings of the config module that hold plain values.
+        These settings are copied into every worker process, such that workers behave as the main process
+        regardless of the start method of the processes (fork or spawn).
+        :return: A dictionary from setting names to values.
+        """
+        settings = dict()
+        for (name, value) in vars(config).items():
+            if name.startswith('_'):
+                continue
+            if isinstance(value, (bool, int, float, str, PurePath, type(None))):
+                settings[name] = value
+        return settings
+
+    @staticmethod
+    def initialize(settings: Dict):
+        """
+        Applies the given settings (see get_settings) to the config module of a worker process.
+        """
+        for (name, value) in settings.items():
+            setattr(config, name, value)
+        # A worker never spawns workers itself
+        config.jobs = 1
+        # A worker writes to its own solver log and working files
+        config.worker_id = os.getpid()
+
+    def map(self, function: Callable, arguments: List[Tuple]) -> List:
+        """
+        Applies the given function to each tuple of arguments.
+        The function must be defined at module level such that it can be sent to the worker processes.
+        The results and the logs of the workers are returned in the order of the given arguments.
+        :param function: The function to apply.
+        :param arguments: A list of tuples of arguments.
+        :return: A list of results.
+        """
+        if self.jobs == 1 or len(arguments) <= 1:
+            return [function(*argument) for argument in arguments]
+
+        workers = min(self.jobs, len(arguments))
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=ParallelExecutor.initialize,
+                                 initargs=(ParallelExecutor.get_settings(),)) as executor:
+            futures = [executor.submit(_execute, function, argument) for argument in arguments]
+            for future in futures:
+                result, log = future.result()
+                config.log.add(log)
+                results.append(result)
+        return results
@@ -1,6 +1,5 @@
 import os
 import re
-import shutil
 import time
 from datetime import datetime
 
@@ -96,7 +95,7 @@ class ROBDDDOTParser(BDDParser):
         self.log += 'BDD type: ROBDD\n'
 
         # Copy the file from its current location to abc folder
-        shutil.copy(self.benchmark.file_path, self.abc_file_path)
+        self._copy_benchmark(self.abc_file_path)
 
         # Generate BDD using ABC
         dot_bdds = self._write_files()
@@ -182,6 +181,9 @@ class ROBDDDOTParser(BDDParser):
             else:
                 Exception("BDD must at least have a positive or a negative terminal.")
 
+            # The merged graph holds at least the nodes of every ROBDD, except for the terminal zero node
+            self._check_size_bound(len(bdd.nodes) - 1)
+
             directed_graph = bdd.copy(as_view=False)
             self.benchmark_graph.add_graph(directed_graph)
             self.directed_graph = disjoint_union(self.directed_graph, directed_graph)
@@ -0,0 +1,113 @@
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from aux import config
+
+# The coefficients of the default model per labeling method, which is used until enough runs are recorded
+# (fitted on random ROBDDs of up to 130 nodes with CBC)
+_DEFAULT_COEFFICIENTS = {
+    "k": [-14.7, 1.7, 1.7],
+    "vh": [-15.2, 2.2, 0.0]
+}
+
+
+class RuntimeModel:
+
+    def __init__(self, method: str, min_runs: int = 3, max_runs: int = 1000, regularization: float = 1.0):
+        """
+        Predicts the solve time of an ILP from the statistics of the model, with a model that is fitted on the
+        recorded runs of previous invocations (in the file config.runtime_path).
+        The logarithm of the solve time is fitted by least squares as a linear function of the logarithm of the
+        number of nonzeros and the number of layers. Only the runs of the same labeling method and solver that
+        finished within their time limit are fitted. The coefficients are regularized towards those of the default
+        model, such that a few runs of similar sizes do not lead to wild extrapolations.
+        As the solve time grows with the size of the model, the prediction is at least the time of every run of a
+        smaller model that did not finish within its time limit.
+        :param method: The labeling method, "k" or "vh".
+        :param min_runs: The number of finished runs from which the fitted model is used instead of the default model.
+        :param max_runs: The maximum number of recorded runs. The oldest runs are removed first.
+        :param regularization: The weight of the default coefficients in the fit.
+        """
+        self.method = method
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.regularization = regularization
+        self.path = Path(config.runtime_path)
+        self.coefficients = None
+        self.fitted = False
+
+    def _read(self) -> List[Dict]:
+        if not self.path.is_file():
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _get_runs(self) -> List[Dict]:
+        return [run for run in self._read() if run["method"] == self.method and run["solver"] == config.solver]
+
+    @staticmethod
+    def _get_features(statistics: Dict) -> List[float]:
+        return [1.0, math.log(max(1, statistics["nonzeros"])), statistics["layers"]]
+
+    def fit(self):
+        runs = [run for run in self._get_runs() if run["solved"]]
+        if len(runs) < self.min_runs:
+            self.coefficients = _DEFAULT_COEFFICIENTS[self.method]
+            self.fitted = False
+            return
+        features = np.array([self._get_features(run) for run in runs])
+        times = np.array([math.log(max(run["time"], 1e-3)) for run in runs])
+        default_coefficients = np.array(_DEFAULT_COEFFICIENTS[self.method])
+        # Ridge regression towards the default coefficients
+        regularization = self.regularization * np.identity(len(default_coefficients))
+        coefficients = np.linalg.solve(features.T @ features + regularization,
+                                       features.T @ times + regularization @ default_coefficients)
+        self.coefficients = [float(c) for c in coefficients]
+        self.fitted = True
+
+    def predict(self, statistics: Dict) -> float:
+        """
+        :return: The predicted solve time in seconds.
+        """
+        if self.coefficients is None:
+            self.fit()
+        features = self._get_features(statistics)
+        prediction = math.exp(sum(c * f for (c, f) in zip(self.coefficients, features)))
+        for run in self._get_runs():
+            if not run["solved"] and run["nonzeros"] <= statistics["nonzeros"] and \
+                    run["layers"] <= statistics["layers"]:
+                prediction = max(prediction, run["time"])
+        return prediction
+
+    def add(self, statistics: Dict, time: float, solved: bool):
+        """
+        Records a run.
+        :param statistics: The statistics of the model.
+        :param time: The solve time in seconds.
+        :param solved: True if the run finished within its time limit.
+        """
+        run = dict(statistics)
+        run["method"] = self.method
+        run["solver"] = config.solver
+        run["time"] = time
+        run["solved"] = solved
+        runs = self._read()
+        runs.append(run)
+        runs = runs[-self.max_runs:]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The file is replaced atomically, such that concurrent processes never read a partial file
+        (fd, temporary_path) = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(runs, f)
+        os.replace(temporary_path, self.path)
+        self.coefficients = None
@@ -1,7 +1,6 @@
 import itertools
 import os
 import re
-import shutil
 import time
 from datetime import datetime
 
@@ -88,7 +87,7 @@ class SBDDDOTParser(BDDParser):
         self.log += 'BDD type: SBDD\n'
 
         # Copy the file from its current location to abc folder
-        shutil.copy(self.benchmark.file_path, self.abc_file_path)
+        self._copy_benchmark(self.abc_file_path)
 
         # Generate BDD using ABC
         dot_content = self._write_files()
@@ -193,6 +192,9 @@ class SBDDDOTParser(BDDParser):
         else:
             Exception("BDD must at least have a positive or a negative terminal.")
 
+        # The merged graph holds the nodes of the SBDD, except for the terminal zero node
+        self._check_size_bound(len(bdd.nodes) - 1)
+
         directed_graph = bdd.copy(as_view=False)
         self.benchmark_graph.add_graph(directed_graph)
         self.directed_graph = disjoint_union(self.directed_graph, directed_graph)
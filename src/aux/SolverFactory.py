@@ -0,0 +1,104 @@
+import os
+import tempfile
+
+from pulp import CPLEX_CMD, PULP_CBC_CMD, LpProblem, LpSolver_CMD, LpSolutionOptimal, LpSolutionIntegerFeasible, \
+    LpStatusInfeasible
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.SolverMonitor import SolverMonitor
+
+
+class SolverFactory:
+    """
+    Creates the ILP solvers for the labelings. The solver is either CPLEX (config.solver = "cplex") or CBC
+    (config.solver = "cbc"), which is shipped with PuLP.
+    Each worker process gets its own solver log and working files, such that labelings can be solved concurrently.
+    """
+
+    @staticmethod
+    def get_log_path() -> str:
+        if config.worker_id is None:
+            return str(config.root.joinpath("{}.log".format(config.solver)))
+        return os.path.join(tempfile.gettempdir(), "{}_{}.log".format(config.solver, config.worker_id))
+
+    @staticmethod
+    def get_problem_name(name: str) -> str:
+        """
+        Returns a unique name for the problem of this process. The working files of the solver are named after
+        the problem.
+        """
+        if config.worker_id is None:
+            return name
+        return "{}_{}".format(name, config.worker_id)
+
+    @staticmethod
+    def get_solver(warm_start: bool = False) -> LpSolver_CMD:
+        """
+        :param warm_start: If true, the solver starts from the initial values of the variables.
+        """
+        gap = None
+        if config.target_gap is not None:
+            gap = config.target_gap / 100
+        if config.solver == "cplex":
+            options = []
+            if config.solver_seed is not None:
+                options.append("set randomseed {}".format(config.solver_seed))
+            return CPLEX_CMD(path=config.cplex_path, msg=False, keepFiles=config.keep_files,
+                             timeLimit=config.time_limit, gapRel=gap, logPath=SolverFactory.get_log_path(),
+                             warmStart=warm_start, options=options)
+        elif config.solver == "cbc":
+            options = []
+            if config.solver_seed is not None:
+                options.append("randomCbcSeed {}".format(config.solver_seed))
+            return PULP_CBC_CMD(msg=False, keepFiles=config.keep_files, timeLimit=config.time_limit, gapRel=gap,
+                                logPath=SolverFactory.get_log_path(), warmStart=warm_start, options=options)
+        else:
+            raise Exception("Unsupported solver: {}".format(config.solver))
+
+    @staticmethod
+    def solve(problem: LpProblem, solver: LpSolver_CMD) -> SolverMonitor:
+        """
+        Solves the given problem while the progress of the solver is streamed from its log.
+        :return: The monitor with the progress of the solver.
+        """
+        if os.path.isfile(SolverFactory.get_log_path()):
+            os.remove(SolverFactory.get_log_path())
+        solver_monitor = SolverMonitor(SolverFactory.get_log_path(), stall_time=config.stall_time)
+        solver_monitor.start()
+        try:
+            problem.solve(solver)
+        finally:
+            solver_monitor.stop()
+        return solver_monitor
+
+    @staticmethod
+    def has_solution(problem: LpProblem, solver_monitor: SolverMonitor) -> bool:
+        """
+        Returns true if the solver found a solution, which may not be optimal.
+        Raises an InfeasibleSolutionException if the problem is infeasible, or if no solution was found outside
+        anytime mode.
+        CPLEX_CMD reports infeasibility whenever CPLEX wrote no solution, e.g. at the time limit, so for CPLEX the log
+        decides whether the problem is infeasible.
+        """
+        if problem.sol_status in [LpSolutionOptimal, LpSolutionIntegerFeasible]:
+            return True
+        if config.solver == "cplex":
+            infeasible = solver_monitor.infeasible
+        else:
+            infeasible = problem.status == LpStatusInfeasible
+        if infeasible:
+            raise InfeasibleSolutionException("Infeasible solution.")
+        if not config.anytime:
+            raise InfeasibleSolutionException("No solution found.")
+        return False
+
+    @staticmethod
+    def is_optimal(problem: LpProblem, solver_monitor: SolverMonitor) -> bool:
+        """
+        Returns true if the solver proved the solution optimal. A solution is not proven optimal if the solver
+        stopped at the time limit, at the target gap, or because the incumbent did not improve.
+        CPLEX reports a solution within the target gap as optimal, such that the target gap decides.
+        """
+        return problem.sol_status == LpSolutionOptimal and config.target_gap is None and \
+            not solver_monitor.interrupted
@@ -0,0 +1,248 @@
+import os
+import re
+import signal
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from aux import config
+
+_NUMBER = r'([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)'
+_DECIMAL = r'([-+]?\d+\.\d+(?:[eE][-+]?\d+)?)'
+
+# CBC
+_CBC_PROGRESS = re.compile(r'Cbc0010I After (\d+) nodes, \d+ on tree, ' + _NUMBER + r' best solution, best possible '
+                           + _NUMBER)
+_CBC_SOLUTION = re.compile(r'Cbc00(?:04|12)I Integer solution of ' + _NUMBER + r' found .* and (\d+) nodes')
+_CBC_COMPLETED = re.compile(r'Cbc0001I Search completed - best objective ' + _NUMBER + r', took \d+ iterations and '
+                            r'(\d+) nodes')
+_CBC_OBJECTIVE = re.compile(r'^Objective value:\s+' + _NUMBER)
+_CBC_BOUND = re.compile(r'^Lower bound:\s+' + _NUMBER)
+
+# CPLEX
+# Node log: Node Left Objective IInf BestInteger BestBound ItCnt Gap, where some columns may be empty
+_CPLEX_NODE = re.compile(r'^\*?\s*(\d+)\+?\s+\d+\s.*\s' + _DECIMAL + r'\s+' + _DECIMAL + r'(?:\s+\d+)?\s+' + _DECIMAL
+                         + r'%\s*$')
+_CPLEX_INCUMBENT = re.compile(r'Found incumbent of value ' + _NUMBER)
+_CPLEX_BOUND = re.compile(r'Current MIP best bound =\s+' + _NUMBER + r' \(gap = ' + _NUMBER + r', ' + _NUMBER + r'%\)')
+_CPLEX_OBJECTIVE = re.compile(r'Objective =\s+' + _NUMBER)
+_CPLEX_OPTIMAL = re.compile(r'Integer optimal.*Objective =\s+' + _NUMBER)
+
+# Proofs of infeasibility of CPLEX and CBC
+_INFEASIBLE = re.compile(r'(?i)(integer infeasible|presolve - infeasible|proven infeasible|problem is infeasible)')
+
+# Values at or above this magnitude denote the absence of a solution or bound
+_INFINITY = 1e50
+
+
+class SolverMonitor:
+    """
+    Streams the progress of a running solver from its log file.
+    The monitor tails the log in a background thread and parses the incumbent objective, the best bound,
+    the relative gap and the number of nodes from the node logs of CPLEX and CBC.
+    Every change of the incumbent or the bound is passed to the callbacks and added to the log with a timestamp.
+    If the incumbent does not improve for a given time, the solver is interrupted. Both CPLEX and CBC stop the
+    search on an interrupt and still write their incumbent.
+    """
+
+    # Callbacks that are called for every solver run
+    callbacks = []
+
+    def __init__(self, log_path: str, callbacks: List[Callable[[Dict], None]] = None, interval: float = 0.5,
+                 stall_time: float = None):
+        """
+        :param log_path: The path of the log file of the solver.
+        :param callbacks: Optionally, functions that are called with each progress record, in addition to the
+        callbacks of the class. A progress record is a dictionary with the keys time, elapsed, incumbent, bound,
+        gap and nodes.
+        :param interval: The time in seconds between two reads of the log file.
+        :param stall_time: Optionally, the time in seconds without improvement of the incumbent after which the
+        solver is interrupted.
+        """
+        self.log_path = log_path
+        self.callbacks = list(SolverMonitor.callbacks)
+        if callbacks is not None:
+            self.callbacks.extend(callbacks)
+        self.interval = interval
+        self.stall_time = stall_time
+        self.records = []
+        self.incumbent = None
+        self.bound = None
+        self.gap = None
+        self.nodes = 0
+        self.infeasible = False
+        self.interrupted = False
+        self.start_time = None
+        self.improvement_time = None
+        self._position = 0
+        self._buffer = ''
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def add_callback(callback: Callable[[Dict], None]):
+        SolverMonitor.callbacks.append(callback)
+
+    @staticmethod
+    def remove_callback(callback: Callable[[Dict], None]):
+        SolverMonitor.callbacks.remove(callback)
+
+    def start(self):
+        self.start_time = time.time()
+        # A solver may append to an existing log file, which we skip
+        if os.path.isfile(self.log_path):
+            self._position = os.path.getsize(self.log_path)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._read()
+        # The last line of the log may not end with a new line
+        if self._buffer != '':
+            self._parse(self._buffer)
+            self._buffer = ''
+
+    def get_gap(self) -> float:
+        """
+        Returns the last relative gap (%), or 0 if no gap was reported.
+        """
+        if self.gap is None:
+            return 0
+        return self.gap
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._read()
+            if self.stall_time is not None and self.incumbent is not None and not self.interrupted:
+                if time.time() - self.improvement_time >= self.stall_time:
+                    self._interrupt()
+
+    def _interrupt(self):
+        """
+        Interrupts the solver processes started by this process. Solvers are the child processes named after
+        config.solver, which are found through /proc (only on Linux).
+        """
+        self.interrupted = True
+        config.log.add('Solver interrupted: no improvement for {} s\n'.format(self.stall_time))
+        if not os.path.isdir('/proc'):
+            return
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(os.path.join('/proc', pid, 'stat'), 'r') as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # The name of the command is enclosed in parentheses and may contain spaces
+            name = stat[stat.index('(') + 1:stat.rindex(')')]
+            parent = int(stat[stat.rindex(')') + 2:].split()[1])
+            if parent == os.getpid() and name.startswith(config.solver):
+                try:
+                    os.kill(int(pid), signal.SIGINT)
+                except OSError:
+                    pass
+
+    def _read(self):
+        if not os.path.isfile(self.log_path):
+            return
+        # A solver may truncate the log file when it starts
+        if os.path.getsize(self.log_path) < self._position:
+            self._position = 0
+        with open(self.log_path, 'r') as f:
+            f.seek(self._position)
+            content = f.read()
+            self._position = f.tell()
+        lines = (self._buffer + content).split('\n')
+        self._buffer = lines.pop()
+        for line in lines:
+            self._parse(line)
+
+    def _parse(self, line: str):
+        if _INFEASIBLE.search(line):
+            self.infeasible = True
+
+        incumbent = self.incumbent
+        bound = self.bound
+        gap = None
+        nodes = self.nodes
+
+        match = _CBC_PROGRESS.search(line)
+        if match:
+            nodes = int(match.group(1))
+            incumbent = float(match.group(2))
+            bound = float(match.group(3))
+        match = _CBC_SOLUTION.search(line)
+        if match:
+            incumbent = float(match.group(1))
+            nodes = int(match.group(2))
+        match = _CBC_COMPLETED.search(line)
+        if match:
+            incumbent = float(match.group(1))
+            nodes = int(match.group(2))
+            if incumbent < _INFINITY:
+                bound = incumbent
+        match = _CBC_OBJECTIVE.search(line)
+        if match:
+            incumbent = float(match.group(1))
+        match = _CBC_BOUND.search(line)
+        if match:
+            bound = float(match.group(1))
+
+        match = _CPLEX_NODE.search(line)
+        if match:
+            nodes = int(match.group(1))
+            incumbent = float(match.group(2))
+            bound = float(match.group(3))
+            gap = float(match.group(4))
+        match = _CPLEX_INCUMBENT.search(line)
+        if match:
+            incumbent = float(match.group(1))
+        match = _CPLEX_BOUND.search(line)
+        if match:
+            bound = float(match.group(1))
+            gap = float(match.group(3))
+        match = _CPLEX_OBJECTIVE.search(line)
+        if match:
+            incumbent = float(match.group(1))
+        match = _CPLEX_OPTIMAL.search(line)
+        if match:
+            bound = float(match.group(1))
+
+        if incumbent is not None and abs(incumbent) >= _INFINITY:
+            incumbent = None
+        if bound is not None and abs(bound) >= _INFINITY:
+            bound = None
+        if gap is None and incumbent is not None and bound is not None:
+            gap = 100 * abs(incumbent - bound) / max(abs(incumbent), 1e-10)
+
+        self.nodes = nodes
+        if incumbent == self.incumbent and bound == self.bound:
+            return
+        if incumbent != self.incumbent:
+            self.improvement_time = time.time()
+        self.incumbent = incumbent
+        self.bound = bound
+        if gap is not None:
+            self.gap = gap
+        self._report()
+
+    def _report(self):
+        now = datetime.now()
+        record = {
+            "time": now,
+            "elapsed": time.time() - self.start_time,
+            "incumbent": self.incumbent,
+            "bound": self.bound,
+            "gap": self.gap,
+            "nodes": self.nodes
+        }
+        self.records.append(record)
+        config.log.add('Solver progress ({}): incumbent {}, bound {}, gap (%) {}, nodes {}\n'.format(
+            now.isoformat(), self.incumbent, self.bound, self.gap, self.nodes))
+        for callback in self.callbacks:
+            callback(record)
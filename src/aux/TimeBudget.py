@@ -0,0 +1,89 @@
+import time
+from typing import List
+
+from aux import config
+
+
+class TimeBudget:
+
+    def __init__(self, total: float, bdd_share: float = 0.25, verification_share: float = 0.1):
+        """
+        A single wall-clock budget for a run, which is divided dynamically across the stages of the pipeline:
+        BDD construction, labeling and verification.
+        Every stage is given an allowance from the time that remains when the stage begins, such that time left over
+        by an earlier stage flows to the later stages:
+        - BDD construction may use at most bdd_share of the remaining time.
+        - Labeling may use the remaining time, except for verification_share of the total budget that is reserved for
+        verification.
+        - Verification may use the remaining time.
+        Within the labeling stage, the allowance is divided across the graphs (see get_shares).
+        :param total: The total budget in seconds.
+        :param bdd_share: The largest share of the remaining time for BDD construction.
+        :param verification_share: The share of the total budget that is reserved for verification.
+        """
+        self.total = total
+        self.bdd_share = bdd_share
+        self.verification_share = verification_share
+        self.start_time = time.time()
+        self.stage = None
+        self.stage_start_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    def get_elapsed(self) -> float:
+        return time.time() - self.start_time
+
+    def get_remaining(self) -> float:
+        return max(0.0, self.total - self.get_elapsed())
+
+    def get_allowance(self, stage: str) -> float:
+        """
+        Returns the time in seconds that the given stage may use from now on.
+        :param stage: The stage, one of "bdd", "labeling" and "verification".
+        """
+        remaining = self.get_remaining()
+        if stage == "bdd":
+            return self.bdd_share * remaining
+        if stage == "labeling":
+            return max(0.0, remaining - self.verification_share * self.total)
+        if stage == "verification":
+            return remaining
+        raise Exception("Unknown stage.")
+
+    def get_shares(self, weights: List[float], jobs: int = 1) -> List[float]:
+        """
+        Divides the current labeling allowance across the graphs that are not labeled yet, proportionally to their
+        weights (e.g. the number of nodes). With several workers, the graphs share the time of all workers. As the
+        shares are recomputed from the remaining allowance before every batch of graphs, the time that is left over
+        by easy graphs flows to the harder graphs that follow.
+        :param weights: The weights of the graphs that are not labeled yet.
+        :param jobs: The number of graphs that are labeled concurrently.
+        :return: The time limits in seconds of the graphs, in the order of the weights.
+        """
+        allowance = self.get_allowance("labeling")
+        capacity = allowance * max(1, min(jobs, len(weights)))
+        total_weight = sum(weights)
+        if total_weight <= 0:
+            return [min(allowance, capacity / len(weights)) for _ in weights]
+        return [min(allowance, capacity * weight / total_weight) for weight in weights]
+
+    def begin(self, stage: str):
+        """
+        Marks the beginning of a stage. The time of every stage is added to the log.
+        """
+        if self.stage is not None:
+            self.end()
+        self.stage = stage
+        self.stage_start_time = time.time()
+
+    def end(self):
+        if self.stage is None:
+            return
+        log = 'Budget {} time (s): {}\n'.format(self.stage, time.time() - self.stage_start_time)
+        log += 'Budget remaining (s): {}\n'.format(self.get_remaining())
+        self.log += log
+        config.log.add(log)
+        self.stage = None
+        self.stage_start_time = None
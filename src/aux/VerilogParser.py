@@ -1,9 +1,17 @@
 import re
+from typing import Dict, List
+
+from networkx import DiGraph, NetworkXUnfeasible, topological_sort
 
 from aux.BenchmarkParser import BenchmarkParser
+from core.AIG import AIG
 from core.Formula import Formula
 from core.VerilogBenchmark import VerilogBenchmark
 
+_TOKEN_PATTERN = re.compile(r"(\d+'[bB][01]|[A-Za-z_][\w$]*|\d+|&&|\|\||~\^|\^~|[~!&|^?:()])\s*")
+# The binary operators from the lowest to the highest precedence
+_OPERATORS = [['||'], ['&&'], ['|'], ['^', '~^', '^~'], ['&']]
+
 
 class VerilogParser(BenchmarkParser):
 
@@ -42,4 +50,118 @@ class VerilogParser(BenchmarkParser):
 
         self.benchmark = VerilogBenchmark(self.file_path, module_name, all_input_variables, output_variables, functions, auxiliary_variables)
 
+        try:
+            self.benchmark.aig = self._get_aig(module_name, all_input_variables, output_variables, functions)
+        except Exception as e:
+            print("\tNo AIG: {}".format(e))
+
         return self.benchmark
+
+    @staticmethod
+    def _tokenize(expression: str) -> List[str]:
+        """
+        Splits an expression into tokens. Every character other than whitespace must be part of a token.
+        """
+        tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = _TOKEN_PATTERN.match(expression, position)
+            if match is None:
+                raise Exception("Unexpected character {}.".format(expression[position]))
+            tokens.append(match.group(1))
+            position = match.end()
+        return tokens
+
+    def _get_aig(self, module_name: str, input_variables: List[str], output_variables: List[str],
+                 functions: Dict[str, Formula]) -> AIG:
+        """
+        Builds an AIG from the assign statements. The wires are resolved in a topological order, such that every
+        statement is parsed only once.
+        """
+        tokens = dict((function_name, self._tokenize(formula.verilog))
+                      for (function_name, formula) in functions.items())
+        dependencies = DiGraph()
+        for (function_name, function_tokens) in tokens.items():
+            dependencies.add_node(function_name)
+            for token in function_tokens:
+                if re.match(r'[A-Za-z_]', token):
+                    dependencies.add_edge(token, function_name)
+        try:
+            order = list(topological_sort(dependencies))
+        except NetworkXUnfeasible:
+            raise Exception("Combinational cycle.")
+
+        aig = AIG(module_name, input_variables, output_variables)
+        signals = dict((input_variable, aig.get_input(input_variable)) for input_variable in input_variables)
+        for signal in order:
+            if signal in signals:
+                continue
+            if signal not in tokens:
+                raise Exception("Undefined signal {}.".format(signal))
+            self._tokens = tokens[signal]
+            self._position = 0
+            signals[signal] = self._parse_ternary(aig, signals)
+            if self._position != len(self._tokens):
+                raise Exception("Unsupported expression {}.".format(functions[signal].verilog))
+
+        for output_variable in output_variables:
+            if output_variable not in signals:
+                raise Exception("Undefined output {}.".format(output_variable))
+            aig.set_output(output_variable, signals[output_variable])
+        return aig
+
+    def _peek(self) -> str:
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise Exception("Unexpected end of expression.")
+        self._position += 1
+        return token
+
+    def _parse_ternary(self, aig: AIG, signals: Dict[str, int]) -> int:
+        condition = self._parse_binary(aig, signals, 0)
+        if self._peek() != '?':
+            return condition
+        self._next()
+        then_literal = self._parse_ternary(aig, signals)
+        if self._next() != ':':
+            raise Exception("Expected ':'.")
+        else_literal = self._parse_ternary(aig, signals)
+        return aig.add_ite(condition, then_literal, else_literal)
+
+    def _parse_binary(self, aig: AIG, signals: Dict[str, int], precedence: int) -> int:
+        if precedence == len(_OPERATORS):
+            return self._parse_unary(aig, signals)
+        literal = self._parse_binary(aig, signals, precedence + 1)
+        while self._peek() in _OPERATORS[precedence]:
+            operator = self._next()
+            operand = self._parse_binary(aig, signals, precedence + 1)
+            if operator in ['||', '|']:
+                literal = aig.add_or(literal, operand)
+            elif operator in ['&&', '&']:
+                literal = aig.add_and(literal, operand)
+            elif operator == '^':
+                literal = aig.add_xor(literal, operand)
+            else:
+                literal = aig.get_not(aig.add_xor(literal, operand))
+        return literal
+
+    def _parse_unary(self, aig: AIG, signals: Dict[str, int]) -> int:
+        token = self._next()
+        if token in ['~', '!']:
+            return aig.get_not(self._parse_unary(aig, signals))
+        if token == '(':
+            literal = self._parse_ternary(aig, signals)
+            if self._next() != ')':
+                raise Exception("Expected ')'.")
+            return literal
+        if re.fullmatch(r"(\d+'[bB])?[01]", token):
+            return int(token[-1])
+        if token in signals:
+            return signals[token]
+        raise Exception("Unexpected token {}.".format(token))
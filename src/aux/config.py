@@ -11,6 +11,8 @@ context_manager = ContextManager()
 verbose = True
 log = Log()
 clean = True
+# A single wall-clock budget for the run, divided across the stages (None for no budget, see TimeBudget)
+budget = None
 
 # Settings for BDD
 time_limit_bdd = 60
@@ -18,12 +20,22 @@ bdd = "robdd"
 bdd_parser = None
 full_bdd = False
 heuristic = True
+# Construct the BDDs from the AIG of the benchmark instead of with ABC
+aig_bdd = False
+# Reorder the variables of the BDDs in memory: "sift" or "window" (None to disable, see VariableReordering)
+reorder = None
+# The cost of a variable order: "nodes" for the number of nodes, "semi" for the predicted semiperimeter
+reorder_cost = "nodes"
+# A variable stops sifting in a direction when the cost grows beyond this factor times the lowest cost
+max_growth = 1.2
 
 module = None
 trace = True
 
 compressed = False
 
+# Partition the graph into parts that fit the maximum dimensions
+partition = False
 # Apply a time limit to partitioning
 time_limit_partition = None
 
@@ -32,6 +44,8 @@ time_limit_partition = None
 vh_labeling = False
 # Apply alternative K-labeling
 alt_labeling = False
+# Apply combinatorial VH-labeling instead of the ILP (only for VH-labeling)
+combinatorial = False
 # Apply input and output constraints
 io_constraints = True
 # Input layer
@@ -40,7 +54,17 @@ input_layer = None
 output_layer = None
 # Apply a time limit
 time_limit = None
-# Keep auxiliary files from CPLEX
+# Anytime labeling: always return a crossbar, also if the solver found no solution
+anytime = False
+# Stop the solver as soon as the relative gap (%) is at most this value
+target_gap = None
+# Stop the solver if the incumbent did not improve for this time in seconds
+stall_time = None
+# Solver: "cplex" or "cbc" (ILP), or "z3" (pseudo-Boolean) or "bb" (branch-and-bound) for K-labeling only
+solver = "cplex"
+# Random seed of the ILP solver (None for the default seed)
+solver_seed = None
+# Keep auxiliary files from the ILP solver
 keep_files = False
 # By default, the objective of COMPACT is to optimize the semiperimeter (only for K-labeling)
 # Other option = "cs" for "constraint solving" (no minimization)
@@ -48,12 +72,46 @@ objective = "semi"
 gamma = 1
 max_rows = sys.maxsize
 max_columns = sys.maxsize
+# Compute the Pareto front between the semiperimeter and the maximum dimension (only for VH-labeling)
+pareto = False
+# Choose the labeling strategy from the predicted solve time of the ILP and the time limit
+auto = False
+# Race the given labeling strategies concurrently (None for a single strategy)
+portfolio = None
+# Reduce the graph before labeling
+presolve = False
+# Improve the labeling by a large neighborhood search for this time in seconds (None to disable, only for K-labeling)
+lns_time = None
+# The initial number of nodes of a window of the large neighborhood search
+lns_window = 64
+# Incremental labeling: the directory with the labelings of a previous run, which are reused for the unchanged nodes
+# (None to disable)
+eco_path = None
+# The distance around the changed nodes up to which nodes are labeled again
+eco_radius = 1
+# Decompose the graph at its cut vertices and label the blocks independently
+decompose = False
+# Blocks are grouped until they hold at least this number of nodes
+min_block_size = 32
+
+# Cache solved labelings on disk
+cache = False
+# Maximum number of entries in the cache
+cache_size = 4096
+
+# Number of worker processes
+jobs = 1
+# Identifier of the current worker process (None for the main process)
+worker_id = None
 
 mapping_method = "compact"
 
 root = pathlib.Path(__file__).parent.parent.parent.absolute()
 benchmark_path = root.joinpath('benchmarks')
 abc_path = root.joinpath('abc')
+cache_path = root.joinpath('cache')
+runtime_path = root.joinpath('runtimes.json')
+order_path = root.joinpath('orders')
 
 
 if platform.system() == 'Windows':
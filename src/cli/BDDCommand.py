@@ -1,9 +1,29 @@
 from typing import List
 
+from networkx import DiGraph
+
 from aux import config
+from aux.AIGBDDParser import AIGBDDParser
+from aux.BDDPortfolio import BDDPortfolio
+from aux.OrderCache import OrderCache
+from aux.ParallelExecutor import ParallelExecutor
 from cli.Command import Command
 from aux.ROBDDDOTParser import ROBDDDOTParser
 from aux.SBDDDOTParser import SBDDDOTParser
+from core.Benchmark import Benchmark
+from core.GraphTopology import GraphTopology
+from synth.VariableReordering import VariableReordering
+
+
+def _reorder_graph(graph: DiGraph, order: List[str], time_limit: int):
+    """
+    Reorders the variables of a single BDD. Defined at module level such that BDDs can be reordered in worker
+    processes.
+    :return: The reordered BDD and its order.
+    """
+    reordering = VariableReordering(graph, time_limit=time_limit)
+    reordered_graph = reordering.reorder(order)
+    return reordered_graph, reordering.get_order()
 
 
 class BDDCommand(Command):
@@ -44,43 +64,66 @@ class BDDCommand(Command):
         else:
             config.heuristic = True
 
+        if "-aig" in args:
+            config.aig_bdd = True
+        else:
+            config.aig_bdd = False
+
+        if "-reorder" in args:
+            idx = args.index("-reorder")
+            config.reorder = args[idx + 1]
+        else:
+            config.reorder = None
+
+        if "-rcost" in args:
+            idx = args.index("-rcost")
+            config.reorder_cost = args[idx + 1]
+        else:
+            config.reorder_cost = "nodes"
+
+        if "-j" in args:
+            idx = args.index("-j")
+            config.jobs = int(args[idx + 1])
+        else:
+            config.jobs = 1
+
         self.args = args
 
     def execute(self):
+        if config.budget is not None:
+            # BDD construction is limited to its allowance of the budget
+            config.budget.begin("bdd")
+            config.time_limit_bdd = min(config.time_limit_bdd, max(1, int(config.budget.get_allowance("bdd"))))
+            try:
+                return self._execute()
+            finally:
+                config.budget.end()
+        return self._execute()
+
+    def _execute(self):
         context = config.context_manager.get_context()
 
         # Reduced Ordered Binary Decision Diagram
         if self.bdd_type == "bdd":
-            robdd_parser = ROBDDDOTParser(context.boolean_function)
-            robdd = robdd_parser.parse()
-            sbdd_parser = SBDDDOTParser(context.boolean_function)
-            sbdd = sbdd_parser.parse()
-            raise Exception("Unsupported")
-
-            # if self.merge:
-            #     robdd.merge()
-            #     sbdd.merge()
-            #
-            #     if len(robdd.nodes) < len(sbdd.nodes):
-            #         config.bdd_parser = robdd_parser
-            #         context.benchmark_graph = robdd
-            #         config.bdd = 'robdd'
-            #     else:
-            #         config.bdd_parser = sbdd_parser
-            #         context.benchmark_graph = sbdd
-            #         config.bdd = 'sbdd'
-            # else:
-            #     if len(robdd.nodes) < len(sbdd.nodes):
-            #         config.bdd_parser = robdd_parser
-            #         context.benchmark_graph = robdd
-            #         config.bdd = 'robdd'
-            #     else:
-            #         config.bdd_parser = sbdd_parser
-            #         context.benchmark_graph = sbdd
-            #         config.bdd = 'sbdd'
+            # The ROBDD and the SBDD are constructed concurrently, and the smaller one is kept
+            bdd_portfolio = BDDPortfolio(context.boolean_function)
+            config.bdd_parser = bdd_portfolio.construct()
+            config.bdd = bdd_portfolio.winner
+            benchmark_graph = config.bdd_parser.benchmark_graph
+            if config.reorder is not None:
+                self._reorder(context.boolean_function, benchmark_graph)
+            config.context_manager.add_context("", benchmark_graph)
+            context = config.context_manager.get_context()
+            if self.merge:
+                context.boolean_function.merge()
         elif self.bdd_type == "robdd":
-            config.bdd_parser = ROBDDDOTParser(context.boolean_function)
+            if config.aig_bdd:
+                config.bdd_parser = AIGBDDParser(context.boolean_function)
+            else:
+                config.bdd_parser = ROBDDDOTParser(context.boolean_function)
             benchmark_graph = config.bdd_parser.parse()
+            if config.reorder is not None:
+                self._reorder(context.boolean_function, benchmark_graph)
             config.context_manager.add_context("", benchmark_graph)
             context = config.context_manager.get_context()
             if self.merge:
@@ -88,8 +131,13 @@ class BDDCommand(Command):
 
         # Shared Binary Decision Diagram
         elif self.bdd_type == "sbdd":
-            config.bdd_parser = SBDDDOTParser(context.boolean_function)
+            if config.aig_bdd:
+                config.bdd_parser = AIGBDDParser(context.boolean_function, shared=True)
+            else:
+                config.bdd_parser = SBDDDOTParser(context.boolean_function)
             benchmark_graph = config.bdd_parser.parse()
+            if config.reorder is not None:
+                self._reorder(context.boolean_function, benchmark_graph)
             config.context_manager.add_context("", benchmark_graph)
             context = config.context_manager.get_context()
             if self.merge:
@@ -98,3 +146,25 @@ class BDDCommand(Command):
             raise Exception("Unsupported BDD type.")
 
         return False
+
+    @staticmethod
+    def _reorder(benchmark: Benchmark, graph_topology: GraphTopology):
+        """
+        Reorders the variables of every BDD of the benchmark. The BDDs of independent outputs (ROBDDs) are reordered
+        in parallel. The orders are cached per benchmark, such that a next run moves the variables to the cached
+        orders instead of searching again.
+        """
+        order_cache = OrderCache(benchmark)
+        graphs = graph_topology.get_graphs()
+        keys = [VariableReordering.get_key(graph) for graph in graphs]
+        arguments = [(graph, order_cache.get(key), config.time_limit_bdd) for (graph, key) in zip(graphs, keys)]
+
+        executor = ParallelExecutor()
+        results = executor.map(_reorder_graph, arguments)
+
+        graph_topology.graph = DiGraph()
+        orders = dict()
+        for (key, (graph, order)) in zip(keys, results):
+            graph_topology.add_graph(graph)
+            orders[key] = order
+        order_cache.put(orders)
@@ -0,0 +1,50 @@
+from typing import List
+
+from aux import config
+from aux.TimeBudget import TimeBudget
+from cli.Command import Command
+
+
+class BudgetCommand(Command):
+
+    def __init__(self, args: List[str]):
+        """
+        Command to give the run a single wall-clock budget, which is divided dynamically across BDD construction, the
+        labelings of the graphs and verification. The budget starts when the command is executed.
+
+        :param args: A list of required and optional arguments.
+
+        budget VALUE [-bdd SHARE] [-verify SHARE]
+
+        Required arguments:
+
+        VALUE           The total budget in seconds.
+
+        Optional arguments:
+
+        -bdd SHARE      The largest share of the remaining time for BDD construction (by default, 0.25).
+
+        -verify SHARE   The share of the total budget that is reserved for verification (by default, 0.1).
+
+        """
+        super(BudgetCommand).__init__()
+        if len(args) < 1:
+            raise Exception("No budget defined.")
+        self.total = float(args[0])
+
+        if "-bdd" in args:
+            idx = args.index("-bdd")
+            self.bdd_share = float(args[idx + 1])
+        else:
+            self.bdd_share = 0.25
+
+        if "-verify" in args:
+            idx = args.index("-verify")
+            self.verification_share = float(args[idx + 1])
+        else:
+            self.verification_share = 0.1
+
+    def execute(self) -> bool:
+        config.budget = TimeBudget(self.total, self.bdd_share, self.verification_share)
+        config.log.add('Budget (s): {}\n'.format(self.total))
+        return False
@@ -1,13 +1,48 @@
 import sys
+from typing import List
 
 from networkx import DiGraph
 
 from aux import config
+from aux.ParallelExecutor import ParallelExecutor
 from core.MemristorCrossbarTopology import MemristorCrossbarTopology
 from synth.COMPACT import COMPACT
+from synth.CrossbarPartitioning import CrossbarPartitioning
+from synth.DesignSpaceSweep import DesignSpaceSweep
+from synth.ParetoFront import ParetoFront
 from cli.Command import Command
 
 
+def _map_graph(graph: DiGraph, layers: int):
+    """
+    Maps a single graph. Defined at module level such that graphs can be mapped in worker processes.
+    """
+    compact = COMPACT()
+    return compact.map(graph, layers)
+
+
+def _map_graph_within(graph: DiGraph, layers: int, time_limit: int):
+    """
+    Maps a single graph with the given time limit. Defined at module level such that graphs can be mapped in worker
+    processes.
+    """
+    default_time_limit = config.time_limit
+    config.time_limit = time_limit
+    try:
+        return _map_graph(graph, layers)
+    finally:
+        config.time_limit = default_time_limit
+
+
+def _sweep_graph(graph: DiGraph, points: list):
+    """
+    Sweeps the design points of a single graph. Defined at module level such that graphs can be swept in worker
+    processes.
+    """
+    design_space_sweep = DesignSpaceSweep(graph, points)
+    return design_space_sweep.sweep()
+
+
 class COMPACTCommand(Command):
 
     def __init__(self, args: list):
@@ -16,7 +51,7 @@ class COMPACTCommand(Command):
 
         :param args: A list of required and optional arguments.
 
-        compact [-gamma|-g VALUE] [-l VALUE] [-vh] [-io] [-r VALUE] [-c VALUE] [-t VALUE]
+        compact [-gamma|-g VALUE] [-l VALUE] [-vh] [-comb] [-pareto] [-io] [-pre] [-r VALUE] [-c VALUE] [-t VALUE] [-auto] [-anytime] [-gap VALUE] [-stall VALUE] [-lns VALUE] [-eco PATH] [-dec] [-p] [-tp VALUE] [-cache] [-j VALUE] [-solver NAME] [-portfolio VALUE]
 
         Optional arguments:
 
@@ -25,9 +60,59 @@ class COMPACTCommand(Command):
         -g VALUE        Shorthand for -gamma.
 
         -l VALUE        The number of layers.
+                        A range START:STOP[:STEP] sweeps the number of layers (by default, STEP is 2).
+
+        -r VALUE        The maximum number of rows.
+                        A range START:STOP[:STEP] sweeps the maximum number of rows (by default, STEP is 1).
+
+        -c VALUE        The maximum number of columns.
+                        A range START:STOP[:STEP] sweeps the maximum number of columns (by default, STEP is 1).
+
+        -comb           Apply combinatorial VH-labeling instead of the ILP (only with -vh).
+
+        -pareto         Compute the Pareto front between the semiperimeter and the maximum dimension (only with -vh).
+                        The point that is optimal for gamma is mapped. Every point of the front is added as a context
+                        pareto0, pareto1, ... by increasing maximum dimension.
+
+        -pre            Reduce the graph before labeling.
 
         -t VALUE        Time limit in seconds.
 
+        -auto           Choose between the exact ILP, decomposition, a warm-started ILP and a heuristic from the
+                        predicted solve time of the ILP and the time limit (-t). The prediction is fitted on the solve
+                        times of previous runs. Not with -comb, or with -solver z3 or bb.
+
+        -anytime        Always return a crossbar. If the solver finds no solution, a trivial labeling is used.
+
+        -gap VALUE      Stop the solver as soon as the relative gap (%) is at most VALUE.
+
+        -stall VALUE    Stop the solver if the best solution did not improve for VALUE seconds.
+
+        -lns VALUE      Improve the labeling by a large neighborhood search for VALUE seconds (only K-labeling, not with
+                        -solver z3 or bb).
+
+        -eco PATH       Incremental labeling: the labelings of a previous run in the directory PATH are reused for the
+                        nodes that did not change, and only the changed nodes and their neighbors are labeled again.
+                        The new labelings are stored in PATH. Not with -solver z3 or bb.
+
+        -dec            Decompose the graph at its cut vertices and label the blocks independently. Unless the
+                        stitched labeling meets the lower bound, the graph is solved exactly from it.
+
+        -p              Partition the graph into multiple crossbars of at most -r rows and -c columns.
+
+        -tp VALUE       Time limit in seconds for partitioning.
+
+        -cache          Reuse labelings of isomorphic graphs that were solved before (also in previous runs).
+
+        -j VALUE        The number of worker processes. The graphs are mapped concurrently.
+
+        -solver NAME    The solver: cplex (default), cbc, or z3 or bb (branch-and-bound) for K-labeling only.
+
+        -portfolio VALUE
+                        Race a comma-separated list of labeling strategies concurrently and keep the best labeling.
+                        Strategies are k, k-alt, z3, bb, greedy and trivial (K-labeling), or vh, comb and trivial
+                        (VH-labeling), optionally with a solver seed, e.g. k,k:1,k:2,trivial.
+
         """
 
         super(COMPACTCommand).__init__()
@@ -46,31 +131,49 @@ class COMPACTCommand(Command):
 
         if "-l" in args:
             idx = args.index("-l")
-            self.layers = int(args[idx + 1])
+            layer_range = self._parse_range(args[idx + 1], 2)
         else:
-            self.layers = 1
+            layer_range = [1]
+        self.layers = layer_range[0]
 
         if "-vh" in args:
             config.vh_labeling = True
         else:
             config.vh_labeling = False
 
+        if "-comb" in args:
+            config.combinatorial = True
+        else:
+            config.combinatorial = False
+
         if "-io" in args:
             config.io_constraints = False
         else:
             config.io_constraints = True
 
+        if "-pre" in args:
+            config.presolve = True
+        else:
+            config.presolve = False
+
         if "-r" in args:
             idx = args.index("-r")
-            config.max_rows = int(args[idx + 1])
+            row_range = self._parse_range(args[idx + 1], 1)
         else:
-            config.max_rows = sys.maxsize
+            row_range = [sys.maxsize]
+        config.max_rows = row_range[0]
 
         if "-c" in args:
             idx = args.index("-c")
-            config.max_columns = int(args[idx + 1])
+            column_range = self._parse_range(args[idx + 1], 1)
         else:
-            config.max_columns = sys.maxsize
+            column_range = [sys.maxsize]
+        config.max_columns = column_range[0]
+
+        # At most one of the settings is swept
+        if len([r for r in [layer_range, row_range, column_range] if len(r) > 1]) > 1:
+            raise Exception("Only one range can be swept at a time.")
+        self.points = [(l, r, c) for l in layer_range for r in row_range for c in column_range]
 
         if "-t" in args:
             idx = args.index("-t")
@@ -106,22 +209,223 @@ class COMPACTCommand(Command):
         else:
             config.output_layer = None
 
+        if "-lns" in args:
+            idx = args.index("-lns")
+            config.lns_time = float(args[idx + 1])
+        else:
+            config.lns_time = None
+
+        if "-eco" in args:
+            idx = args.index("-eco")
+            config.eco_path = args[idx + 1]
+        else:
+            config.eco_path = None
+
+        if "-pareto" in args:
+            config.pareto = True
+        else:
+            config.pareto = False
+
+        if "-dec" in args:
+            config.decompose = True
+        else:
+            config.decompose = False
+
+        if "-auto" in args:
+            config.auto = True
+        else:
+            config.auto = False
+
+        if "-anytime" in args:
+            config.anytime = True
+        else:
+            config.anytime = False
+
+        if "-gap" in args:
+            idx = args.index("-gap")
+            config.target_gap = float(args[idx + 1])
+        else:
+            config.target_gap = None
+
+        if "-stall" in args:
+            idx = args.index("-stall")
+            config.stall_time = float(args[idx + 1])
+        else:
+            config.stall_time = None
+
+        if "-p" in args:
+            config.partition = True
+        else:
+            config.partition = False
+
+        if "-tp" in args:
+            idx = args.index("-tp")
+            config.time_limit_partition = int(args[idx + 1])
+        else:
+            config.time_limit_partition = None
+
+        if "-cache" in args:
+            config.cache = True
+        else:
+            config.cache = False
+
+        if "-j" in args:
+            idx = args.index("-j")
+            config.jobs = int(args[idx + 1])
+        else:
+            config.jobs = 1
+
+        if "-portfolio" in args:
+            idx = args.index("-portfolio")
+            config.portfolio = args[idx + 1].split(",")
+        else:
+            config.portfolio = None
+
+        if "-solver" in args:
+            idx = args.index("-solver")
+            config.solver = args[idx + 1]
+        else:
+            config.solver = "cplex"
+
+    @staticmethod
+    def _parse_range(value: str, default_step: int) -> List[int]:
+        """
+        Parses a value VALUE or a range START:STOP[:STEP], where STOP is inclusive.
+        """
+        bounds = [int(bound) for bound in value.split(":")]
+        if len(bounds) == 1:
+            return bounds
+        if len(bounds) == 2:
+            bounds.append(default_step)
+        (start, stop, step) = bounds
+        return list(range(start, stop + 1, step))
+
+    def _get_time_limit(self, share: float) -> int:
+        """
+        Returns the time limit of a graph for the given share of the budget, which never exceeds the time limit -t.
+        """
+        time_limit = max(1, int(share))
+        if config.time_limit is not None:
+            time_limit = min(config.time_limit, time_limit)
+        return time_limit
+
+    def _map_graphs_within_budget(self, graphs: List[DiGraph]) -> list:
+        """
+        Maps the graphs in batches of config.jobs within the labeling allowance of the budget.
+        Before every batch, the remaining allowance is divided across the graphs that are not mapped yet in
+        proportion to their number of nodes, such that the time left over by easy graphs flows to harder graphs.
+        """
+        executor = ParallelExecutor()
+        jobs = max(1, config.jobs)
+        crossbars = []
+        for i in range(0, len(graphs), jobs):
+            shares = config.budget.get_shares([len(graph.nodes) for graph in graphs[i:]], jobs)
+            arguments = [(graph, self.layers, self._get_time_limit(share))
+                         for (graph, share) in zip(graphs[i:i + jobs], shares)]
+            crossbars.extend(executor.map(_map_graph_within, arguments))
+        return crossbars
+
     def execute(self):
         """
         Executes the COMPACT algorithm on a graph.
         The graph is obtained from the current context.
         :return:
         """
+        if config.budget is not None:
+            config.budget.begin("labeling")
+            try:
+                return self._execute()
+            finally:
+                config.budget.end()
+        return self._execute()
+
+    def _execute(self):
 
         context = config.context_manager.get_context()
-        compact = COMPACT()
         graphs = context.boolean_function.get_graphs()
         topology_graph = DiGraph()
+        interconnections = []
         # context.crossbars = []
         # for graph in graphs:
         #     context.crossbars.append(compact.map(graph, self.layers))
-        for graph in graphs:
-            topology_graph.add_node(compact.map(graph, self.layers))
-        crossbar_topology = MemristorCrossbarTopology(topology_graph, [])
+        if config.auto and config.portfolio is None:
+            # The strategies are chosen from the predicted solve time of the ILP of CPLEX or CBC
+            if config.solver in ["z3", "bb"]:
+                raise Exception("The strategy selection cannot be combined with the {} solver.".format(config.solver))
+            if config.combinatorial:
+                raise Exception("The strategy selection cannot be combined with combinatorial VH-labeling.")
+        if config.lns_time is not None and config.solver in ["z3", "bb"]:
+            # The windows are solved by the ILP, as they count the nanowires of the fixed nodes as layer offsets
+            raise Exception("The large neighborhood search cannot be combined with the {} solver.".format(
+                config.solver))
+        if config.eco_path is not None and config.solver in ["z3", "bb"]:
+            # The changed nodes are solved by the ILP, as they count the nanowires of the reused nodes as layer offsets
+            raise Exception("Incremental labeling cannot be combined with the {} solver.".format(config.solver))
+        if config.portfolio is not None and config.solver in ["z3", "bb"]:
+            # The strategies of the ILP are solved by CPLEX or CBC, whereas z3 and bb are strategies themselves
+            ilp_strategies = [strategy for strategy in config.portfolio
+                              if strategy.partition(":")[0] in ["k", "k-alt", "vh"]]
+            if len(ilp_strategies) > 0:
+                raise Exception("The strategies {} cannot be combined with the {} solver.".format(
+                    ", ".join(ilp_strategies), config.solver))
+        if config.budget is not None and (config.pareto or len(self.points) > 1):
+            # The points of a front or a sweep are labeled with the time limit -t each, outside of the budget
+            raise Exception("The Pareto front and sweeps cannot be combined with a budget.")
+        if config.pareto:
+            if not config.vh_labeling:
+                raise Exception("The Pareto front requires VH-labeling.")
+            if config.partition or len(self.points) > 1:
+                raise Exception("The Pareto front cannot be combined with partitioning or sweeps.")
+            # The points of a front are labeled in parallel, such that the graphs are mapped one by one
+            fronts = []
+            for graph in graphs:
+                pareto_front = ParetoFront(graph)
+                crossbars = pareto_front.map()
+                fronts.append(crossbars)
+                topology_graph.add_node(crossbars[pareto_front.select()][2])
+            for i in range(max(len(crossbars) for crossbars in fronts)):
+                # A graph with fewer points contributes its last point
+                pareto_graph = DiGraph()
+                pareto_graph.add_nodes_from(crossbars[min(i, len(crossbars) - 1)][2] for crossbars in fronts)
+                pareto_topology = MemristorCrossbarTopology(pareto_graph, [])
+                pareto_topology.input_variables = context.boolean_function.input_variables
+                pareto_topology.output_variables = context.boolean_function.output_variables
+                config.context_manager.add_context("pareto{}".format(i), pareto_topology)
+        elif len(self.points) > 1:
+            if config.partition:
+                raise Exception("Sweeps cannot be combined with partitioning.")
+            # The parsed graphs are reused for all design points
+            executor = ParallelExecutor()
+            crossbars = executor.map(_sweep_graph, [(graph, self.points) for graph in graphs])
+            topology_graph.add_nodes_from(crossbars)
+        elif config.partition:
+            default_time_limit_partition = config.time_limit_partition
+            for (i, graph) in enumerate(graphs):
+                if config.budget is not None:
+                    # Partitioning is limited to the share of the graph of the remaining allowance
+                    share = config.budget.get_shares([len(other.nodes) for other in graphs[i:]])[0]
+                    config.time_limit_partition = max(1, int(share))
+                    if default_time_limit_partition is not None:
+                        config.time_limit_partition = min(default_time_limit_partition, config.time_limit_partition)
+                crossbar_partitioning = CrossbarPartitioning(graph, self.layers, len(interconnections))
+                try:
+                    crossbar_partitioning.partition()
+                finally:
+                    config.time_limit_partition = default_time_limit_partition
+                topology_graph.add_nodes_from(crossbar_partitioning.topology.nodes)
+                topology_graph.add_edges_from(crossbar_partitioning.topology.edges)
+                interconnections.extend(crossbar_partitioning.interconnections)
+        elif config.budget is not None:
+            crossbars = self._map_graphs_within_budget(graphs)
+            topology_graph.add_nodes_from(crossbars)
+        else:
+            # The graphs are independent and are mapped concurrently, each with its own time limit.
+            # The crossbars are added in the order of the graphs.
+            executor = ParallelExecutor()
+            crossbars = executor.map(_map_graph, [(graph, self.layers) for graph in graphs])
+            topology_graph.add_nodes_from(crossbars)
+        crossbar_topology = MemristorCrossbarTopology(topology_graph, interconnections)
+        crossbar_topology.input_variables = context.boolean_function.input_variables
+        crossbar_topology.output_variables = context.boolean_function.output_variables
         config.context_manager.add_context("topology", crossbar_topology)
         return False
@@ -1,4 +1,7 @@
+from networkx import DiGraph
+
 from aux import config
+from core.MemristorCrossbarTopology import MemristorCrossbarTopology
 from synth.ChakrabortyMappingMethod import ChakrabortyMappingMethod
 from cli.Command import Command
 
@@ -11,8 +14,13 @@ class ChakrabortyCommand(Command):
     def execute(self):
         context = config.context_manager.get_context()
         chakraborty = ChakrabortyMappingMethod()
-        graphs = context.benchmark_graph.get_graphs()
-        context.crossbars = []
+        graphs = context.boolean_function.get_graphs()
+        # The crossbars are sparse, such that they can be evaluated and written without building their matrices
+        topology_graph = DiGraph()
         for graph in graphs:
-            context.crossbars.append(chakraborty.map(graph))
+            topology_graph.add_node(chakraborty.map(graph))
+        crossbar_topology = MemristorCrossbarTopology(topology_graph, [])
+        crossbar_topology.input_variables = context.boolean_function.input_variables
+        crossbar_topology.output_variables = context.boolean_function.output_variables
+        config.context_manager.add_context("chakraborty", crossbar_topology)
         return False
@@ -1,4 +1,5 @@
 from cli.BDDCommand import BDDCommand
+from cli.BudgetCommand import BudgetCommand
 from cli.COMPACTCommand import COMPACTCommand
 from cli.ChakrabortyCommand import ChakrabortyCommand
 from cli.DrawGraphCommand import DrawGraphCommand
@@ -43,6 +44,7 @@ class CommandParser:
         - draw_matrix
         - draw_graph
         - ls
+        - budget
 
         """
         command_list = raw_command.strip().split(" ")
@@ -88,5 +90,7 @@ class CommandParser:
             return WriteCrossbarCommand(args)
         elif command_name == "read_xbar":
             return ReadCrossbarCommand(args)
+        elif command_name == "budget":
+            return BudgetCommand(args)
         else:
             raise Exception("Unknown command.")
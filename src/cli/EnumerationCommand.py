@@ -3,6 +3,7 @@ from typing import List
 
 from aux import config
 from aux.BenchmarkReader import BenchmarkReader
+from aux.UndecidedException import UndecidedException
 from verf.Enumeration import Enumeration
 from cli.Command import Command
 
@@ -48,5 +49,16 @@ class EnumerationCommand(Command):
 
         # TODO: Currently, we assume Verilog code is provided.
         check = Enumeration(crossbar_topology, benchmark)
-        check.is_equivalent(None, self.sampling_size)
+        if config.budget is not None:
+            # Verification is limited to the remaining time of the budget
+            config.budget.begin("verification")
+            try:
+                check.is_equivalent(None, self.sampling_size, config.budget.get_allowance("verification"))
+            except UndecidedException:
+                # The remaining commands of the pipeline still run, e.g. to write the log
+                config.log.add('Undecided\n')
+            finally:
+                config.budget.end()
+        else:
+            check.is_equivalent(None, self.sampling_size)
         return False
@@ -0,0 +1,151 @@
+from typing import Dict, List
+
+from core.BooleanFunction import BooleanFunction
+
+
+class AIG(BooleanFunction):
+
+    def __init__(self, name: str = "", input_variables: List[str] = None, output_variables: List[str] = None):
+        """
+        An and-inverter graph: a network of two-input AND nodes and inverted edges.
+        Node 0 is the constant zero. A literal is 2 * node, or 2 * node + 1 for the complement of the node, such that
+        literal 0 is False and literal 1 is True. The nodes are added in a topological order: every AND node refers
+        to nodes that were added before.
+        AND nodes are structurally hashed: an AND node with the same fanins as an existing node is not added again, and
+        trivial AND nodes (with a constant fanin, or with equal or complementary fanins) are simplified away.
+        :param name: The name of the function.
+        :param input_variables: The input variables, which are added as input nodes in the given order.
+        :param output_variables: The output variables, of which the literals are set with set_output.
+        """
+        super().__init__(name, [], list(output_variables or []))
+        # The fanins of every node, or None for the constant zero and the input nodes
+        self.fanins = [None]
+        self.input_nodes = dict()
+        self.input_names = dict()
+        self.outputs = dict()
+        self.strash = dict()
+        for input_variable in input_variables or []:
+            self.add_input(input_variable)
+
+    @staticmethod
+    def get_not(literal: int) -> int:
+        return literal ^ 1
+
+    def get_number_of_ands(self) -> int:
+        return len(self.strash)
+
+    def add_input(self, input_variable: str) -> int:
+        if input_variable in self.input_nodes:
+            return 2 * self.input_nodes[input_variable]
+        node = len(self.fanins)
+        self.fanins.append(None)
+        self.input_nodes[input_variable] = node
+        self.input_names[node] = input_variable
+        self.input_variables.append(input_variable)
+        return 2 * node
+
+    def get_input(self, input_variable: str) -> int:
+        return 2 * self.input_nodes[input_variable]
+
+    def add_and(self, a: int, b: int) -> int:
+        if a > b:
+            (a, b) = (b, a)
+        if a == 0 or a == self.get_not(b):
+            return 0
+        if a == 1 or a == b:
+            return b
+        node = self.strash.get((a, b))
+        if node is None:
+            node = len(self.fanins)
+            self.fanins.append((a, b))
+            self.strash[(a, b)] = node
+        return 2 * node
+
+    def add_or(self, a: int, b: int) -> int:
+        return self.get_not(self.add_and(self.get_not(a), self.get_not(b)))
+
+    def add_xor(self, a: int, b: int) -> int:
+        return self.add_or(self.add_and(a, self.get_not(b)), self.add_and(self.get_not(a), b))
+
+    def add_ite(self, condition: int, then_literal: int, else_literal: int) -> int:
+        return self.add_or(self.add_and(condition, then_literal), self.add_and(self.get_not(condition), else_literal))
+
+    def add_and_all(self, literals: List[int]) -> int:
+        """
+        Returns the conjunction of the literals, as a balanced tree of AND nodes.
+        """
+        if len(literals) == 0:
+            return 1
+        literals = list(literals)
+        while len(literals) > 1:
+            pairs = [self.add_and(literals[i], literals[i + 1]) for i in range(0, len(literals) - 1, 2)]
+            if len(literals) % 2 == 1:
+                pairs.append(literals[-1])
+            literals = pairs
+        return literals[0]
+
+    def add_or_all(self, literals: List[int]) -> int:
+        return self.get_not(self.add_and_all([self.get_not(literal) for literal in literals]))
+
+    def set_output(self, output_variable: str, literal: int):
+        if output_variable not in self.output_variables:
+            self.output_variables.append(output_variable)
+        self.outputs[output_variable] = literal
+
+    def get_output(self, output_variable: str) -> int:
+        return self.outputs[output_variable]
+
+    def get_fanins(self, node: int):
+        return self.fanins[node]
+
+    def is_input(self, node: int) -> bool:
+        return node in self.input_names
+
+    def get_input_variable(self, node: int) -> str:
+        return self.input_names[node]
+
+    def simulate(self, patterns: Dict[str, int], width: int = 64) -> Dict[str, int]:
+        """
+        Simulates the graph bit-parallel: bit i of the pattern of every input is the value of the input in instance i,
+        such that width instances are simulated at once (64 by default).
+        :param patterns: The pattern of every input. A missing input is False in every instance.
+        :param width: The number of instances.
+        :return: The pattern of every output.
+        """
+        mask = (1 << width) - 1
+        values = [0] * len(self.fanins)
+        for node in range(1, len(self.fanins)):
+            fanins = self.fanins[node]
+            if fanins is None:
+                values[node] = patterns.get(self.input_names[node], 0) & mask
+                continue
+            (a, b) = fanins
+            value_a = values[a >> 1] ^ (mask if a & 1 else 0)
+            value_b = values[b >> 1] ^ (mask if b & 1 else 0)
+            values[node] = value_a & value_b
+        return dict((output_variable, values[literal >> 1] ^ (mask if literal & 1 else 0))
+                    for (output_variable, literal) in self.outputs.items())
+
+    def eval_instances(self, instances: List[Dict[str, bool]]) -> List[Dict[str, bool]]:
+        """
+        Evaluates the given instances at once with a single bit-parallel simulation.
+        """
+        patterns = dict()
+        for (i, instance) in enumerate(instances):
+            for (input_variable, value) in instance.items():
+                if value:
+                    patterns[input_variable] = patterns.get(input_variable, 0) | (1 << i)
+        output_patterns = self.simulate(patterns, len(instances))
+        return [dict((output_variable, bool((pattern >> i) & 1))
+                     for (output_variable, pattern) in output_patterns.items()) for i in range(len(instances))]
+
+    def eval(self, instance: Dict[str, bool]) -> Dict[str, bool]:
+        return self.eval_instances([instance])[0]
+
+    def write_xbar(self) -> str:
+        raise TypeError()
+
+    def __str__(self):
+        return "AIG {}: {} inputs, {} outputs, {} AND nodes".format(self.name, len(self.input_variables),
+                                                                   len(self.output_variables),
+                                                                   self.get_number_of_ands())
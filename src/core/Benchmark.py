@@ -24,11 +24,15 @@ class Benchmark(BooleanFunction):
         else:
             self.formulas = formulas
         self.graph = None
+        # The and-inverter graph of the benchmark, if it could be built by the parser
+        self.aig = None
 
     def get_graphs(self):
         return self.graph
 
     def eval(self, instance: Dict[str, bool]) -> Dict[str, bool]:
+        if self.aig is not None:
+            return self.aig.eval(instance)
         evaluation = dict()
         for (output_variable, formula) in self.formulas.items():
             evaluation[output_variable] = formula.eval(instance)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from abc import abstractmethod
 from typing import Dict, Tuple, Set
 
+import numpy as np
 from networkx import Graph
 
 from core.BooleanFunction import BooleanFunction
@@ -52,13 +53,15 @@ class Crossbar(BooleanFunction):
         pass
 
     def __init__(self, rows: int, columns: int, layers: int = 1, default_literal=Literal("False", False),
-                 compressed: bool = False):
+                 compressed: bool = False, sparse: bool = False):
         """
         Constructs a crossbar with the given dimensions x, y, and optionally z.
         :param rows: The number of memristors along the input and output nanowires.
         :param columns: The number of memristors orthogonal to the input and output nanowires.
         :param layers: The number of layers of memristors. The number of layers of nanowires is equal to the number
         of layers of memristors plus one. By default, the number of layers = 1.
+        :param sparse: If True, only the memristors that are written are used while the matrix is not built
+        (see is_sparse).
         """
         super(Crossbar).__init__()
         self.filename = ""
@@ -73,11 +76,38 @@ class Crossbar(BooleanFunction):
         self.input_variables = []
         self.default_literal = default_literal
         self.compressed = compressed
+        self.sparse = sparse
+        # The memristors that are written while the matrix is not built, as arrays of rows, columns and codes of
+        # literals per layer (see set_memristors)
+        self.literals = []
+        self.literal_codes = dict()
+        self.entries = [[] for _ in range(self.layers)]
 
         if self.compressed:
-            self.matrix = dict()
+            self._matrix = dict()
         else:
-            self.matrix = [[[Memristor(r, c, default_literal, l) for c in range(self.columns)] for r in range(self.rows)] for l in range(self.layers)]
+            self._matrix = None
+
+    @property
+    def matrix(self):
+        """
+        The memristors as a list of layers of lists of rows. The matrix is only built when it is first used, such that
+        a crossbar that is written in bulk does not hold an object for every memristor until then.
+        """
+        if self._matrix is None:
+            self._matrix = [[[Memristor(r, c, self.default_literal, l) for c in range(self.columns)]
+                             for r in range(self.rows)] for l in range(self.layers)]
+            for l in range(self.layers):
+                for (rows, columns, codes) in self.entries[l]:
+                    for (r, c, code) in zip(rows.tolist(), columns.tolist(), codes.tolist()):
+                        self._matrix[l][r][c] = Memristor(r, c, self.literals[code], l)
+            self.entries = [[] for _ in range(self.layers)]
+        return self._matrix
+
+    @matrix.setter
+    def matrix(self, matrix):
+        self._matrix = matrix
+        self.entries = [[] for _ in range(self.layers)]
 
     def set_name(self, name: str):
         self.name = name
@@ -113,9 +143,24 @@ class Crossbar(BooleanFunction):
         """
         Returns a graph representation based on the following analogy: nanowires in the crossbar correspond to nodes in the graph, and memristors in the crossbar correspond to edges in the graph.
         The resulting graph is a multi-layered graph. More specifically, the graph is k-layered and bipartite.
+        If the crossbar is sparse, only the memristors that were written are edges of the graph.
         :return: A k-layered bipartite graph.
         """
         graph = Graph()
+        if self.is_sparse():
+            for layer in range(self.layers):
+                if layer % 2 == 0:
+                    (row_layer, column_layer) = (layer, layer + 1)
+                else:
+                    (row_layer, column_layer) = (layer + 1, layer)
+                graph.add_nodes_from("L{}_{}".format(row_layer, r) for r in range(self.rows))
+                graph.add_nodes_from("L{}_{}".format(column_layer, c) for c in range(self.columns))
+                (rows, columns, codes) = self.get_entries(layer)
+                for (r, c, code) in zip(rows.tolist(), columns.tolist(), codes.tolist()):
+                    literal = self.literals[code]
+                    graph.add_edge("L{}_{}".format(row_layer, r), "L{}_{}".format(column_layer, c),
+                                   atom=literal.atom, positive=literal.positive)
+            return graph
         for layer in range(self.layers):
             for r in range(self.rows):
                 for c in range(self.columns):
@@ -222,6 +267,10 @@ class Crossbar(BooleanFunction):
         :param stuck_at_fault:
         :return:
         """
+        if self._matrix is None and not stuck_at_fault and not permanent:
+            self.set_memristors(np.array([row]), np.array([column]), np.array([self.get_literal_code(literal)]),
+                                layer=layer)
+            return
         memristor = Memristor(row, column, literal, layer, stuck_at_fault, permanent)
         if self.compressed:
             self.matrix[(layer, row, column, layer)] = memristor
@@ -230,6 +279,58 @@ class Crossbar(BooleanFunction):
         # if literal != self.default_literal and not stuck_at_fault and not permanent:
         #     self.dictionary[(layer, row, column)] = memristor
 
+    def get_literal_code(self, literal: Literal) -> int:
+        """
+        Returns the code of the given literal for set_memristors.
+        """
+        key = (literal.atom, literal.positive)
+        if key not in self.literal_codes:
+            self.literal_codes[key] = len(self.literals)
+            self.literals.append(literal)
+        return self.literal_codes[key]
+
+    def is_sparse(self) -> bool:
+        """
+        Returns true if and only if the crossbar is constructed as sparse and the matrix of memristors is not built,
+        such that the memristors are only stored as arrays (see get_entries). A sparse crossbar is evaluated, written
+        and converted to a graph from the memristors that were written only.
+        """
+        return self.sparse and self._matrix is None
+
+    def get_entries(self, layer: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the memristors of the given layer that are written while the matrix is not built, as arrays of rows,
+        columns and codes of literals. Every other memristor has the default literal.
+        :param layer: The layer of memristors.
+        :return: The arrays (rows, columns, codes), where a later write to the same memristor replaces an earlier one.
+        """
+        if len(self.entries[layer]) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        rows = np.concatenate([entry[0] for entry in self.entries[layer]])
+        columns = np.concatenate([entry[1] for entry in self.entries[layer]])
+        codes = np.concatenate([entry[2] for entry in self.entries[layer]])
+        # The last write of every memristor is kept
+        keys = rows.astype(np.int64) * self.columns + columns
+        (_, reversed_indices) = np.unique(keys[::-1], return_index=True)
+        indices = len(keys) - 1 - reversed_indices
+        return rows[indices], columns[indices], codes[indices]
+
+    def set_memristors(self, rows: np.ndarray, columns: np.ndarray, codes: np.ndarray, layer: int = 0):
+        """
+        Assigns literals to many memristors at once, without an object per memristor while the matrix is not built.
+        As with set_memristor, a later assignment to the same memristor replaces an earlier one.
+        :param rows: The rows of the memristors.
+        :param columns: The columns of the memristors.
+        :param codes: The codes of the literals (see get_literal_code).
+        :param layer: The layer of the memristors.
+        """
+        if self._matrix is None:
+            self.entries[layer].append((rows, columns, codes))
+            return
+        for (r, c, code) in zip(rows.tolist(), columns.tolist(), codes.tolist()):
+            self.set_memristor(r, c, self.literals[code], layer=layer)
+
     @abstractmethod
     def merge(self) -> Crossbar:
         pass
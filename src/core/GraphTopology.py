@@ -1,6 +1,6 @@
 from typing import List, Dict
 
-from networkx import DiGraph, disjoint_union, set_node_attributes
+from networkx import DiGraph, set_node_attributes, topological_sort
 
 from aux import config
 from core.BooleanFunction import BooleanFunction
@@ -42,72 +42,53 @@ class GraphTopology(BooleanFunction):
         """
         A benchmark can consist of multiple ROBDDs or a single SBDD.
         In case the benchmark consists of multiple ROBDDs, we must first merge them into a single graph.
+        The nodes are hash-consed from the terminal nodes up to the root nodes: two nodes with the same variable and the
+        same children (through edges with the same literals) represent the same sub-function, and hence they are merged
+        into a single node. As such, the sub-BDDs that are shared by several outputs are represented only once, and the
+        terminal nodes of all ROBDDs are unified. A merged node is the root node of the output variables of all the
+        nodes that it replaces.
         :return:
         """
+        # The representative of every node is the first node with the same key, in the order of the graphs
+        keys = dict()
+        representatives = dict()
+        order = []
+        number_of_nodes = 0
+        for (i, graph) in enumerate(self.graph.nodes):
+            number_of_nodes += len(graph.nodes)
+            order.extend((i, v) for v in graph.nodes)
+            for v in reversed(list(topological_sort(graph))):
+                d = graph.nodes[v]
+                children = tuple(sorted((str(e.get("variable")), str(e.get("positive")), representatives[(i, w)])
+                                        for (_, w, e) in graph.out_edges(v, data=True)))
+                key = (str(d["variable"]), bool(d["terminal"]), children)
+                if key not in keys:
+                    keys[key] = (i, v)
+                representatives[(i, v)] = keys[key]
+
+        graphs = list(self.graph.nodes)
         single_graph = DiGraph()
-        for graph in self.graph.nodes:
-            single_graph = disjoint_union(single_graph, graph)
-
-        # Find all terminal one nodes
-        terminal_ones = list(
-            map(lambda tup: tup[0],
-                filter(lambda tup: tup[1]["terminal"] and tup[1]["variable"] == '1',
-                                           single_graph.nodes(data=True))))
-        # Find all terminal zero nodes
-        terminal_zeros = list(
-                map(lambda tup: tup[0],
-                    filter(lambda tup: tup[1]["terminal"] and tup[1]["variable"] == '0',
-                           single_graph.nodes(data=True))))
-        # ROBDDs
-        if len(terminal_ones) > 1:
-            # For each terminal one node, remove its incoming edges and connect the edges with the new
-            # terminal one node
-            root = False
-            output_variables = []
-            for terminal_one in terminal_ones:
-                terminal_one_root = single_graph.nodes[terminal_one]["root"]
-                if terminal_one_root:
-                    root = True
-                    output_variables.extend(single_graph.nodes[terminal_one]["output_variables"])
-
-            terminal_edges = single_graph.in_edges(terminal_ones, data=True)
-
-            n = max(single_graph.nodes)
-
-            for (leaf_node, old_terminal_node, attributes) in terminal_edges:
-                single_graph.add_edge(leaf_node, n + 1, **attributes)
-
-            single_graph.nodes[n + 1]["variable"] = '1'
-            single_graph.nodes[n + 1]["terminal"] = True
-            single_graph.nodes[n + 1]["root"] = root
-            if root:
-                single_graph.nodes[n + 1]["output_variables"] = output_variables
-            single_graph.remove_nodes_from(terminal_ones)
-
-        if len(terminal_zeros) > 1:
-            # For each terminal one node, remove its incoming edges and connect the edges with the new
-            # terminal one node
-            root = False
-            output_variables = []
-            for terminal_zero in terminal_zeros:
-                terminal_zero_root = single_graph.nodes[terminal_zero]["root"]
-                if terminal_zero_root:
-                    root = True
-                    output_variables.extend(single_graph.nodes[terminal_zero]["output_variables"])
-
-            terminal_edges = single_graph.in_edges(terminal_zeros, data=True)
-
-            n = max(single_graph.nodes)
-
-            for (leaf_node, old_terminal_node, attributes) in terminal_edges:
-                single_graph.add_edge(leaf_node, n + 1, **attributes)
-
-            single_graph.nodes[n + 1]["variable"] = '0'
-            single_graph.nodes[n + 1]["terminal"] = True
-            single_graph.nodes[n + 1]["root"] = root
-            if root:
-                single_graph.nodes[n + 1]["output_variables"] = output_variables
-            single_graph.remove_nodes_from(terminal_zeros)
+        node_ids = dict()
+        for (i, v) in order:
+            representative = representatives[(i, v)]
+            d = graphs[i].nodes[v]
+            if representative not in node_ids:
+                (j, w) = representative
+                node_ids[representative] = len(node_ids)
+                single_graph.add_node(node_ids[representative], **graphs[j].nodes[w])
+                single_graph.nodes[node_ids[representative]]["root"] = False
+                single_graph.nodes[node_ids[representative]]["output_variables"] = []
+            if d["root"]:
+                data = single_graph.nodes[node_ids[representative]]
+                data["root"] = True
+                data["output_variables"] = data["output_variables"] + \
+                    [o for o in d["output_variables"] if o not in data["output_variables"]]
+        for ((i, v), node_id) in node_ids.items():
+            for (_, w, e) in graphs[i].out_edges(v, data=True):
+                single_graph.add_edge(node_id, node_ids[representatives[(i, w)]], **e)
+
+        config.log.add('Merge nodes before: {}\n'.format(number_of_nodes))
+        config.log.add('Merge nodes after: {}\n'.format(len(single_graph.nodes)))
 
         terminal_zeros = list(
                 map(lambda tup: tup[0],
@@ -4,7 +4,7 @@ import copy
 import numpy as np
 from typing import Dict, List
 
-from networkx import has_path, connected_components
+from networkx import Graph, has_path, connected_components
 from z3 import Bool
 
 from core.Crossbar import Crossbar
@@ -18,7 +18,8 @@ class MemristorCrossbar(Crossbar):
     Type of crossbar where literals are assigned to memristors.
     """
 
-    def __init__(self, rows: int, columns: int, layers: int = 1, default_literal=Literal("False", False)):
+    def __init__(self, rows: int, columns: int, layers: int = 1, default_literal=Literal("False", False),
+                 sparse: bool = False):
         """
         Constructs a memristor crossbar of dimensions (number of memristors) x by y.
         The optional dimension layers indicates the number of layers of memristors.
@@ -29,8 +30,10 @@ class MemristorCrossbar(Crossbar):
         :param rows: The number of memristors along the input and output nanowires.
         :param columns: The number of memristors orthogonal to the input and output nanowires.
         :param layers: The number of layers of memristors.
+        :param sparse: If True, only the memristors that are written are used while the matrix is not built, and the
+        crossbar is written with a list of memristors instead of a matrix (see write_xbar).
         """
-        super(MemristorCrossbar, self).__init__(rows, columns, layers, default_literal)
+        super(MemristorCrossbar, self).__init__(rows, columns, layers, default_literal, sparse=sparse)
         self.input_rows = None
 
     def merge(self) -> Crossbar:
@@ -38,8 +41,14 @@ class MemristorCrossbar(Crossbar):
         pass
 
     def __copy__(self):
-        crossbar = MemristorCrossbar(self.rows, self.columns, self.layers)
-        crossbar.matrix = copy.deepcopy(self.matrix)
+        crossbar = MemristorCrossbar(self.rows, self.columns, self.layers, sparse=self.sparse)
+        if self._matrix is None:
+            # The arrays of a bulk write are never modified, such that they can be shared
+            crossbar.literals = list(self.literals)
+            crossbar.literal_codes = dict(self.literal_codes)
+            crossbar.entries = [list(entries) for entries in self.entries]
+        else:
+            crossbar.matrix = copy.deepcopy(self.matrix)
         # for layer in range(self.layers):
         #     for r in range(self.rows):
         #         for c in range(self.columns):
@@ -243,6 +252,20 @@ class MemristorCrossbar(Crossbar):
                 content += ".o {} {} {}\n".format(output_variables, layer, nanowire)
             else:
                 content += ".o {} {} {}\n".format(" ".join(output_variables), layer, nanowire)
+        if self.is_sparse():
+            # Only the memristors that were written are listed, as the layer, row, column and literal, instead of the
+            # matrix of a dense crossbar (.xbar)
+            content += ".layers {}\n".format(self.layers)
+            content += ".entries\n"
+            lines = []
+            for layer in range(self.layers):
+                (rows, columns, codes) = self.get_entries(layer)
+                for (r, c, code) in zip(rows.tolist(), columns.tolist(), codes.tolist()):
+                    if self.literals[code] != self.default_literal:
+                        lines.append("{} {} {} {}\n".format(layer, r, c, self.literals[code]))
+            content += "".join(lines)
+            content += ".end\n"
+            return content
         content += ".xbar\n"
         for r in range(self.rows):
             for c in range(self.columns):
@@ -255,14 +278,18 @@ class MemristorCrossbar(Crossbar):
         return content
 
     def eval(self, instance: Dict[str, bool], input_function: str = "1") -> Dict[str, bool]:
+        if self.is_sparse():
+            return self._eval_sparse(instance, input_function)
+
         # For all input nanowires different from a different input function than the given input function,
         # we set the literals False to avoid any loops through these nanowires.
+        # The literals are set on a copy, such that this crossbar can be evaluated for other input functions.
+        crossbar_copy = self.__copy__()
         for (other_input_function, (layer, input_nanowire)) in self.get_input_nanowires().items():
             if input_function != other_input_function:
                 for c in range(self.columns):
-                    self.set_memristor(input_nanowire, c, Literal("False", False), layer=layer)
+                    crossbar_copy.set_memristor(input_nanowire, c, Literal("False", False), layer=layer)
 
-        crossbar_copy = self.__copy__()
         crossbar_instance = crossbar_copy.instantiate(instance)
         graph = crossbar_instance.graph()
         true_edges = [(u, v) for u, v, d in graph.edges(data=True) if
@@ -278,6 +305,41 @@ class MemristorCrossbar(Crossbar):
 
         return evaluation
 
+    def _eval_sparse(self, instance: Dict[str, bool], input_function: str = "1") -> Dict[str, bool]:
+        """
+        Evaluates a sparse crossbar without building its matrix. Only the memristors that conduct for the instance
+        are edges of the graph of nanowires.
+        """
+        conducting = np.array([(literal.atom == "True" and literal.positive) or
+                               (literal.atom not in ["True", "False"] and instance[literal.atom] == literal.positive)
+                               for literal in self.literals], dtype=bool)
+
+        graph = Graph()
+        for layer in range(self.layers):
+            (rows, columns, codes) = self.get_entries(layer)
+            on = conducting[codes]
+            # The memristors on the input nanowires of other input functions are off to avoid any loops
+            for (other_input_function, (input_layer, input_nanowire)) in self.get_input_nanowires().items():
+                if input_function != other_input_function and input_layer == layer:
+                    on &= rows != input_nanowire
+            if layer % 2 == 0:
+                (row_layer, column_layer) = (layer, layer + 1)
+            else:
+                (row_layer, column_layer) = (layer + 1, layer)
+            graph.add_edges_from(("L{}_{}".format(row_layer, r), "L{}_{}".format(column_layer, c))
+                                 for (r, c) in zip(rows[on].tolist(), columns[on].tolist()))
+
+        evaluation = dict()
+        input_layer, input_nanowire = self.get_input_nanowire(input_function)
+        sink = "L{}_{}".format(input_layer, input_nanowire)
+        graph.add_node(sink)
+        for (output_variable, (output_layer, output_nanowire)) in self.get_output_nanowires().items():
+            source = "L{}_{}".format(output_layer, output_nanowire)
+            graph.add_node(source)
+            evaluation[output_variable] = has_path(graph, source, sink)
+
+        return evaluation
+
     def draw_graph(self, benchmark_name: str):
         content = ''
         content += 'graph{\n'
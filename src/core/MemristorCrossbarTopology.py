@@ -103,13 +103,15 @@ class MemristorCrossbarTopology(CrossbarTopology):
         connections = dict()
         i = 0
         for ((x1, r1), (x2, r2)) in self.inter_connections:
-            x1.output_nanowires["inter_{}".format(i)] = (0, r1)
-            x2.input_nanowires["inter_{}".format(i)] = (0, r2)
+            # Interconnections that are already wired (e.g. by partitioning) keep their layers
+            x1.output_nanowires.setdefault("inter_{}".format(i), (0, r1))
+            x2.input_nanowires.setdefault("inter_{}".format(i), (0, r2))
             connections[(x1, "inter_{}".format(i))] = x2
             i += 1
 
-        root = list(topological_sort(self.topology))[0]
-        queue = [(root, input_function)]
+        # Evaluation starts from every crossbar with the given input function
+        queue = [(crossbar, input_function) for crossbar in topological_sort(self.topology)
+                 if input_function in crossbar.get_input_nanowires()]
 
         output_evaluations = set()
 
@@ -16,8 +16,12 @@ class VerilogBenchmark(BooleanFunction):
         self.output_variables = output_variables
         self.functions = functions
         self.auxiliary_variables = auxiliary_variables
+        # The and-inverter graph of the benchmark, if it could be built by the parser
+        self.aig = None
 
     def eval(self, instance: Dict[str, bool]) -> Dict[str, bool]:
+        if self.aig is not None:
+            return self.aig.eval(instance)
         evaluation = dict()
         for (output_variable, formula) in self.functions.items():
             evaluation[output_variable] = formula.eval(instance)
@@ -0,0 +1,396 @@
+import time
+from typing import Dict, List
+
+from networkx import Graph
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.LabelingCache import LabelingCache
+from synth.KLabeling import KLabeling
+from synth.SemiperimeterBounds import SemiperimeterBounds
+
+
+class BranchAndBoundKLabeling:
+
+    def __init__(self, g: Graph, layers: int = 1, fixed_assignments: Dict[object, List[int]] = None,
+                 initial_labeling=None):
+        """
+        Computes a K-labeling with a branch-and-bound search in the process itself, without an ILP solver.
+        A node is assigned to an interval of consecutive layers of nanowires. The search branches on the interval of
+        one node at a time, in breadth-first order from the root nodes, and tries the intervals that increase the
+        semiperimeter least first.
+        An edge needs two layers that differ by one, one in the interval of each node. After every branch, the
+        intervals of the unassigned neighbors that no longer allow such layers are removed, and the branch is
+        pruned as soon as a node has no interval left.
+        A branch is also pruned if its lower bound is at least the semiperimeter of the incumbent. The lower bound
+        follows from the number of nanowires per layer: the assigned nodes count in each layer of their interval,
+        and every unassigned node adds at least as many nanowires to the even (odd) layers as the smallest number
+        of even (odd) layers over its remaining intervals. Moreover, every edge between unassigned nodes needs a
+        node on an even layer and a node on an odd layer, such that a matching of the unassigned nodes bounds both
+        numbers from below, and every conflict among the unassigned nodes (an odd cycle, see SemiperimeterBounds)
+        needs a node on layers of both parities.
+        The search starts from the initial labeling, or else the trivial labeling, and stops as soon as the
+        incumbent matches the combinatorial lower bound. With config.time_limit, the incumbent is returned when the
+        time runs out.
+        The search pays off for one or two layers, where it is usually faster than the ILP. With three or more
+        layers, the bound leaves a gap of one or two nanowires on most BDDs, as it cannot tell how many nodes the
+        outer layers hold, and proving optimality takes from one to tens of seconds on ROBDDs of 13 to 15 nodes,
+        where z3 and the ILP take less than a second.
+        :param g: The graph to label.
+        :param layers: The number of layers of memristors.
+        :param fixed_assignments: Optionally, a dictionary from nodes to the layers of nanowires these nodes must be
+        assigned to.
+        :param initial_labeling: Optionally, a feasible K-labeling, which is the initial incumbent.
+        """
+        self.g = g
+        self.layers = layers
+        if fixed_assignments is None:
+            self.fixed_assignments = dict()
+        else:
+            self.fixed_assignments = fixed_assignments
+        self.initial_labeling = initial_labeling
+        self.labeling = None
+        self.intervals = [(a, b) for a in range(layers + 1) for b in range(a, layers + 1)]
+        self.compatible = [[self._is_compatible(i, j) for j in self.intervals] for i in self.intervals]
+        self.order = []
+        self.neighbors = dict()
+        self.domains = dict()
+        self.assignments = dict()
+        self.counts = [0 for _ in range(layers + 1)]
+        # The smallest numbers of even layers, odd layers and layers over the remaining intervals of every node
+        self.minima = dict()
+        self.sums = [0, 0, 0]
+        self.matchings = []
+        self.conflicts = []
+        self.branches = 0
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    @staticmethod
+    def _is_compatible(i, j) -> bool:
+        """
+        Returns whether an edge can connect a node on the interval i with a node on the interval j.
+        """
+        (a, b) = i
+        (c, d) = j
+        return c <= b + 1 and a <= d + 1 and not (a == b == c == d)
+
+    def _get_output_layer(self) -> int:
+        if config.output_layer is not None:
+            return config.output_layer
+        if self.layers % 2 == 0:
+            return self.layers
+        return self.layers - 1
+
+    def _get_domain(self, v) -> List[int]:
+        """
+        Returns the indices of the intervals the node can be assigned to.
+        """
+        if v in self.fixed_assignments:
+            fixed_layers = sorted(self.fixed_assignments[v])
+            return [self.intervals.index((fixed_layers[0], fixed_layers[-1]))]
+        d = self.g.nodes[v]
+        required = None
+        if config.io_constraints and d["root"]:
+            required = self._get_output_layer()
+        elif config.io_constraints and d["terminal"]:
+            required = config.input_layer if config.input_layer is not None else 0
+        if required is None:
+            return list(range(len(self.intervals)))
+        return [i for (i, (a, b)) in enumerate(self.intervals) if a <= required <= b]
+
+    def _get_order(self) -> List:
+        """
+        Returns the nodes in breadth-first order from the root nodes, such that the neighbors of a node are
+        assigned soon after the node.
+        """
+        roots = [v for (v, d) in self.g.nodes(data=True) if d["root"]]
+        visited = set()
+        order = []
+        for start in roots + list(self.g.nodes):
+            if start in visited:
+                continue
+            visited.add(start)
+            order.append(start)
+            i = len(order) - 1
+            while i < len(order):
+                for w in self.neighbors[order[i]]:
+                    if w not in visited:
+                        visited.add(w)
+                        order.append(w)
+                i += 1
+        return order
+
+    def _get_minima(self, domain: List[int]):
+        even = min(len(range(a + a % 2, b + 1, 2)) for (a, b) in (self.intervals[i] for i in domain))
+        odd = min(len(range(a + 1 - a % 2, b + 1, 2)) for (a, b) in (self.intervals[i] for i in domain))
+        length = min(b - a + 1 for (a, b) in (self.intervals[i] for i in domain))
+        return even, odd, length
+
+    def _set_domain(self, v, domain: List[int]):
+        """
+        Sets the domain of an unassigned node and updates the sums of the minima.
+        """
+        self.domains[v] = domain
+        if len(domain) == 0:
+            minima = (0, 0, 0)
+        else:
+            minima = self._get_minima(domain)
+        for k in range(3):
+            self.sums[k] += minima[k] - self.minima[v][k]
+        self.minima[v] = minima
+
+    def _get_matchings(self) -> List[int]:
+        """
+        Returns for every depth of the search the size of a matching between the nodes that are not assigned yet,
+        which are the nodes from this depth onwards. The matchings are grown greedily from the last node.
+        """
+        matchings = [0 for _ in range(len(self.order) + 1)]
+        position = dict((v, k) for (k, v) in enumerate(self.order))
+        matched = set()
+        for k in range(len(self.order) - 1, -1, -1):
+            v = self.order[k]
+            matchings[k] = matchings[k + 1]
+            for w in self.neighbors[v]:
+                if position[w] > k and w not in matched:
+                    matched.update([v, w])
+                    matchings[k] += 1
+                    break
+        return matchings
+
+    def _get_conflicts(self) -> List[int]:
+        """
+        Returns for every depth of the search the number of vertex-disjoint conflicts between the nodes that are
+        not assigned yet. A packing of conflicts of a subset of these nodes is a packing of conflicts of the nodes
+        themselves, such that the numbers never decrease with the number of unassigned nodes.
+        """
+        conflicts = [0 for _ in range(len(self.order) + 1)]
+        for k in range(len(self.order) - 1, -1, -1):
+            semiperimeter_bounds = SemiperimeterBounds(self.g.subgraph(self.order[k:]), self.layers)
+            conflicts[k] = max(conflicts[k + 1], semiperimeter_bounds.get_conflicts())
+        return conflicts
+
+    def _get_dimensions(self, counts: List[int]):
+        rows = max(counts[l] for l in range(0, self.layers + 1, 2))
+        columns = max(counts[l] for l in range(1, self.layers + 1, 2))
+        return rows, columns
+
+    def _get_bound(self) -> int:
+        (rows, columns) = self._get_dimensions(self.counts)
+        even_layers = self.layers // 2 + 1
+        odd_layers = (self.layers + 1) // 2
+        depth = len(self.assignments)
+        matching = self.matchings[depth]
+        even_total = sum(self.counts[0::2]) + max(self.sums[0], matching)
+        odd_total = sum(self.counts[1::2]) + max(self.sums[1], matching)
+        total = sum(self.counts) + max(self.sums[2], self.sums[0] + self.sums[1], 2 * matching,
+                                       len(self.order) - depth + self.conflicts[depth])
+        rows = max(rows, -(-even_total // even_layers))
+        columns = max(columns, -(-odd_total // odd_layers))
+        deficit = total - rows * even_layers - columns * odd_layers
+        if deficit > 0:
+            # Extra rows cover more nanowires than extra columns
+            rows += -(-deficit // even_layers)
+        return rows + columns
+
+    def _fits(self, i: int) -> bool:
+        (a, b) = self.intervals[i]
+        for l in range(a, b + 1):
+            if l % 2 == 0 and self.counts[l] + 1 > config.max_rows:
+                return False
+            if l % 2 == 1 and self.counts[l] + 1 > config.max_columns:
+                return False
+        return True
+
+    def _get_candidates(self, v) -> List[int]:
+        """
+        Returns the intervals of the node that fit within the maximum dimensions, ordered by the increase of the
+        semiperimeter, the number of layers, and the number of nanowires in these layers.
+        """
+        candidates = []
+        for i in self.domains[v]:
+            if not self._fits(i):
+                continue
+            (a, b) = self.intervals[i]
+            counts = list(self.counts)
+            for l in range(a, b + 1):
+                counts[l] += 1
+            (rows, columns) = self._get_dimensions(counts)
+            candidates.append((rows + columns, b - a, sum(self.counts[a:b + 1]), i))
+        candidates.sort()
+        return [i for (_, _, _, i) in candidates]
+
+    def _assign(self, v, i: int):
+        """
+        Assigns the node to the interval, and removes the incompatible intervals of its unassigned neighbors.
+        :return: The removed domains for the undo, or None if a neighbor has no interval left.
+        """
+        self.assignments[v] = i
+        (a, b) = self.intervals[i]
+        for l in range(a, b + 1):
+            self.counts[l] += 1
+        for k in range(3):
+            self.sums[k] -= self.minima[v][k]
+        removed = []
+        for w in self.neighbors[v]:
+            if w in self.assignments:
+                continue
+            domain = self.domains[w]
+            reduced = [j for j in domain if self.compatible[i][j]]
+            if len(reduced) < len(domain):
+                removed.append((w, domain))
+                self._set_domain(w, reduced)
+                if len(reduced) == 0:
+                    self._unassign(v, removed)
+                    return None
+        return removed
+
+    def _unassign(self, v, removed: List):
+        (a, b) = self.intervals[self.assignments.pop(v)]
+        for l in range(a, b + 1):
+            self.counts[l] -= 1
+        for k in range(3):
+            self.sums[k] += self.minima[v][k]
+        for (w, domain) in reversed(removed):
+            self._set_domain(w, domain)
+
+    def _get_labeling(self, assignments: Dict):
+        node_assignments = dict()
+        for (v, i) in assignments.items():
+            (a, b) = self.intervals[i]
+            node_assignments[v] = list(range(a, b + 1))
+
+        edge_assignments = dict()
+        for (u, v) in self.g.edges:
+            for l in range(self.layers):
+                if l in node_assignments[u] and l + 1 in node_assignments[v]:
+                    edge_assignments[(u, v)] = (l, l + 1)
+                    break
+                if l + 1 in node_assignments[u] and l in node_assignments[v]:
+                    edge_assignments[(u, v)] = (l + 1, l)
+                    break
+
+        rows, columns = KLabeling.get_dimensions(node_assignments, self.layers)
+        return rows, columns, node_assignments, edge_assignments
+
+    def _search(self, deadline, lower_bound: int) -> bool:
+        """
+        Searches depth-first with an explicit stack, such that large graphs do not exceed the recursion limit.
+        :return: True if the search space was exhausted.
+        """
+        if self.labeling is None:
+            best = config.max_rows + config.max_columns + 1
+        else:
+            best = self.labeling[0] + self.labeling[1]
+        if best <= lower_bound:
+            return True
+
+        n = len(self.order)
+        # Every frame holds the candidates of a node, the next candidate, and the undo of the current candidate
+        stack = [[self._get_candidates(self.order[0]), 0, None]]
+        while len(stack) > 0:
+            if deadline is not None and self.branches % 1000 == 0 and time.time() > deadline:
+                return False
+            frame = stack[-1]
+            v = self.order[len(stack) - 1]
+            if frame[2] is not None:
+                self._unassign(v, frame[2])
+                frame[2] = None
+            if frame[1] == len(frame[0]):
+                stack.pop()
+                continue
+            i = frame[0][frame[1]]
+            frame[1] += 1
+            self.branches += 1
+
+            removed = self._assign(v, i)
+            if removed is None:
+                continue
+            frame[2] = removed
+            if self._get_bound() >= best:
+                continue
+            if len(stack) == n:
+                self.labeling = self._get_labeling(self.assignments)
+                best = self.labeling[0] + self.labeling[1]
+                if best <= lower_bound:
+                    return True
+                continue
+            stack.append([self._get_candidates(self.order[len(stack)]), 0, None])
+        return True
+
+    def label(self):
+        print("Number of nodes: {}".format(len(self.g.nodes)))
+        print("Number of edges: {}".format(len(self.g.edges)))
+        print("Layers: {}".format(self.layers))
+
+        # Labelings with fixed assignments are never cached
+        use_cache = config.cache and len(self.fixed_assignments) == 0
+        if use_cache:
+            labeling_cache = LabelingCache("k", self.layers)
+            labeling = labeling_cache.get(self.g)
+            if labeling is not None:
+                config.log.add('Cache: hit\n')
+                self.labeling = labeling
+                return self.labeling
+
+        self.start_time = time.time()
+        deadline = None
+        if config.time_limit is not None:
+            deadline = self.start_time + config.time_limit
+
+        semiperimeter_bounds = SemiperimeterBounds(self.g, self.layers)
+        lower_bound = semiperimeter_bounds.get_k_bound()
+        config.log.add('Lower bound (semiperimeter): {}\n'.format(lower_bound))
+        config.log.add(semiperimeter_bounds.get_log())
+
+        for v in self.g.nodes:
+            self.neighbors[v] = set(self.g.predecessors(v)).union(self.g.successors(v))
+            self.minima[v] = (0, 0, 0)
+            self._set_domain(v, self._get_domain(v))
+        self.order = self._get_order()
+        self.matchings = self._get_matchings()
+        self.conflicts = self._get_conflicts()
+
+        if self.initial_labeling is not None:
+            self.labeling = self.initial_labeling
+        else:
+            labeling = KLabeling.get_trivial_labeling(self.g, self.layers, self.fixed_assignments)
+            if labeling is not None and labeling[0] <= config.max_rows and labeling[1] <= config.max_columns:
+                self.labeling = labeling
+        if config.objective == "cs":
+            # Any labeling within the maximum dimensions is a solution
+            lower_bound = config.max_rows + config.max_columns
+        if self.labeling is not None and self.labeling[0] + self.labeling[1] <= lower_bound:
+            optimal = True
+        elif len(self.order) == 0:
+            optimal = True
+        else:
+            optimal = self._search(deadline, lower_bound)
+
+        self.end_time = time.time()
+
+        if self.labeling is None:
+            if optimal:
+                raise InfeasibleSolutionException("Infeasible solution.")
+            raise InfeasibleSolutionException("No solution found.")
+
+        (rows, columns, _, _) = self.labeling
+        print("Optimal: {}".format(optimal))
+        print("Objective: {}".format(rows + columns))
+        self.log += 'Branches: {}\n'.format(self.branches)
+        self.log += 'Branch-and-bound time (s): {}\n'.format(self.end_time - self.start_time)
+        self.log += 'Rows: {}\n'.format(rows)
+        self.log += 'Columns: {}\n'.format(columns)
+        self.log += 'Objective: {}\n'.format(rows + columns)
+        self.log += 'Optimal: {}\n'.format(optimal)
+
+        config.log.add(self.get_log())
+
+        if use_cache and optimal:
+            labeling_cache.put(self.g, self.labeling)
+
+        return self.labeling
@@ -6,8 +6,15 @@ from networkx import Graph
 from aux import config
 from synth.CrossbarMapping2D import CrossbarMapping2D
 from synth.CrossbarMapping3D import CrossbarMapping3D
+from synth.GraphDecomposition import GraphDecomposition
+from synth.IncrementalLabeling import IncrementalLabeling
 from synth.KLabeling import KLabeling
+from synth.LabelingFactory import LabelingFactory
+from synth.LargeNeighborhoodSearch import LargeNeighborhoodSearch
 from synth.MappingMethod import MappingMethod
+from synth.PortfolioLabeling import PortfolioLabeling
+from synth.Presolve import Presolve
+from synth.StrategySelector import StrategySelector
 from synth.VHLabeling import VHLabeling
 
 
@@ -19,12 +26,15 @@ class COMPACT(MappingMethod):
         """
         super(COMPACT, self).__init__()
         self.labeling = None
+        # The K-labelings of the ILP by number of layers, whose models are reused when the same graph is mapped again
+        self.k_labelings = dict()
 
-    def map(self, graph: Graph, layers: int = 1):
+    def map(self, graph: Graph, layers: int = 1, initial_labeling=None):
         """
         Given a graph, and optionally a
         :param graph:
         :param layers:
+        :param initial_labeling: Optionally, a feasible labeling the solver starts from.
         :return:
         """
         print("COMPACT started")
@@ -34,37 +44,118 @@ class COMPACT(MappingMethod):
         self.log += 'Nodes: {}\n'.format(len(graph.nodes))
         self.log += 'Edges: {}\n'.format(len(graph.edges))
 
+        incremental_labeling = None
+        if config.eco_path is not None:
+            if config.presolve:
+                # The dead nodes are removed as in the labeling of the previous run
+                presolve = Presolve(graph, layers)
+                presolve.reduce()
+                graph = presolve.graph
+            incremental_labeling = IncrementalLabeling(graph, layers)
+
+        if incremental_labeling is not None and incremental_labeling.has_previous():
+            # Only the nodes that changed since the previous labeling are labeled
+            config.log.add('COMPACT version: incremental\n')
+            self.labeling = incremental_labeling.label()
+        elif config.presolve:
+            presolve = Presolve(graph, layers)
+            reduced_graph = presolve.reduce()
+            config.log.add(presolve.get_log())
+            # The expansion of the labeling adds rows and columns
+            default_max_rows = config.max_rows
+            default_max_columns = config.max_columns
+            config.max_rows -= presolve.get_offset()
+            config.max_columns -= presolve.get_offset()
+            try:
+                labeling = self._label(reduced_graph, layers, presolve.reduce_labeling(initial_labeling))
+            finally:
+                config.max_rows = default_max_rows
+                config.max_columns = default_max_columns
+            self.labeling = presolve.expand(labeling)
+            graph = presolve.graph
+        else:
+            self.labeling = self._label(graph, layers, initial_labeling)
+
+        if incremental_labeling is not None and incremental_labeling.previous is None:
+            incremental_labeling.put(self.labeling)
+
         if config.vh_labeling:
+            crossbar_mapping = CrossbarMapping2D(graph)
+        else:
+            crossbar_mapping = CrossbarMapping3D(graph, layers)
+
+        self.crossbar = crossbar_mapping.map(self.labeling)
+        self.end_time = time.time()
+
+        config.log.add('COMPACT time (s): {}\n'.format(self.end_time - self.start_time))
+
+        print("COMPACT stopped")
+        
+        return self.crossbar
+
+    def _label(self, graph: Graph, layers: int, initial_labeling=None):
+        if config.portfolio is not None:
+            config.log.add('COMPACT version: portfolio ({})\n'.format(', '.join(config.portfolio)))
+            config.log.add('Nodes: {}\n'.format(len(graph.nodes)))
+            config.log.add('Edges: {}\n'.format(len(graph.edges)))
+            portfolio_labeling = PortfolioLabeling(graph, layers)
+            labeling = portfolio_labeling.label()
+        elif config.auto:
+            config.log.add('COMPACT version: selected strategy\n')
+            config.log.add('Nodes: {}\n'.format(len(graph.nodes)))
+            config.log.add('Edges: {}\n'.format(len(graph.edges)))
+            strategy_selector = StrategySelector(graph, layers, initial_labeling)
+            labeling = strategy_selector.label()
+        elif config.vh_labeling:
             config.log.add('COMPACT version: VH-labeling\n')
             config.log.add('Gamma: {}\n'.format(config.gamma))
             config.log.add('Nodes: {}\n'.format(len(graph.nodes)))
             config.log.add('Edges: {}\n'.format(len(graph.edges)))
-            vh_labeling = VHLabeling(graph)
-            self.labeling = vh_labeling.label()
-            crossbar_mapping = CrossbarMapping2D(graph)
+            if config.decompose and not config.combinatorial:
+                graph_decomposition = GraphDecomposition(graph)
+                labeling = graph_decomposition.label()
+            else:
+                labeling = LabelingFactory.label(graph, initial_labeling=initial_labeling)
         else:
-            if config.alt_labeling:
-                config.log.add('COMPACT version: range K-labeling\n')
+            if config.decompose:
+                config.log.add('COMPACT version: decomposed K-labeling\n')
                 config.log.add('Nodes: {}\n'.format(len(graph.nodes)))
                 config.log.add('Edges: {}\n'.format(len(graph.edges)))
-                k_labeling = KLabeling(graph, layers)
-                self.labeling = k_labeling.label_alt()
+                graph_decomposition = GraphDecomposition(graph, layers)
+                labeling = graph_decomposition.label()
             else:
-                config.log.add('COMPACT version: K-labeling\n')
+                if config.solver == "z3":
+                    config.log.add('COMPACT version: K-labeling (z3)\n')
+                elif config.solver == "bb":
+                    config.log.add('COMPACT version: K-labeling (branch-and-bound)\n')
+                elif config.alt_labeling:
+                    config.log.add('COMPACT version: range K-labeling\n')
+                else:
+                    config.log.add('COMPACT version: K-labeling\n')
                 config.log.add('Nodes: {}\n'.format(len(graph.nodes)))
                 config.log.add('Edges: {}\n'.format(len(graph.edges)))
-                k_labeling = KLabeling(graph, layers)
-                self.labeling = k_labeling.label()
-            crossbar_mapping = CrossbarMapping3D(graph, layers)
+                if config.solver in ["cplex", "cbc"] and not config.alt_labeling:
+                    labeling = self._get_k_labeling(graph, layers, initial_labeling).label()
+                else:
+                    labeling = LabelingFactory.label(graph, layers, initial_labeling=initial_labeling)
 
-        self.crossbar = crossbar_mapping.map(self.labeling)
-        self.end_time = time.time()
+        if config.lns_time is not None and not config.vh_labeling and config.objective == "semi":
+            large_neighborhood_search = LargeNeighborhoodSearch(graph, layers, labeling)
+            labeling = large_neighborhood_search.label()
 
-        config.log.add('COMPACT time (s): {}\n'.format(self.end_time - self.start_time))
+        return labeling
 
-        print("COMPACT stopped")
-        
-        return self.crossbar
+    def _get_k_labeling(self, graph: Graph, layers: int, initial_labeling=None) -> KLabeling:
+        """
+        Returns the K-labeling of the ILP of the graph. When the same graph is mapped again with the same number of
+        layers, e.g. in a sweep of the maximum dimensions, the K-labeling and its model are reused.
+        """
+        k_labeling = self.k_labelings.get(layers)
+        if k_labeling is None or k_labeling.g is not graph:
+            k_labeling = KLabeling(graph, layers)
+            self.k_labelings[layers] = k_labeling
+        k_labeling.initial_labeling = initial_labeling
+        return k_labeling
 
     def get_log(self) -> str:
         v, h, vh = VHLabeling.get_labels(self.labeling)
@@ -1,6 +1,7 @@
 import time
 from datetime import datetime
 
+import numpy as np
 from networkx import DiGraph
 
 from aux import config
@@ -24,7 +25,7 @@ class ChakrabortyMappingMethod(MappingMethod):
         rows = len(graph.nodes)
         columns = len(graph.edges)
 
-        crossbar = MemristorCrossbar(rows, columns)
+        crossbar = MemristorCrossbar(rows, columns, sparse=True)
 
         # We assign each node to a layer with the terminal node to the bottom-most nanowire
         # and the root node to the top-most nanowire
@@ -45,6 +46,13 @@ class ChakrabortyMappingMethod(MappingMethod):
             node_layers[current_node] = r
             r += 1
 
+        # Every edge has its own column with two memristors: the literal of the edge on the row of the parent node,
+        # and True on the row of the child node. The memristors are written in bulk, such that the crossbar stays
+        # sparse (see MemristorCrossbar.is_sparse).
+        memristor_rows = []
+        memristor_columns = []
+        memristor_codes = []
+        true_code = crossbar.get_literal_code(Literal("True", True))
         c = 0
         for (current_node, node_data) in graph.nodes(data=True):
             out_edges = graph.edges(current_node, data=True)
@@ -58,18 +66,15 @@ class ChakrabortyMappingMethod(MappingMethod):
                 if not edge_data['positive']:
                     negative_child_node = child_node
 
-            if positive_child_node is not None:
-                r_current_node = node_layers[current_node]
-                r_child_node = node_layers[positive_child_node]
-                crossbar.set_memristor(r_current_node, c, Literal(variable, True))
-                crossbar.set_memristor(r_child_node, c, Literal("True", True))
-                c += 1
-            if negative_child_node is not None:
-                r_current_node = node_layers[current_node]
-                r_child_node = node_layers[negative_child_node]
-                crossbar.set_memristor(r_current_node, c, Literal(variable, False))
-                crossbar.set_memristor(r_child_node, c, Literal("True", True))
-                c += 1
+            for (child_node, positive) in [(positive_child_node, True), (negative_child_node, False)]:
+                if child_node is not None:
+                    memristor_rows.extend([node_layers[current_node], node_layers[child_node]])
+                    memristor_columns.extend([c, c])
+                    memristor_codes.extend([crossbar.get_literal_code(Literal(variable, positive)), true_code])
+                    c += 1
+
+        crossbar.set_memristors(np.array(memristor_rows, dtype=np.int64), np.array(memristor_columns, dtype=np.int64),
+                                np.array(memristor_codes, dtype=np.int64))
 
         crossbar.input_variables = list(input_variables)
         for (input_function, (layer, nanowire)) in input_nodes.items():
@@ -0,0 +1,257 @@
+import random
+import time
+from typing import Dict, List
+
+from networkx import Graph, biconnected_component_edges
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from synth.VHLabeling import VHLabeling
+
+
+class CombinatorialVHLabeling:
+
+    def __init__(self, g: Graph, iterations: int = 100, patience: int = 10, seed: int = 0):
+        """
+        Computes a VH-labeling without an ILP solver.
+        A VH-labeling is a 2-coloring (V and H) of the graph after the removal of the nodes that are labeled VH.
+        Minimizing the number of VH nodes is therefore the odd cycle transversal (bipartization) problem.
+        The I/O constraints are modelled with an anchor node labeled V, which is adjacent to all root and terminal
+        nodes such that these nodes are labeled H (or VH).
+        First, the graph is checked for bipartiteness in linear time. Otherwise, the graph is reduced to its
+        non-bipartite blocks (biconnected components), since every odd cycle lies within a single block, and a block
+        that is a single odd cycle needs a single VH node. The remaining blocks are bipartized by greedily growing
+        an induced bipartite subgraph, which is improved by iterated greedy passes that insert the VH nodes of the
+        best pass first.
+        :param g: The graph to label.
+        :param iterations: The maximum number of greedy passes per block.
+        :param patience: The number of greedy passes without improvement after which a block is done.
+        :param seed: The seed for the order of the greedy passes.
+        """
+        self.g = g
+        self.iterations = iterations
+        self.patience = patience
+        self.random = random.Random(seed)
+        self.anchor = None
+        self.labeling = dict()
+        self.start_time = None
+        self.stop_time = None
+
+    def get_log(self) -> str:
+        return 'VH-labeling time (s): {}\n'.format(self.stop_time - self.start_time)
+
+    def _get_undirected(self) -> Graph:
+        undirected = Graph()
+        undirected.add_nodes_from(self.g.nodes)
+        undirected.add_edges_from((u, v) for (u, v) in self.g.edges if u != v)
+        if config.io_constraints:
+            self.anchor = object()
+            undirected.add_node(self.anchor)
+            for (v, d) in self.g.nodes(data=True):
+                if d["root"] or d["terminal"]:
+                    undirected.add_edge(self.anchor, v)
+        return undirected
+
+    @staticmethod
+    def _color(graph: Graph, removed: set, starts: List = None):
+        """
+        Colors the graph without the removed nodes with 0 and 1 by breadth-first search.
+        :return: A tuple (coloring, components, bipartite), where components is a list of lists of nodes.
+        """
+        color = dict()
+        components = []
+        bipartite = True
+        if starts is None:
+            starts = []
+        for start in starts + list(graph.nodes):
+            if start in removed or start in color:
+                continue
+            color[start] = 0
+            component = [start]
+            queue = [start]
+            i = 0
+            while i < len(queue):
+                u = queue[i]
+                i += 1
+                for v in graph.neighbors(u):
+                    if v in removed:
+                        continue
+                    if v not in color:
+                        color[v] = 1 - color[u]
+                        component.append(v)
+                        queue.append(v)
+                    elif color[v] == color[u]:
+                        bipartite = False
+            components.append(component)
+        return color, components, bipartite
+
+    @staticmethod
+    def _find(parent: Dict, parity: Dict, v):
+        """
+        Returns the root of v and the parity of v with respect to its root, and compresses the path.
+        """
+        path = []
+        while parent[v] != v:
+            path.append(v)
+            v = parent[v]
+        root = v
+        p = 0
+        for u in reversed(path):
+            p ^= parity[u]
+            parent[u] = root
+            parity[u] = p
+        if len(path) == 0:
+            return root, 0
+        return root, parity[path[0]]
+
+    def _greedy(self, graph: Graph, order: List) -> set:
+        """
+        Inserts the nodes in the given order into an induced bipartite subgraph. A node is inserted if its
+        neighbors in the subgraph allow a consistent color. The colors are kept in a union-find structure with
+        parities, such that every insertion takes almost constant time per edge.
+        :return: The nodes that were not inserted.
+        """
+        parent = dict()
+        parity = dict()
+        rejected = set()
+        for v in order:
+            # The color of v relative to the root of each neighboring set
+            required = dict()
+            consistent = True
+            for u in graph.neighbors(v):
+                if u not in parent:
+                    continue
+                (root, p) = self._find(parent, parity, u)
+                if required.get(root, 1 - p) != 1 - p:
+                    consistent = False
+                    break
+                required[root] = 1 - p
+            if not consistent:
+                rejected.add(v)
+                continue
+            parent[v] = v
+            parity[v] = 0
+            for (root, p) in required.items():
+                parent[root] = v
+                parity[root] = p
+        return rejected
+
+    def _bipartize(self, block: Graph) -> set:
+        """
+        Returns a set of nodes whose removal makes the block bipartite. The anchor node is never removed.
+        """
+        def priority(v):
+            return v is not self.anchor
+
+        # Nodes of a low degree are inserted first, as they are least likely to close an odd cycle
+        order = sorted(block.nodes, key=lambda v: (priority(v), block.degree(v)))
+        best = self._greedy(block, order)
+        current = best
+        stalled = 0
+        for _ in range(self.iterations):
+            if len(best) == 0 or stalled >= self.patience:
+                break
+            # The rejected nodes of the current pass are inserted first, which may reject fewer other nodes
+            first = list(current)
+            self.random.shuffle(first)
+            order = sorted(first + [v for v in order if v not in current], key=priority)
+            rejected = self._greedy(block, order)
+            # Passes that are as good as the current pass are accepted to move along plateaus
+            if len(rejected) <= len(current):
+                current = rejected
+            if len(rejected) < len(best):
+                best = rejected
+                stalled = 0
+            else:
+                stalled += 1
+        return best
+
+    def _orient(self, color: Dict, components: List[List], removed: set) -> Dict:
+        """
+        Chooses per connected component which color is labeled V, such that the numbers of V and H nodes are
+        balanced. In the component of the anchor node, the color of the anchor node is labeled V.
+        """
+        vertical = 0
+        horizontal = 0
+        orientation = dict()
+        free = []
+        for (i, component) in enumerate(components):
+            nodes = [v for v in component if v is not self.anchor]
+            ones = sum(color[v] for v in nodes)
+            zeros = len(nodes) - ones
+            if self.anchor is not None and i == 0:
+                # The anchor node is the first start of the coloring, with color 0
+                orientation[i] = 0
+                vertical += zeros
+                horizontal += ones
+            else:
+                free.append((i, zeros, ones))
+
+        # Large imbalances are compensated first
+        free.sort(key=lambda t: abs(t[1] - t[2]), reverse=True)
+        for (i, zeros, ones) in free:
+            if max(vertical + zeros, horizontal + ones) <= max(vertical + ones, horizontal + zeros):
+                orientation[i] = 0
+                vertical += zeros
+                horizontal += ones
+            else:
+                orientation[i] = 1
+                vertical += ones
+                horizontal += zeros
+
+        labeling = dict()
+        for v in removed:
+            labeling[v] = 0
+        for (i, component) in enumerate(components):
+            for v in component:
+                if v is self.anchor:
+                    continue
+                if color[v] == orientation[i]:
+                    labeling[v] = 1
+                else:
+                    labeling[v] = -1
+        return labeling
+
+    def label(self) -> Dict:
+        self.start_time = time.time()
+
+        undirected = self._get_undirected()
+        starts = [] if self.anchor is None else [self.anchor]
+
+        removed = set()
+        (color, components, bipartite) = self._color(undirected, removed, starts)
+        if bipartite:
+            config.log.add('Bipartite: True\n')
+        else:
+            config.log.add('Bipartite: False\n')
+            # Every odd cycle lies within a single block, such that only the non-bipartite blocks need VH nodes
+            for block_edges in biconnected_component_edges(undirected):
+                block = Graph(block_edges)
+                if self._color(block, removed)[2]:
+                    continue
+                if len(block.nodes) == len(block.edges) and not any(v in removed for v in block.nodes):
+                    # A non-bipartite block with as many edges as nodes is a single odd cycle
+                    removed.add(next(v for v in block.nodes if v is not self.anchor))
+                    continue
+                block.remove_nodes_from([v for v in block.nodes if v in removed])
+                removed.update(self._bipartize(block))
+            (color, components, _) = self._color(undirected, removed, starts)
+
+        self.labeling = self._orient(color, components, removed)
+
+        v, h, vh = VHLabeling.get_labels(self.labeling)
+        if h + vh > config.max_rows or v + vh > config.max_columns:
+            raise InfeasibleSolutionException("No labeling within the maximum dimensions found.")
+
+        self.stop_time = time.time()
+
+        print("Label V: " + str(v))
+        print("Label H: " + str(h))
+        print("Label VH: " + str(vh))
+
+        config.log.add("Label V: {}\n".format(v))
+        config.log.add("Label H: {}\n".format(h))
+        config.log.add("Label VH: {}\n".format(vh))
+        config.log.add(self.get_log())
+
+        return self.labeling
@@ -1,3 +1,4 @@
+import numpy as np
 from networkx import Graph
 
 from aux import config
@@ -8,32 +9,38 @@ from core.MemristorCrossbar import MemristorCrossbar
 class CrossbarMapping2D:
 
     def __init__(self, graph: Graph):
+        """
+        Maps a VH-labeling onto a crossbar in linear time.
+        Every node labeled H or VH is assigned a row, and every node labeled V or VH is assigned a column, in the order
+        of the nodes of the graph. The rows are flipped vertically, such that the first node of the graph is on the
+        last row. The positions of the memristors of all edges are computed at once with array operations, and the
+        memristors are written to the crossbar in bulk.
+        :param graph: The graph of the labeling.
+        """
         self.graph = graph
-        self.vertical = []
-        self.horizontal = []
+        self.nodes = list(graph.nodes)
+        self.vertical = None
+        self.horizontal = None
         self.crossbar = None
         self.log = ''
 
     def map(self, vh_labeling: dict):
         self._node_assignment(vh_labeling)
         self._edge_assignment()
-        self.crossbar.flip_vertical()
-        # for i in range(len(self.crossbar.output_nanowires)):
-        #     output_variable = list(self.crossbar.output_nanowires.keys())[i]
-        #     self.crossbar.swap_rows(i, self.crossbar.output_nanowires[output_variable])
         return self.crossbar
 
     def _node_assignment(self, vh_labeling):
-        for node in self.graph.nodes:
-            if vh_labeling[node] == 1:
-                self.vertical.append(node)
-            elif vh_labeling[node] == -1:
-                self.horizontal.append(node)
-            else:
-                self.vertical.append(node)
-                self.horizontal.append(node)
-        rows = len(self.horizontal)
-        columns = len(self.vertical)
+        """
+        Assigns the row (horizontal) and the column (vertical) of every node, or -1 if the node has none.
+        """
+        labels = np.array([vh_labeling[node] for node in self.nodes], dtype=np.int64)
+        horizontal = labels <= 0
+        vertical = labels >= 0
+        rows = int(np.count_nonzero(horizontal))
+        columns = int(np.count_nonzero(vertical))
+        # The vertical flip is folded into the rows, which are assigned from the last row upwards
+        self.horizontal = np.where(horizontal, rows - np.cumsum(horizontal), -1)
+        self.vertical = np.where(vertical, np.cumsum(vertical) - 1, -1)
         config.log.add('Rows: {}\n'.format(rows))
         config.log.add('Columns: {}\n'.format(columns))
         self.crossbar = MemristorCrossbar(rows, columns)
@@ -42,81 +49,45 @@ class CrossbarMapping2D:
         input_variables = set()
         input_nodes = dict()
         root_nodes = dict()
-        visited_nodes = set()
-        for node_a, node_b in self.graph.edges:
-            if not self.graph.nodes[node_a]["terminal"]:
-                input_variables.add(self.graph.nodes[node_a]["variable"])
-            if not self.graph.nodes[node_b]["terminal"]:
-                input_variables.add(self.graph.nodes[node_b]["variable"])
-            visited_nodes.add(node_a)
-            visited_nodes.add(node_b)
-            if config.io_constraints:
-                if self.graph.nodes[node_a]["terminal"]:
-                    input_variable = self.graph.nodes[node_a]["variable"]
-                    input_nodes[input_variable] = self.horizontal.index(node_a)
-                if self.graph.nodes[node_b]["terminal"]:
-                    input_variable = self.graph.nodes[node_b]["variable"]
-                    input_nodes[input_variable] = self.horizontal.index(node_b)
-                if self.graph.nodes[node_a]["root"]:
-                    output_variables = self.graph.nodes[node_a]["output_variables"]
-                    for output_variable in output_variables:
-                        root_nodes[output_variable] = self.horizontal.index(node_a)
-                if self.graph.nodes[node_b]["root"]:
-                    output_variables = self.graph.nodes[node_b]["output_variables"]
-                    for output_variable in output_variables:
-                        root_nodes[output_variable] = self.horizontal.index(node_b)
+        index = dict((node, i) for (i, node) in enumerate(self.nodes))
 
-            edge_data = self.graph.get_edge_data(node_a, node_b)
-            variable = edge_data["variable"]
-            positive = edge_data["positive"]
-            if variable is not None and positive is not None:
-                literal = Literal(variable, positive)
+        sources = []
+        targets = []
+        codes = []
+        for (node_a, node_b, d) in self.graph.edges(data=True):
+            if d.get("variable") is None or d.get("positive") is None:
+                continue
+            sources.append(index[node_a])
+            targets.append(index[node_b])
+            codes.append(self.crossbar.get_literal_code(Literal(d["variable"], d["positive"])))
+        a = np.array(sources, dtype=np.int64)
+        b = np.array(targets, dtype=np.int64)
 
-                if node_a in self.horizontal and node_a in self.vertical:
-                    if node_b in self.horizontal:
-                        r = self.horizontal.index(node_b)
-                        c = self.vertical.index(node_a)
-                    else:
-                        r = self.horizontal.index(node_a)
-                        c = self.vertical.index(node_b)
-                    self.crossbar.set_memristor(r, c, literal)
+        # An edge connects the row of one node to the column of the other node. If node a has both, its column is
+        # used unless node b has no row.
+        a_vh = (self.horizontal[a] >= 0) & (self.vertical[a] >= 0)
+        a_row = np.where(a_vh, self.horizontal[b] < 0, self.horizontal[a] >= 0)
+        r = np.where(a_row, self.horizontal[a], self.horizontal[b])
+        c = np.where(a_row, self.vertical[b], self.vertical[a])
+        self.crossbar.set_memristors(r, c, np.array(codes, dtype=np.int64))
 
-                    r = self.horizontal.index(node_a)
-                    c = self.vertical.index(node_a)
-                    self.crossbar.set_memristor(r, c, Literal('True', True))
-                elif node_b in self.horizontal and node_b in self.vertical:
-                    if node_a in self.horizontal:
-                        r = self.horizontal.index(node_a)
-                        c = self.vertical.index(node_b)
-                    else:
-                        r = self.horizontal.index(node_b)
-                        c = self.vertical.index(node_a)
-                    self.crossbar.set_memristor(r, c, literal)
+        # The row and the column of a node labeled VH are connected
+        vh = np.flatnonzero((self.horizontal >= 0) & (self.vertical >= 0))
+        true_code = self.crossbar.get_literal_code(Literal('True', True))
+        self.crossbar.set_memristors(self.horizontal[vh], self.vertical[vh], np.full(len(vh), true_code))
 
-                    r = self.horizontal.index(node_b)
-                    c = self.vertical.index(node_b)
-                    self.crossbar.set_memristor(r, c, Literal('True', True))
-                elif node_a in self.horizontal and node_b in self.vertical:
-                    r = self.horizontal.index(node_a)
-                    c = self.vertical.index(node_b)
-                    self.crossbar.set_memristor(r, c, literal)
-                else:
-                    r = self.horizontal.index(node_b)
-                    c = self.vertical.index(node_a)
-                    self.crossbar.set_memristor(r, c, literal)
-
-        unvisited_nodes = set(self.graph.nodes) - visited_nodes
-
-        for node in unvisited_nodes:
-            if self.graph.nodes[node]["root"]:
-                output_variables = self.graph.nodes[node]["output_variables"]
-                for output_variable in output_variables:
-                    root_nodes[output_variable] = self.horizontal.index(node)
+        for (node, d) in self.graph.nodes(data=True):
+            connected = self.graph.degree(node) > 0
+            if not d["terminal"] and connected:
+                input_variables.add(d["variable"])
+            if config.io_constraints and d["terminal"] and connected:
+                input_nodes[d["variable"]] = int(self.horizontal[index[node]])
+            if d["root"] and (config.io_constraints or not connected):
+                for output_variable in d["output_variables"]:
+                    root_nodes[output_variable] = int(self.horizontal[index[node]])
 
         self.crossbar.input_variables = list(input_variables)
         for (input_function, nanowire) in input_nodes.items():
             self.crossbar.set_input_nanowire(input_function, nanowire)
-        # self.crossbar.input_nanowires = dict(sorted(input_nodes.items()))
         for (output_function, nanowire) in root_nodes.items():
             self.crossbar.set_output_nanowire(output_function, nanowire)
-        # self.crossbar.output_nanowires = dict(sorted(root_nodes.items()))
@@ -1,5 +1,6 @@
 import math
 
+import numpy as np
 from networkx import Graph
 
 from aux import config
@@ -17,6 +18,14 @@ class CrossbarMapping3D:
         self.crossbar = None
 
     def map(self, labeling):
+        """
+        Maps a K-labeling onto a crossbar in linear time.
+        The position of every node on the nanowires of each layer is computed once. The memristors are collected as
+        arrays of rows, columns and codes of literals per layer of memristors, which are written to the crossbar in
+        bulk.
+        :param labeling: The K-labeling (rows, columns, node assignments, edge assignments).
+        :return: The crossbar.
+        """
         input_variables = set()
         input_nodes = dict()
         root_nodes = dict()
@@ -26,58 +35,72 @@ class CrossbarMapping3D:
         node_assignment = labeling[2]
         edge_assignment = labeling[3]
 
-        q = [[] for layer in range(self.layers + 1)]
+        # The index of every node among the nanowires of each layer
+        positions = [dict() for layer in range(self.layers + 1)]
         for (node, layers) in node_assignment.items():
             for layer in layers:
-                q[layer].append(node)
+                positions[layer][node] = len(positions[layer])
 
         crossbar = MemristorCrossbar(rows, columns, layers=self.layers)
 
+        memristor_rows = [[] for layer in range(self.layers)]
+        memristor_columns = [[] for layer in range(self.layers)]
+        memristor_codes = [[] for layer in range(self.layers)]
+        codes = dict()
+
         for ((v0, v1), (l0, l1)) in edge_assignment.items():
+            l = min(l0, l1)
             if l0 % 2 == 0:
-                l = min(l0, l1)
-                r = q[l0].index(v0)
-                c = q[l1].index(v1)
+                r = positions[l0][v0]
+                c = positions[l1][v1]
             else:
-                l = min(l0, l1)
-                c = q[l0].index(v0)
-                r = q[l1].index(v1)
-            edge_data = self.graph.get_edge_data(v0, v1)
-            variable = edge_data["variable"]
-            positive = edge_data["positive"]
-            crossbar.set_memristor(r, c, Literal(variable, positive), layer=l)
+                c = positions[l0][v0]
+                r = positions[l1][v1]
+            edge_data = self.graph.adj[v0][v1]
+            key = (edge_data["variable"], edge_data["positive"])
+            if key not in codes:
+                codes[key] = crossbar.get_literal_code(Literal(*key))
+            memristor_rows[l].append(r)
+            memristor_columns[l].append(c)
+            memristor_codes[l].append(codes[key])
 
         # For each node v in layers (l, l+1), we introduce a True value.
+        true_code = crossbar.get_literal_code(Literal("True", True))
+        if config.output_layer is not None:
+            output_layer = config.output_layer
+        elif self.layers % 2 == 0:
+            output_layer = self.layers
+        else:
+            output_layer = self.layers - 1
         for (node, layers) in node_assignment.items():
-            if self.graph.nodes[node]["variable"] != '1' and self.graph.nodes[node]["variable"] != '0':
-                input_variables.add(self.graph.nodes[node]["variable"])
+            d = self.graph.nodes[node]
+            if d["variable"] != '1' and d["variable"] != '0':
+                input_variables.add(d["variable"])
 
             if config.io_constraints:
-                if self.graph.nodes[node]["terminal"]:
-                    input_variable = self.graph.nodes[node]["variable"]
-                    input_nodes[input_variable] = (0, q[0].index(node))
-                if self.graph.nodes[node]["root"]:
-                    output_variables = self.graph.nodes[node]["output_variables"]
-                    for output_variable in output_variables:
-                        if config.output_layer is not None:
-                            root_nodes[output_variable] = (config.output_layer, q[config.output_layer].index(node))
-                        else:
-                            if self.layers % 2 == 0:
-                                root_nodes[output_variable] = (self.layers, q[self.layers].index(node))
-                            else:
-                                root_nodes[output_variable] = (self.layers - 1, q[self.layers - 1].index(node))
-
-            sorted(layers)
+                if d["terminal"]:
+                    input_nodes[d["variable"]] = (0, positions[0][node])
+                if d["root"]:
+                    for output_variable in d["output_variables"]:
+                        root_nodes[output_variable] = (output_layer, positions[output_layer][node])
 
+            layers = sorted(layers)
             for i in range(len(layers) - 1):
                 l = layers[i]
                 if l % 2 == 0:
-                    r = q[l].index(node)
-                    c = q[l+1].index(node)
+                    r = positions[l][node]
+                    c = positions[l + 1][node]
                 else:
-                    c = q[l].index(node)
-                    r = q[l+1].index(node)
-                crossbar.set_memristor(r, c, Literal("True", True), layer=l)
+                    c = positions[l][node]
+                    r = positions[l + 1][node]
+                memristor_rows[l].append(r)
+                memristor_columns[l].append(c)
+                memristor_codes[l].append(true_code)
+
+        for l in range(self.layers):
+            crossbar.set_memristors(np.array(memristor_rows[l], dtype=np.int64),
+                                    np.array(memristor_columns[l], dtype=np.int64),
+                                    np.array(memristor_codes[l], dtype=np.int64), layer=l)
 
         crossbar.input_variables = list(input_variables)
         for (input_function, (layer, nanowire)) in input_nodes.items():
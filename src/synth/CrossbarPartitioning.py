@@ -0,0 +1,227 @@
+import math
+import time
+from typing import Dict, List
+
+from networkx import DiGraph, topological_sort
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.ParallelExecutor import ParallelExecutor
+from aux.UndecidedException import UndecidedException
+from core.MemristorCrossbar import MemristorCrossbar
+from synth.CrossbarMapping2D import CrossbarMapping2D
+from synth.CrossbarMapping3D import CrossbarMapping3D
+from synth.LabelingFactory import LabelingFactory
+
+
+def _map_part(part: DiGraph, layers: int, time_limit):
+    """
+    Labels and maps a single part. Defined at module level such that parts can be mapped in worker processes.
+    Returns None if the part does not fit the maximum dimensions.
+    """
+    default_time_limit = config.time_limit
+    config.time_limit = time_limit
+    try:
+        labeling = LabelingFactory.label(part, layers)
+        if config.vh_labeling:
+            crossbar_mapping = CrossbarMapping2D(part)
+        else:
+            crossbar_mapping = CrossbarMapping3D(part, layers)
+    except InfeasibleSolutionException:
+        return None
+    finally:
+        config.time_limit = default_time_limit
+    crossbar = crossbar_mapping.map(labeling)
+    if crossbar.rows > config.max_rows or crossbar.columns > config.max_columns:
+        return None
+    return crossbar
+
+
+class CrossbarPartitioning:
+
+    def __init__(self, graph: DiGraph, layers: int = 1, offset: int = 0):
+        """
+        Partitions a graph into parts whose crossbars fit the maximum dimensions config.max_rows and
+        config.max_columns.
+        The nodes are ordered by their height (the longest distance to a terminal node) and split into contiguous
+        bands, such that all edges between parts point from a later band to an earlier band.
+        Flow enters a part through its input nanowires and leaves a part through its output nanowires.
+        An edge (u, v) between two parts becomes an interconnection from the output nanowire of v in the part of v
+        to the input nanowire of a copy of v in the part of u.
+        Bands that do not fit are split in half until they fit.
+        :param graph: The graph to partition.
+        :param layers: The number of layers of memristors (only for K-labeling).
+        :param offset: The index of the first interconnection, such that interconnections of multiple graphs are
+        numbered consecutively.
+        """
+        self.graph = graph
+        self.layers = layers
+        self.offset = offset
+        self.order = []
+        self.index = dict()
+        self.crossbars = []
+        self.interconnections = []
+        self.topology = DiGraph()
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    def _order_nodes(self):
+        height = dict()
+        for v in reversed(list(topological_sort(self.graph))):
+            height[v] = max([height[c] + 1 for c in self.graph.successors(v)], default=0)
+        position = dict((v, i) for (i, v) in enumerate(self.graph.nodes))
+        self.order = sorted(self.graph.nodes, key=lambda v: (height[v], position[v]))
+        self.index = dict((v, i) for (i, v) in enumerate(self.order))
+
+    def _initial_bands(self) -> List[range]:
+        """
+        Returns an initial split in bands, based on the number of nanowires that fit in one crossbar.
+        """
+        if config.vh_labeling:
+            row_layers, column_layers = 1, 1
+        else:
+            row_layers, column_layers = self.layers // 2 + 1, (self.layers + 1) // 2
+        capacity = row_layers * config.max_rows + column_layers * config.max_columns
+        n = len(self.order)
+        k = max(1, min(n, math.ceil(n / capacity)))
+        bounds = [round(i * n / k) for i in range(k + 1)]
+        return [range(bounds[i], bounds[i + 1]) for i in range(k)]
+
+    @staticmethod
+    def _cut_name(i: int) -> str:
+        return "cut_{}".format(i)
+
+    def _build_part(self, band: range) -> DiGraph:
+        """
+        Builds the graph of a band.
+        Children outside the band are replaced by terminal nodes whose input function is named after the child.
+        Terminal children are copied as is.
+        Nodes with parents outside the band become root nodes whose output function is named after the node.
+        """
+        part = DiGraph()
+        nodes = set(self.order[i] for i in band)
+        for i in band:
+            v = self.order[i]
+            part.add_node(v, **self.graph.nodes[v])
+
+        for i in band:
+            u = self.order[i]
+            for (_, v, d) in self.graph.out_edges(u, data=True):
+                if v in nodes:
+                    part.add_edge(u, v, **d)
+                    continue
+                name = self._cut_name(self.index[v])
+                if name not in part:
+                    if self.graph.nodes[v]["terminal"]:
+                        variable = self.graph.nodes[v]["variable"]
+                    else:
+                        variable = name
+                    part.add_node(name, variable=variable, terminal=True, root=False)
+                part.add_edge(u, name, **d)
+
+            if not self.graph.nodes[u]["terminal"]:
+                if any(p not in nodes for p in self.graph.predecessors(u)):
+                    output_variables = list(self.graph.nodes[u].get("output_variables", []))
+                    output_variables.append(self._cut_name(i))
+                    part.nodes[u]["root"] = True
+                    part.nodes[u]["output_variables"] = output_variables
+        return part
+
+    def _connect(self, bands: List[range], crossbars: Dict[range, MemristorCrossbar]):
+        """
+        Replaces the cut nanowires of the crossbars by consecutively numbered interconnections.
+        """
+        band_of = dict()
+        for band in bands:
+            for i in band:
+                band_of[i] = band
+
+        for band in bands:
+            crossbar = crossbars[band]
+            input_nanowires = dict()
+            for (input_function, (layer, nanowire)) in crossbar.get_input_nanowires().items():
+                if not input_function.startswith("cut_"):
+                    input_nanowires[input_function] = (layer, nanowire)
+                    continue
+                source = crossbars[band_of[int(input_function[4:])]]
+                (source_layer, source_nanowire) = source.get_output_nanowire(input_function)
+                name = "inter_{}".format(self.offset + len(self.interconnections))
+                source.set_output_nanowire(name, source_nanowire, layer=source_layer)
+                input_nanowires[name] = (layer, nanowire)
+                self.interconnections.append(((source, source_nanowire), (crossbar, nanowire)))
+                self.topology.add_edge(source, crossbar)
+            crossbar.input_nanowires = input_nanowires
+            crossbar.input_variables = [v for v in crossbar.input_variables if not v.startswith("cut_")]
+
+        for crossbar in crossbars.values():
+            for output_function in list(crossbar.get_output_nanowires().keys()):
+                if output_function.startswith("cut_"):
+                    crossbar.output_nanowires.pop(output_function)
+
+    def partition(self) -> List[MemristorCrossbar]:
+        """
+        Partitions the graph and maps the parts onto crossbars in parallel.
+        :return: The list of crossbars, ordered from the crossbar with the terminal node to the crossbars with the
+        root nodes.
+        """
+        if not config.io_constraints:
+            raise Exception("Partitioning requires I/O constraints.")
+
+        self.start_time = time.time()
+        if config.time_limit_partition is not None:
+            deadline = self.start_time + config.time_limit_partition
+        else:
+            deadline = None
+
+        self._order_nodes()
+        bands = self._initial_bands()
+        crossbars = dict()
+        executor = ParallelExecutor()
+
+        while True:
+            pending = [band for band in bands if band not in crossbars]
+            if len(pending) == 0:
+                break
+
+            time_limit = config.time_limit
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise UndecidedException("Partitioning exceeded its time limit.")
+                if time_limit is None or remaining < time_limit:
+                    time_limit = max(1, int(remaining))
+
+            config.log.add('Partitioning: mapping {} of {} parts\n'.format(len(pending), len(bands)))
+            results = executor.map(_map_part, [(self._build_part(band), self.layers, time_limit) for band in pending])
+
+            split_bands = []
+            for (band, crossbar) in zip(pending, results):
+                if crossbar is not None:
+                    crossbars[band] = crossbar
+                    split_bands.append(band)
+                elif len(band) == 1:
+                    raise InfeasibleSolutionException("Node does not fit in a crossbar of the maximum dimensions.")
+                else:
+                    middle = band.start + len(band) // 2
+                    split_bands.extend([range(band.start, middle), range(middle, band.stop)])
+            bands = [band for band in bands if band not in pending or band in crossbars]
+            bands = sorted(set(bands).union(split_bands), key=lambda band: band.start)
+
+        self.crossbars = [crossbars[band] for band in bands]
+        self.topology.add_nodes_from(self.crossbars)
+        self._connect(bands, crossbars)
+
+        self.end_time = time.time()
+
+        self.log += 'Parts: {}\n'.format(len(self.crossbars))
+        for i in range(len(self.crossbars)):
+            self.log += 'Part {}: {} rows, {} columns\n'.format(i, self.crossbars[i].rows, self.crossbars[i].columns)
+        self.log += 'Interconnections: {}\n'.format(len(self.interconnections))
+        self.log += 'Partitioning time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        return self.crossbars
@@ -0,0 +1,118 @@
+import time
+from typing import List, Tuple
+
+from networkx import DiGraph
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from core.MemristorCrossbar import MemristorCrossbar
+from synth.COMPACT import COMPACT
+from synth.KLabeling import KLabeling
+
+
+class DesignSpaceSweep:
+
+    def __init__(self, graph: DiGraph, points: List[Tuple[int, int, int]]):
+        """
+        Maps a graph for a sequence of design points (layers, maximum rows, maximum columns).
+        The points must be ordered such that the optimal labeling of a point is feasible (after extension) for the
+        next point, i.e. by increasing number of layers or by increasing maximum dimensions.
+        Each solve starts from the labeling of the previous point, and the sweep stops as soon as the
+        semiperimeter no longer improves. The points are mapped by the same instance of COMPACT, such that the ILP
+        of a number of layers is built once and only its maximum dimensions change from point to point.
+        :param graph: The graph to map.
+        :param points: A list of tuples (layers, maximum rows, maximum columns).
+        """
+        self.graph = graph
+        self.points = points
+        self.crossbar = None
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    @staticmethod
+    def _get_output_layer(layers: int) -> int:
+        if config.output_layer is not None:
+            return config.output_layer
+        if layers % 2 == 0:
+            return layers
+        return layers - 1
+
+    def _extend(self, labeling, layers: int, new_layers: int):
+        """
+        Extends a K-labeling for the given number of layers to a K-labeling for a larger number of layers.
+        With I/O constraints, the root nodes are extended up to the new output layer.
+        """
+        if labeling is None or new_layers < layers:
+            return None
+        if layers == new_layers or not config.io_constraints:
+            return labeling
+        (_, _, node_assignments, edge_assignments) = labeling
+        output_layer = self._get_output_layer(layers)
+        new_output_layer = self._get_output_layer(new_layers)
+        extended_assignments = dict()
+        for (v, node_layers) in node_assignments.items():
+            if self.graph.nodes[v]["root"]:
+                node_layers = sorted(set(node_layers).union(range(output_layer + 1, new_output_layer + 1)))
+            extended_assignments[v] = node_layers
+        rows, columns = KLabeling.get_dimensions(extended_assignments, new_layers)
+        return rows, columns, extended_assignments, edge_assignments
+
+    def sweep(self) -> MemristorCrossbar:
+        """
+        Sweeps the design points.
+        :return: The crossbar with the smallest semiperimeter. Ties are broken in favor of the earliest point.
+        """
+        self.start_time = time.time()
+
+        default_max_rows = config.max_rows
+        default_max_columns = config.max_columns
+
+        best_semiperimeter = None
+        previous_labeling = None
+        previous_layers = None
+        compact = COMPACT()
+        try:
+            for (layers, max_rows, max_columns) in self.points:
+                config.max_rows = max_rows
+                config.max_columns = max_columns
+
+                if config.vh_labeling:
+                    initial_labeling = previous_labeling
+                else:
+                    initial_labeling = self._extend(previous_labeling, previous_layers, layers)
+
+                try:
+                    crossbar = compact.map(self.graph, layers, initial_labeling=initial_labeling)
+                except InfeasibleSolutionException:
+                    self.log += 'Sweep point: {} layers, {} rows, {} columns: infeasible\n'.format(
+                        layers, max_rows, max_columns)
+                    continue
+
+                semiperimeter = crossbar.rows + crossbar.columns
+                self.log += 'Sweep point: {} layers, {} rows, {} columns: semiperimeter {}\n'.format(
+                    layers, max_rows, max_columns, semiperimeter)
+
+                previous_labeling = compact.labeling
+                previous_layers = layers
+
+                if best_semiperimeter is not None and semiperimeter >= best_semiperimeter:
+                    break
+                best_semiperimeter = semiperimeter
+                self.crossbar = crossbar
+        finally:
+            config.max_rows = default_max_rows
+            config.max_columns = default_max_columns
+
+        if self.crossbar is None:
+            raise InfeasibleSolutionException("Infeasible solution for all sweep points.")
+
+        self.end_time = time.time()
+
+        self.log += 'Sweep time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        return self.crossbar
@@ -0,0 +1,284 @@
+import math
+import time
+from typing import Dict, List
+
+from networkx import DiGraph, biconnected_component_edges, single_source_shortest_path_length
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.ParallelExecutor import ParallelExecutor
+from synth.KLabeling import KLabeling
+from synth.LabelingFactory import LabelingFactory
+from synth.SemiperimeterBounds import SemiperimeterBounds
+from synth.VHLabeling import VHLabeling
+
+
+def _label_block(block: DiGraph, layers: int, fixed: Dict = None):
+    """
+    Labels a single block. Defined at module level such that blocks can be labeled in worker processes.
+    """
+    return LabelingFactory.label(block, layers, fixed)
+
+
+class GraphDecomposition:
+
+    def __init__(self, graph: DiGraph, layers: int = 1):
+        """
+        Decomposes a graph at its cut vertices (articulation points) into blocks, labels the blocks independently,
+        and stitches the labelings of the blocks together at the shared vertices.
+        As every block is solved on its own, the stitched labeling is feasible but not necessarily optimal for the
+        complete graph. It is optimal if its value meets the combinatorial lower bound of the complete graph (see
+        SemiperimeterBounds). Otherwise, the complete graph is solved exactly, starting from the stitched labeling,
+        such that decomposition preserves optimality. Small blocks, such as the bridges of long chains, are grouped
+        until they hold at least config.min_block_size nodes.
+        :param graph: The graph to label.
+        :param layers: The number of layers of memristors (only for K-labeling).
+        """
+        self.graph = graph
+        self.layers = layers
+        self.blocks = []
+        self.resolves = 0
+        self.optimal = False
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    def decompose(self) -> List[DiGraph]:
+        """
+        Decomposes the graph into connected groups of biconnected blocks.
+        Two groups share at most the cut vertices between them.
+        :return: A list of subgraphs.
+        """
+        undirected = self.graph.to_undirected(as_view=True)
+
+        blocks = []
+        for component_edges in biconnected_component_edges(undirected):
+            edges = set()
+            for (u, v) in component_edges:
+                if self.graph.has_edge(u, v):
+                    edges.add((u, v))
+                else:
+                    edges.add((v, u))
+            nodes = set()
+            for (u, v) in edges:
+                nodes.add(u)
+                nodes.add(v)
+            blocks.append((nodes, edges))
+
+        # Isolated nodes do not belong to any biconnected component
+        for v in self.graph.nodes:
+            if undirected.degree(v) == 0:
+                blocks.append(({v}, set()))
+
+        node_to_blocks = dict()
+        for i in range(len(blocks)):
+            for v in blocks[i][0]:
+                node_to_blocks.setdefault(v, []).append(i)
+
+        # We group adjacent blocks (sharing a cut vertex) in breadth-first order
+        visited = set()
+        groups = []
+        for start in range(len(blocks)):
+            if start in visited:
+                continue
+            visited.add(start)
+            group_nodes = set(blocks[start][0])
+            group_edges = set(blocks[start][1])
+            queue = [start]
+            while len(queue) > 0 and len(group_nodes) < config.min_block_size:
+                i = queue.pop(0)
+                for v in blocks[i][0]:
+                    for j in node_to_blocks[v]:
+                        if j not in visited and len(group_nodes) < config.min_block_size:
+                            visited.add(j)
+                            group_nodes.update(blocks[j][0])
+                            group_edges.update(blocks[j][1])
+                            queue.append(j)
+            groups.append((group_nodes, group_edges))
+
+        self.blocks = []
+        for (group_nodes, group_edges) in groups:
+            block = self.graph.edge_subgraph(group_edges).copy()
+            for v in group_nodes:
+                if v not in block:
+                    block.add_node(v, **self.graph.nodes[v])
+            self.blocks.append(block)
+
+        return self.blocks
+
+    def _stitching_order(self) -> List[int]:
+        """
+        Returns the blocks in breadth-first order, such that each block (except for the first block of each
+        connected component) shares at least one vertex with a preceding block.
+        :return: A list of block indices.
+        """
+        node_to_blocks = dict()
+        for i in range(len(self.blocks)):
+            for v in self.blocks[i].nodes:
+                node_to_blocks.setdefault(v, []).append(i)
+
+        order = []
+        visited = set()
+        for start in range(len(self.blocks)):
+            if start in visited:
+                continue
+            visited.add(start)
+            queue = [start]
+            while len(queue) > 0:
+                i = queue.pop(0)
+                order.append(i)
+                for v in self.blocks[i].nodes:
+                    for j in node_to_blocks[v]:
+                        if j not in visited:
+                            visited.add(j)
+                            queue.append(j)
+        return order
+
+    def _has_io_nodes(self, block: DiGraph) -> bool:
+        if not config.io_constraints:
+            return False
+        return any(d["root"] or d["terminal"] for (_, d) in block.nodes(data=True))
+
+    def _get_assignments(self, labeling) -> Dict:
+        if config.vh_labeling:
+            return labeling
+        return dict((v, sorted(layers)) for (v, layers) in labeling[2].items())
+
+    def _agrees(self, labeling, shared: Dict) -> bool:
+        assignments = self._get_assignments(labeling)
+        return all(assignments[v] == value for (v, value) in shared.items())
+
+    def _mirror(self, block: DiGraph, labeling):
+        """
+        Returns an equivalent labeling of the given block with the roles of the layers mirrored, or None if
+        mirroring does not preserve the number of rows and columns or violates the I/O constraints.
+        For VH-labeling, labels V and H are swapped. For K-labeling, layer l becomes layer K - l, which preserves
+        the rows and columns if and only if the number of layers K is even.
+        """
+        if self._has_io_nodes(block):
+            return None
+        if config.vh_labeling:
+            return dict((v, -label) for (v, label) in labeling.items())
+        if self.layers % 2 != 0:
+            return None
+        (rows, columns, node_assignments, edge_assignments) = labeling
+        mirrored_nodes = dict((v, sorted([self.layers - l for l in layers]))
+                              for (v, layers) in node_assignments.items())
+        mirrored_edges = dict((e, (self.layers - l0, self.layers - l1))
+                              for (e, (l0, l1)) in edge_assignments.items())
+        return rows, columns, mirrored_nodes, mirrored_edges
+
+    def _resolve(self, block: DiGraph, labeling, shared: Dict):
+        """
+        Re-solves the boundary of a block such that it agrees with the given shared vertices.
+        Only the nodes within a given distance of the disagreeing shared vertices are freed,
+        the remaining nodes keep their labeling. The distance is doubled until a feasible labeling is found.
+        """
+        assignments = self._get_assignments(labeling)
+        disagreeing = [v for (v, value) in shared.items() if assignments[v] != value]
+        undirected = block.to_undirected(as_view=True)
+
+        radius = 1
+        while True:
+            window = set()
+            for v in disagreeing:
+                window.update(single_source_shortest_path_length(undirected, v, cutoff=radius).keys())
+            fixed = dict((v, value) for (v, value) in assignments.items() if v not in window)
+            fixed.update(shared)
+            self.resolves += 1
+            try:
+                return _label_block(block, self.layers, fixed)
+            except InfeasibleSolutionException:
+                if len(window) == len(block.nodes):
+                    raise
+            radius *= 2
+
+    def _get_value(self, labeling) -> float:
+        """
+        Returns the objective value of a labeling.
+        """
+        if config.vh_labeling:
+            v, h, vh = VHLabeling.get_labels(labeling)
+            s = v + h + 2 * vh
+            d = max(v + vh, h + vh)
+            return config.gamma * s + (1 - config.gamma) * d
+        (rows, columns, _, _) = labeling
+        return rows + columns
+
+    def _get_bound(self):
+        """
+        Returns the combinatorial lower bound on the objective value of the complete graph, or None if there is no
+        bound on the objective.
+        """
+        semiperimeter_bounds = SemiperimeterBounds(self.graph, self.layers)
+        if config.vh_labeling:
+            s = semiperimeter_bounds.get_vh_bound()
+            return config.gamma * s + (1 - config.gamma) * math.ceil(s / 2)
+        if config.objective != "semi":
+            return None
+        return semiperimeter_bounds.get_k_bound()
+
+    def _fits(self, labeling) -> bool:
+        if config.vh_labeling:
+            v, h, vh = VHLabeling.get_labels(labeling)
+            return h + vh <= config.max_rows and v + vh <= config.max_columns
+        (rows, columns, _, _) = labeling
+        return rows <= config.max_rows and columns <= config.max_columns
+
+    def label(self):
+        """
+        Labels the graph block by block. The blocks are labeled in parallel.
+        :return: A VH-labeling or a K-labeling of the complete graph.
+        """
+        self.start_time = time.time()
+
+        self.decompose()
+
+        executor = ParallelExecutor()
+        labelings = executor.map(_label_block, [(block, self.layers) for block in self.blocks])
+
+        assignments = dict()
+        edge_assignments = dict()
+        for i in self._stitching_order():
+            block = self.blocks[i]
+            labeling = labelings[i]
+            shared = dict((v, assignments[v]) for v in block.nodes if v in assignments)
+            if not self._agrees(labeling, shared):
+                mirrored = self._mirror(block, labeling)
+                if mirrored is not None and self._agrees(mirrored, shared):
+                    labeling = mirrored
+                else:
+                    labeling = self._resolve(block, labeling, shared)
+            assignments.update(self._get_assignments(labeling))
+            if not config.vh_labeling:
+                edge_assignments.update(labeling[3])
+
+        if config.vh_labeling:
+            labeling = assignments
+        else:
+            rows, columns = KLabeling.get_dimensions(assignments, self.layers)
+            labeling = (rows, columns, assignments, edge_assignments)
+
+        value = self._get_value(labeling)
+        bound = self._get_bound()
+        self.optimal = bound is not None and value <= bound + 1e-6 and self._fits(labeling)
+
+        self.end_time = time.time()
+
+        self.log += 'Blocks: {}\n'.format(len(self.blocks))
+        self.log += 'Largest block (nodes): {}\n'.format(max(len(block.nodes) for block in self.blocks))
+        self.log += 'Boundary re-solves: {}\n'.format(self.resolves)
+        self.log += 'Decomposition value: {}\n'.format(value)
+        self.log += 'Decomposition lower bound: {}\n'.format(bound)
+        self.log += 'Decomposition optimal: {}\n'.format(self.optimal)
+        self.log += 'Decomposition time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        if self.optimal:
+            return labeling
+
+        # The stitched labeling is not proven optimal, such that the complete graph is solved from it
+        return LabelingFactory.label(self.graph, self.layers, initial_labeling=labeling)
@@ -1,10 +1,10 @@
-import re
 import time
 
 from networkx import Graph, bfs_successors
-from pulp import LpVariable, LpProblem, LpMinimize, LpInteger, lpSum, LpStatus, LpStatusInfeasible, CPLEX_CMD
+from pulp import LpVariable, LpProblem, LpMinimize, LpInteger, lpSum, LpStatus, LpStatusInfeasible
 
 from aux import config
+from aux.SolverFactory import SolverFactory
 from aux.InfeasibleSolutionException import InfeasibleSolutionException
 
 
@@ -113,7 +113,7 @@ class GreedyKLabeling:
 
         self.ilp_start_time = time.time()
 
-        solver = CPLEX_CMD(path=config.cplex_path, msg=False, timeLimit=config.time_limit)
+        solver = SolverFactory.get_solver()
         cmbs = [(i, i + 1) for i in range(self.layers)]
         cmbs.extend([(i + 1, i) for i in range(self.layers)])
 
@@ -130,7 +130,7 @@ class GreedyKLabeling:
         # The semiperimeter
         S = LpVariable("S", 0, cat=LpInteger)
 
-        lpvc = LpProblem("VC", LpMinimize)
+        lpvc = LpProblem(SolverFactory.get_problem_name("VC"), LpMinimize)
 
         if config.objective == "semi":
             lpvc += S
@@ -200,7 +200,7 @@ class GreedyKLabeling:
                 lpvc += x_vars[u][node_assignments[u] + 1] + x_vars[u][node_assignments[v] - 1] == 1
 
         lpvc.writeLP('ilp.lp')
-        lpvc.solve(solver)
+        solver_monitor = SolverFactory.solve(lpvc, solver)
 
         if lpvc.status == LpStatusInfeasible:
             raise InfeasibleSolutionException("Infeasible solution.")
@@ -245,13 +245,6 @@ class GreedyKLabeling:
 
         config.log.add(self.get_log())
 
-        gap = 0
-        cplex_log_file_name = config.root.joinpath("cplex.log")
-        if cplex_log_file_name.is_file():
-            with open(str(cplex_log_file_name), 'r') as f:
-                for line in f.readlines():
-                    if "gap" in line:
-                        gap = float(re.findall(r'(\d+\.\d+)\%', line)[0])
-        config.log.add("Gap (%): {}\n".format(gap))
+        config.log.add("Gap (%): {}\n".format(solver_monitor.get_gap()))
 
         return self.labeling
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from networkx import DiGraph, topological_sort
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from synth.KLabeling import KLabeling
+from synth.VHLabeling import VHLabeling
+
+
+class IncrementalLabeling:
+
+    def __init__(self, graph: DiGraph, layers: int = 1, radius: int = None):
+        """
+        Labels a graph incrementally (engineering change order), from the labeling of a previous version of the graph
+        that is stored in the directory config.eco_path.
+        Every node is identified by a structural signature: a hash of its variable, its root and terminal flags and
+        the signatures of its children. As BDDs are canonical, an unchanged sub-function has the same signature in both
+        versions, even if the names of the nodes differ.
+        - The nodes of which the signature is in the previous labeling keep their previous labels.
+        - The new nodes and the nodes up to the given radius around them are freed, as well as the nodes of new edges
+        whose previous labels are not compatible.
+        - Only the freed nodes are labeled by the solver, where the other nodes are fixed and the solver starts from
+        the previous labels of the freed nodes. For K-labeling, the ILP is restricted to the freed nodes and their
+        neighbors, and the nanowires of the other nodes are counted as offsets (as in LargeNeighborhoodSearch).
+        If the freed nodes cannot be labeled, the complete graph is labeled, starting from the same labeling.
+        If there is no previous labeling, the graph is labeled as usual, and the labeling is stored with put.
+        :param graph: The graph to label.
+        :param layers: The number of layers of memristors (only for K-labeling).
+        :param radius: The distance around the new nodes up to which nodes are freed. By default, config.eco_radius
+        is used.
+        """
+        self.graph = graph
+        self.layers = layers
+        if radius is None:
+            radius = config.eco_radius
+        self.radius = radius
+        if config.vh_labeling:
+            self.method = "vh"
+        else:
+            self.method = "k"
+        self.path = Path(config.eco_path)
+        self.signatures = self.get_signatures()
+        self.previous = None
+        self.matched_nodes = 0
+        self.free_nodes = set()
+        self.fallback = False
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    def get_signatures(self) -> Dict:
+        """
+        Returns the structural signature of every node, from the terminal nodes up to the root nodes.
+        """
+        signatures = dict()
+        for v in reversed(list(topological_sort(self.graph))):
+            d = self.graph.nodes[v]
+            children = sorted([bool(self.graph.edges[v, w].get("positive")), signatures[w]]
+                              for w in self.graph.successors(v))
+            content = json.dumps([str(d.get("variable")), bool(d.get("terminal")), bool(d.get("root")),
+                                  sorted(d.get("output_variables", [])), children])
+            signatures[v] = hashlib.sha1(content.encode()).hexdigest()[:20]
+        return signatures
+
+    def _get_outputs(self) -> List[str]:
+        outputs = []
+        for (_, d) in self.graph.nodes(data=True):
+            if d["root"]:
+                outputs.extend(d.get("output_variables", []))
+        return sorted(outputs)
+
+    def _get_file_path(self) -> Path:
+        content = json.dumps([self.method, self.layers, self._get_outputs()])
+        return self.path.joinpath("{}.json".format(hashlib.sha256(content.encode()).hexdigest()))
+
+    @staticmethod
+    def _read(file_path: Path):
+        try:
+            with open(file_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def has_previous(self) -> bool:
+        """
+        Looks up the previous labeling of the outputs of the graph. If the outputs were not labeled before, the
+        previous labeling with the most nodes in common is used among the labelings that share an output with the
+        graph and that match a majority of its nodes. Otherwise, the labeling of another output or benchmark could be
+        reused only because of a few common nodes, e.g. the terminal nodes.
+        :return: True if and only if there is a previous labeling to start from.
+        """
+        if self.previous is None:
+            self.previous = self._get_previous()
+        return self.previous is not None
+
+    def _get_previous(self):
+        entry = self._read(self._get_file_path())
+        if entry is not None:
+            return entry
+        if not self.path.is_dir():
+            return None
+        outputs = set(self._get_outputs())
+        best_entry = None
+        best_matches = len(self.signatures) // 2
+        for file_path in self.path.glob("*.json"):
+            entry = self._read(file_path)
+            if entry is None or entry["method"] != self.method or entry["layers"] != self.layers:
+                continue
+            if outputs.isdisjoint(entry["outputs"]):
+                continue
+            matches = len([s for s in self.signatures.values() if s in entry["nodes"]])
+            if matches > best_matches:
+                best_entry = entry
+                best_matches = matches
+        return best_entry
+
+    def put(self, labeling):
+        """
+        Stores the labeling as the previous labeling of the outputs of the graph.
+        """
+        if self.method == "vh":
+            nodes = dict((self.signatures[v], label) for (v, label) in labeling.items())
+            edges = []
+        else:
+            (_, _, node_assignments, edge_assignments) = labeling
+            nodes = dict((self.signatures[v], layers) for (v, layers) in node_assignments.items())
+            edges = [[self.signatures[u], self.signatures[v], l0, l1]
+                     for ((u, v), (l0, l1)) in edge_assignments.items()]
+        entry = {
+            "method": self.method,
+            "layers": self.layers,
+            "outputs": self._get_outputs(),
+            "nodes": nodes,
+            "edges": edges
+        }
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        # The file is replaced atomically, such that concurrent processes never read a partial entry
+        (fd, temporary_path) = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temporary_path, self._get_file_path())
+
+    def _get_neighbors(self, v) -> List:
+        return list(self.graph.predecessors(v)) + list(self.graph.successors(v))
+
+    def _expand(self, nodes: set) -> set:
+        """
+        Returns the nodes up to the radius around the given nodes.
+        """
+        region = set(nodes)
+        frontier = set(nodes)
+        for _ in range(self.radius):
+            frontier = set(w for v in frontier for w in self._get_neighbors(v) if w not in region)
+            region.update(frontier)
+        return region
+
+    @staticmethod
+    def _get_edge_assignment(u_layers: List[int], v_layers: List[int]):
+        for l in u_layers:
+            if l + 1 in v_layers:
+                return l, l + 1
+            if l - 1 in v_layers:
+                return l, l - 1
+        return None
+
+    def _label_k(self, previous: Dict):
+        previous_edges = dict(((u, v), (l0, l1)) for (u, v, l0, l1) in previous["edges"])
+        node_assignments = dict()
+        new_nodes = set()
+        for v in self.graph.nodes:
+            if self.signatures[v] in previous["nodes"]:
+                node_assignments[v] = previous["nodes"][self.signatures[v]]
+            else:
+                new_nodes.add(v)
+        self.matched_nodes = len(node_assignments)
+
+        # The nodes of a new edge without a memristor between their previous layers are freed as well
+        conflicts = set()
+        for (u, v) in self.graph.edges:
+            if u in node_assignments and v in node_assignments and \
+                    self._get_edge_assignment(node_assignments[u], node_assignments[v]) is None:
+                conflicts.update([u, v])
+        self.free_nodes = self._expand(new_nodes | conflicts)
+
+        # A new node spans all layers, such that it connects to every neighbor
+        for v in new_nodes:
+            node_assignments[v] = list(range(self.layers + 1))
+        for v in self.free_nodes:
+            for w in self._get_neighbors(v):
+                if self._get_edge_assignment(node_assignments[v], node_assignments[w]) is None:
+                    node_assignments[v] = list(range(self.layers + 1))
+                    if w in self.free_nodes:
+                        node_assignments[w] = list(range(self.layers + 1))
+
+        edge_assignments = dict()
+        for (u, v) in self.graph.edges:
+            edge_layers = previous_edges.get((self.signatures[u], self.signatures[v]))
+            if edge_layers is None or edge_layers[0] not in node_assignments[u] or \
+                    edge_layers[1] not in node_assignments[v]:
+                edge_layers = self._get_edge_assignment(node_assignments[u], node_assignments[v])
+            edge_assignments[(u, v)] = tuple(edge_layers)
+        rows, columns = KLabeling.get_dimensions(node_assignments, self.layers)
+        labeling = (rows, columns, node_assignments, edge_assignments)
+
+        if len(self.free_nodes) == 0:
+            return labeling
+
+        boundary = set()
+        for v in self.free_nodes:
+            boundary.update(w for w in self._get_neighbors(v) if w not in self.free_nodes)
+        subgraph = self.graph.subgraph(self.free_nodes | boundary).copy()
+        fixed = dict((v, node_assignments[v]) for v in boundary)
+        offsets = [0 for _ in range(self.layers + 1)]
+        for (v, node_layers) in node_assignments.items():
+            if v not in subgraph:
+                for l in node_layers:
+                    offsets[l] += 1
+        initial_labeling = (rows, columns,
+                            dict((v, node_assignments[v]) for v in subgraph.nodes),
+                            dict((e, edge_assignments[e]) for e in subgraph.edges))
+
+        try:
+            k_labeling = KLabeling(subgraph, self.layers, fixed_assignments=fixed, initial_labeling=initial_labeling,
+                                   layer_offsets=offsets)
+            (_, _, region_node_assignments, region_edge_assignments) = k_labeling.label()
+        except InfeasibleSolutionException:
+            # The fixed nodes leave no room for the freed nodes
+            self.fallback = True
+            k_labeling = KLabeling(self.graph, self.layers, initial_labeling=labeling)
+            return k_labeling.label()
+
+        node_assignments.update(region_node_assignments)
+        edge_assignments.update(region_edge_assignments)
+        rows, columns = KLabeling.get_dimensions(node_assignments, self.layers)
+        return rows, columns, node_assignments, edge_assignments
+
+    def _label_vh(self, previous: Dict):
+        labeling = dict()
+        new_nodes = set()
+        for v in self.graph.nodes:
+            if self.signatures[v] in previous["nodes"]:
+                labeling[v] = previous["nodes"][self.signatures[v]]
+            else:
+                new_nodes.add(v)
+        self.matched_nodes = len(labeling)
+
+        # The nodes of a new edge between two nodes that were both labeled V or both labeled H are freed as well
+        conflicts = set()
+        for (u, v) in self.graph.edges:
+            if labeling.get(u, 0) != 0 and labeling.get(u) == labeling.get(v):
+                conflicts.update([u, v])
+        self.free_nodes = self._expand(new_nodes | conflicts)
+
+        # A new node is labeled VH, such that it connects to every neighbor
+        for v in new_nodes:
+            labeling[v] = 0
+        for (u, v) in self.graph.edges:
+            if labeling[u] != 0 and labeling[u] == labeling[v]:
+                labeling[u] = 0
+                labeling[v] = 0
+
+        if len(self.free_nodes) == 0:
+            return labeling
+
+        # The maximum dimension couples all nodes, such that the complete graph is labeled with the other nodes fixed
+        fixed_labeling = dict((v, label) for (v, label) in labeling.items() if v not in self.free_nodes)
+        try:
+            vh_labeling = VHLabeling(self.graph, fixed_labeling=fixed_labeling, initial_labeling=labeling)
+            return vh_labeling.label()
+        except InfeasibleSolutionException:
+            # The fixed nodes leave no room for the freed nodes
+            self.fallback = True
+            vh_labeling = VHLabeling(self.graph, initial_labeling=labeling)
+            return vh_labeling.label()
+
+    def label(self):
+        """
+        Labels the graph from the previous labeling, and stores the new labeling.
+        :return: The labeling of the graph.
+        """
+        self.start_time = time.time()
+        if not self.has_previous():
+            raise Exception("No previous labeling found.")
+
+        if config.vh_labeling:
+            labeling = self._label_vh(self.previous)
+        else:
+            labeling = self._label_k(self.previous)
+
+        self.put(labeling)
+        self.end_time = time.time()
+
+        self.log += 'ECO matched nodes: {}\n'.format(self.matched_nodes)
+        self.log += 'ECO new nodes: {}\n'.format(len(self.graph.nodes) - self.matched_nodes)
+        self.log += 'ECO freed nodes: {}\n'.format(len(self.free_nodes))
+        self.log += 'ECO fallback: {}\n'.format(self.fallback)
+        self.log += 'ECO time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        return labeling
@@ -1,19 +1,45 @@
-import re
 import time
+from typing import Dict, List
 
 from networkx import Graph
-from pulp import LpVariable, LpProblem, LpMinimize, LpInteger, lpSum, LpStatus, LpStatusInfeasible, CPLEX_CMD
+from pulp import LpVariable, LpProblem, LpMinimize, LpInteger, lpSum, LpStatus
 
 from aux import config
+from aux.SolverFactory import SolverFactory
 from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.LabelingCache import LabelingCache
+from synth.SemiperimeterBounds import SemiperimeterBounds
 
 
 class KLabeling:
 
-    def __init__(self, g: Graph, layers: int = 1):
+    def __init__(self, g: Graph, layers: int = 1, fixed_assignments: Dict[object, List[int]] = None,
+                 initial_labeling=None, layer_offsets: List[int] = None):
+        """
+        :param g: The graph to label.
+        :param layers: The number of layers of memristors.
+        :param fixed_assignments: Optionally, a dictionary from nodes to the layers of nanowires these nodes must be
+        assigned to.
+        :param initial_labeling: Optionally, a feasible K-labeling (rows, columns, node assignments, edge assignments)
+        the solver starts from.
+        :param layer_offsets: Optionally, the number of nanowires in each layer that are used by nodes outside the
+        graph, e.g. when a part of a larger graph is labeled (only for label).
+        """
         self.g = g
         self.layers = layers
+        if fixed_assignments is None:
+            self.fixed_assignments = dict()
+        else:
+            self.fixed_assignments = fixed_assignments
+        self.initial_labeling = initial_labeling
+        if layer_offsets is None:
+            self.layer_offsets = [0 for _ in range(layers + 1)]
+        else:
+            self.layer_offsets = layer_offsets
         self.labeling = dict()
+        # The ILP of label, which is built once and reused by the next calls
+        self.problem = None
+        self.variables = None
         self.start_time = None
         self.end_time = None
         self.log = ""
@@ -21,14 +47,117 @@ class KLabeling:
     def get_log(self) -> str:
         return self.log
 
+    @staticmethod
+    def get_dimensions(node_assignments: Dict[object, List[int]], layers: int):
+        """
+        Returns the number of rows and columns of the crossbar for the given node assignments.
+        Even layers of nanowires are rows, odd layers of nanowires are columns.
+        :param node_assignments: A dictionary from nodes to the layers of nanowires they are assigned to.
+        :param layers: The number of layers of memristors.
+        :return: A tuple (rows, columns).
+        """
+        bucket = [0 for _ in range(layers + 1)]
+        for node_layers in node_assignments.values():
+            for l in node_layers:
+                bucket[l] += 1
+        rows = max([bucket[l] for l in range(0, layers + 1, 2)])
+        columns = max([bucket[l] for l in range(1, layers + 1, 2)], default=0)
+        return rows, columns
+
+    @staticmethod
+    def get_trivial_labeling(g: Graph, layers: int = 1, fixed_assignments: Dict[object, List[int]] = None):
+        """
+        Returns a K-labeling that assigns every node to the layers of nanowires 0 and 1, and every edge to the
+        memristors between these layers. With I/O constraints, the root and terminal nodes are extended up to the
+        output and input layer.
+        :param g: The graph to label.
+        :param layers: The number of layers of memristors.
+        :param fixed_assignments: Optionally, a dictionary from nodes to the layers of nanowires these nodes must be
+        assigned to.
+        :return: The K-labeling, or None if no edge assignment exists for the fixed assignments.
+        """
+        if fixed_assignments is None:
+            fixed_assignments = dict()
+        if config.output_layer is not None:
+            output_layer = config.output_layer
+        elif layers % 2 == 0:
+            output_layer = layers
+        else:
+            output_layer = layers - 1
+        if config.input_layer is not None:
+            input_layer = config.input_layer
+        else:
+            input_layer = 0
+
+        node_assignments = dict()
+        for (v, d) in g.nodes(data=True):
+            if v in fixed_assignments:
+                node_assignments[v] = sorted(fixed_assignments[v])
+                continue
+            upper = 1
+            if config.io_constraints and d["root"]:
+                upper = max(upper, output_layer)
+            elif config.io_constraints and d["terminal"]:
+                upper = max(upper, input_layer)
+            node_assignments[v] = list(range(0, upper + 1))
+
+        edge_assignments = dict()
+        for (u, v) in g.edges:
+            for l in range(layers):
+                if l in node_assignments[u] and l + 1 in node_assignments[v]:
+                    edge_assignments[(u, v)] = (l, l + 1)
+                    break
+                if l + 1 in node_assignments[u] and l in node_assignments[v]:
+                    edge_assignments[(u, v)] = (l + 1, l)
+                    break
+            else:
+                return None
+
+        rows, columns = KLabeling.get_dimensions(node_assignments, layers)
+        return rows, columns, node_assignments, edge_assignments
+
+    def _label_fallback(self):
+        """
+        In anytime mode, falls back to the initial labeling or else the trivial labeling if the solver found no
+        solution.
+        """
+        if self.initial_labeling is not None:
+            labeling = self.initial_labeling
+        else:
+            labeling = KLabeling.get_trivial_labeling(self.g, self.layers, self.fixed_assignments)
+        if labeling is None or labeling[0] > config.max_rows or labeling[1] > config.max_columns:
+            raise InfeasibleSolutionException("No solution found.")
+
+        self.end_time = time.time()
+
+        (rows, columns, _, _) = labeling
+        self.log += 'ILP time (s): {}\n'.format(self.end_time - self.start_time)
+        self.log += 'Rows: {}\n'.format(rows)
+        self.log += 'Columns: {}\n'.format(columns)
+        config.log.add('Anytime: fallback labeling\n')
+        config.log.add(self.get_log())
+
+        self.labeling = labeling
+        return self.labeling
+
     def label_alt(self):
         print("Number of nodes: {}".format(len(self.g.nodes)))
         print("Number of edges: {}".format(len(self.g.edges)))
         print("Layers: {}".format(self.layers))
 
+        # Labelings with fixed assignments or layer offsets are never cached
+        use_cache = config.cache and len(self.fixed_assignments) == 0 and not any(self.layer_offsets)
+        if use_cache:
+            labeling_cache = LabelingCache("k-alt", self.layers)
+            labeling = labeling_cache.get(self.g)
+            if labeling is not None:
+                config.log.add('Cache: hit\n')
+                self.labeling = labeling
+                return self.labeling
+
         self.start_time = time.time()
 
-        solver = CPLEX_CMD(path=config.cplex_path, msg=False, keepFiles=config.keep_files, timeLimit=config.time_limit)
+        solver = SolverFactory.get_solver(warm_start=self.initial_labeling is not None)
         cmbs = [(i, i + 1) for i in range(self.layers)]
         cmbs.extend([(i + 1, i) for i in range(self.layers)])
 
@@ -44,7 +173,7 @@ class KLabeling:
         # The semiperimeter
         S = LpVariable("S", 0, cat=LpInteger)
 
-        lpvc = LpProblem("VC", LpMinimize)
+        lpvc = LpProblem(SolverFactory.get_problem_name("VC"), LpMinimize)
 
         if config.objective == "semi":
             lpvc += S
@@ -52,6 +181,13 @@ class KLabeling:
             lpvc += 1
         lpvc += lpSum(d_vars) == S
 
+        # The solver stops as soon as the incumbent matches the lower bound
+        semiperimeter_bounds = SemiperimeterBounds(self.g, self.layers)
+        lower_bound = semiperimeter_bounds.get_assignment_bound()
+        lpvc += S >= lower_bound
+        config.log.add('Lower bound (nanowires): {}\n'.format(lower_bound))
+        config.log.add(semiperimeter_bounds.get_log())
+
         M = 10000
 
         for e in self.g.edges:
@@ -88,10 +224,23 @@ class KLabeling:
                 if d["terminal"]:
                     lpvc += x_vars[v]["l"] == 0
 
-        lpvc.solve(solver)
+        for (v, layers) in self.fixed_assignments.items():
+            lpvc += x_vars[v]["l"] == min(layers) + 1
+            lpvc += x_vars[v]["u"] == max(layers) + 1
+
+        if self.initial_labeling is not None:
+            (_, _, node_assignments, edge_assignments) = self.initial_labeling
+            for v in self.g.nodes:
+                x_vars[v]["l"].setInitialValue(min(node_assignments[v]) + 1)
+                x_vars[v]["u"].setInitialValue(max(node_assignments[v]) + 1)
+            for e in self.g.edges:
+                for cmb in cmbs:
+                    s_vars[e][cmb].setInitialValue(int(edge_assignments[e] == cmb))
 
-        if lpvc.status == LpStatusInfeasible:
-            raise InfeasibleSolutionException("Infeasible solution.")
+        solver_monitor = SolverFactory.solve(lpvc, solver)
+
+        if not SolverFactory.has_solution(lpvc, solver_monitor):
+            return self._label_fallback()
 
         self.end_time = time.time()
 
@@ -150,18 +299,16 @@ class KLabeling:
 
         config.log.add(self.get_log())
 
-        return self.labeling
+        if use_cache and SolverFactory.is_optimal(lpvc, solver_monitor):
+            labeling_cache.put(self.g, self.labeling)
 
-    def label(self):
-        print("Number of nodes: {}".format(len(self.g.nodes)))
-        print("Number of edges: {}".format(len(self.g.edges)))
-        print("Layers: {}".format(self.layers))
-
-        self.start_time = time.time()
-
-        solver = CPLEX_CMD(path=config.cplex_path, msg=False, keepFiles=config.keep_files, timeLimit=config.time_limit,
-                           logPath=str(config.root.joinpath("cplex.log")))
+        return self.labeling
 
+    def _build_problem(self):
+        """
+        Builds the ILP of label. The maximum dimensions are set by label, such that the ILP can be reused for other
+        maximum dimensions.
+        """
         cmbs = [(i, i + 1) for i in range(self.layers)]
         cmbs.extend([(i + 1, i) for i in range(self.layers)])
 
@@ -178,7 +325,7 @@ class KLabeling:
         # The semiperimeter
         S = LpVariable("S", 0, cat=LpInteger)
 
-        lpvc = LpProblem("VC", LpMinimize)
+        lpvc = LpProblem(SolverFactory.get_problem_name("VC"), LpMinimize)
 
         if config.objective == "semi":
             lpvc += S
@@ -186,6 +333,13 @@ class KLabeling:
             lpvc += 1
         lpvc += S == r + c
 
+        # The solver stops as soon as the incumbent matches the lower bound
+        semiperimeter_bounds = SemiperimeterBounds(self.g, self.layers)
+        lower_bound = semiperimeter_bounds.get_k_bound()
+        lpvc += S >= lower_bound
+        config.log.add('Lower bound (semiperimeter): {}\n'.format(lower_bound))
+        config.log.add(semiperimeter_bounds.get_log())
+
         for e in self.g.edges:
             for l in [i for i in range(self.layers)]:
                 lpvc += lpSum(x_vars[e[0]][l] + x_vars[e[1]][l+1]) >= 2 * s_vars[e][(l, l + 1)]
@@ -200,12 +354,15 @@ class KLabeling:
                     lpvc += 10000*(1-(x_vars[v][l1] + x_vars[v][l2] - 1)) + d_vars[v] >= l2 - l1 + 1
 
         for l in range(self.layers + 1):
+            offset = self.layer_offsets[l]
             if l % 2 == 0:
-                lpvc += lpSum([x_vars[v][l] for v in self.g.nodes]) <= r
-                lpvc += lpSum([x_vars[v][l] for v in self.g.nodes]) <= config.max_rows
+                lpvc += lpSum([x_vars[v][l] for v in self.g.nodes]) + offset <= r
+                lpvc += (lpSum([x_vars[v][l] for v in self.g.nodes]) <= config.max_rows - offset,
+                         "max_{}".format(l))
             else:
-                lpvc += lpSum([x_vars[v][l] for v in self.g.nodes]) <= c
-                lpvc += lpSum([x_vars[v][l] for v in self.g.nodes]) <= config.max_columns
+                lpvc += lpSum([x_vars[v][l] for v in self.g.nodes]) + offset <= c
+                lpvc += (lpSum([x_vars[v][l] for v in self.g.nodes]) <= config.max_columns - offset,
+                         "max_{}".format(l))
 
         # Required constraint: root node and leaf node must be given a label V
         if config.io_constraints:
@@ -224,11 +381,62 @@ class KLabeling:
                     else:
                         lpvc += x_vars[v][0] == 1
 
+        for (v, layers) in self.fixed_assignments.items():
+            for l in range(self.layers + 1):
+                lpvc += x_vars[v][l] == int(l in layers)
+
+        self.problem = lpvc
+        self.variables = (cmbs, x_vars, s_vars, S)
+
+    def label(self):
+        print("Number of nodes: {}".format(len(self.g.nodes)))
+        print("Number of edges: {}".format(len(self.g.edges)))
+        print("Layers: {}".format(self.layers))
+
+        # Labelings with fixed assignments or layer offsets are never cached
+        use_cache = config.cache and len(self.fixed_assignments) == 0 and not any(self.layer_offsets)
+        if use_cache:
+            labeling_cache = LabelingCache("k", self.layers)
+            labeling = labeling_cache.get(self.g)
+            if labeling is not None:
+                config.log.add('Cache: hit\n')
+                self.labeling = labeling
+                return self.labeling
+
+        self.start_time = time.time()
+        self.log = ''
+
+        solver = SolverFactory.get_solver(warm_start=self.initial_labeling is not None)
+
+        # The ILP is built once, such that labeling the graph again (e.g. in a sweep) only changes the maximum
+        # dimensions
+        if self.problem is None:
+            self._build_problem()
+        lpvc = self.problem
+        (cmbs, x_vars, s_vars, S) = self.variables
+        for l in range(self.layers + 1):
+            if l % 2 == 0:
+                lpvc.constraints["max_{}".format(l)].changeRHS(config.max_rows - self.layer_offsets[l])
+            else:
+                lpvc.constraints["max_{}".format(l)].changeRHS(config.max_columns - self.layer_offsets[l])
+        # The values of a previous solve are not part of the initial labeling
+        for variable in lpvc.variables():
+            variable.varValue = None
+
+        if self.initial_labeling is not None:
+            (_, _, node_assignments, edge_assignments) = self.initial_labeling
+            for v in self.g.nodes:
+                for l in range(self.layers + 1):
+                    x_vars[v][l].setInitialValue(int(l in node_assignments[v]))
+            for e in self.g.edges:
+                for cmb in cmbs:
+                    s_vars[e][cmb].setInitialValue(int(edge_assignments[e] == cmb))
+
         # lpvc.writeLP('ilp.lp')
-        lpvc.solve(solver)
+        solver_monitor = SolverFactory.solve(lpvc, solver)
 
-        if lpvc.status == LpStatusInfeasible:
-            raise InfeasibleSolutionException("Infeasible solution.")
+        if not SolverFactory.has_solution(lpvc, solver_monitor):
+            return self._label_fallback()
 
         self.end_time = time.time()
 
@@ -269,13 +477,9 @@ class KLabeling:
 
         config.log.add(self.get_log())
 
-        gap = 0
-        cplex_log_file_name = config.root.joinpath("cplex.log")
-        if cplex_log_file_name.is_file():
-            with open(str(cplex_log_file_name), 'r') as f:
-                for line in f.readlines():
-                    if "gap" in line:
-                        gap = float(re.findall(r'(\d+\.\d+)\%', line)[0])
-        config.log.add("Gap (%): {}\n".format(gap))
+        config.log.add("Gap (%): {}\n".format(solver_monitor.get_gap()))
+
+        if use_cache and SolverFactory.is_optimal(lpvc, solver_monitor):
+            labeling_cache.put(self.g, self.labeling)
 
         return self.labeling
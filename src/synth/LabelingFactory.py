@@ -0,0 +1,53 @@
+from typing import Dict, List
+
+from networkx import Graph
+
+from aux import config
+from synth.BranchAndBoundKLabeling import BranchAndBoundKLabeling
+from synth.CombinatorialVHLabeling import CombinatorialVHLabeling
+from synth.KLabeling import KLabeling
+from synth.VHLabeling import VHLabeling
+from synth.Z3KLabeling import Z3KLabeling
+
+
+class LabelingFactory:
+    """
+    Creates the labeling methods for the labeling and the solver of the config: VH-labeling with the ILP or the
+    combinatorial solver (config.combinatorial), or K-labeling with the ILP (config.solver = "cplex" or "cbc"), the
+    pseudo-Boolean solver of z3 (config.solver = "z3") or the branch-and-bound search (config.solver = "bb").
+    """
+
+    @staticmethod
+    def get_k_labeling(graph: Graph, layers: int = 1, fixed_assignments: Dict[object, List[int]] = None,
+                       initial_labeling=None):
+        """
+        Returns the K-labeling method of the solver of the config.
+        """
+        if config.solver == "z3":
+            return Z3KLabeling(graph, layers, fixed_assignments=fixed_assignments, initial_labeling=initial_labeling)
+        if config.solver == "bb":
+            return BranchAndBoundKLabeling(graph, layers, fixed_assignments=fixed_assignments,
+                                           initial_labeling=initial_labeling)
+        return KLabeling(graph, layers, fixed_assignments=fixed_assignments, initial_labeling=initial_labeling)
+
+    @staticmethod
+    def label(graph: Graph, layers: int = 1, fixed=None, initial_labeling=None):
+        """
+        Labels the graph with the labeling method of the config.
+        :param graph: The graph to label.
+        :param layers: The number of layers of memristors (only for K-labeling).
+        :param fixed: Optionally, the fixed labels (VH-labeling) or the fixed assignments (K-labeling) of nodes.
+        :param initial_labeling: Optionally, a feasible labeling the solver starts from.
+        :return: A VH-labeling or a K-labeling.
+        """
+        if config.vh_labeling:
+            # The combinatorial solver cannot fix labels
+            if config.combinatorial and not fixed:
+                return CombinatorialVHLabeling(graph).label()
+            if config.solver in ["z3", "bb"]:
+                raise Exception("The {} backend only supports K-labeling.".format(config.solver))
+            return VHLabeling(graph, fixed_labeling=fixed, initial_labeling=initial_labeling).label()
+        k_labeling = LabelingFactory.get_k_labeling(graph, layers, fixed, initial_labeling)
+        if config.alt_labeling and isinstance(k_labeling, KLabeling):
+            return k_labeling.label_alt()
+        return k_labeling.label()
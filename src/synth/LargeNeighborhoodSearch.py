@@ -0,0 +1,239 @@
+import random
+import time
+from typing import Dict, List
+
+from networkx import DiGraph
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.Log import Log
+from aux.ParallelExecutor import ParallelExecutor
+from synth.KLabeling import KLabeling
+from synth.SemiperimeterBounds import SemiperimeterBounds
+
+
+def _solve_window(graph: DiGraph, layers: int, fixed: Dict, offsets: List[int], initial_labeling):
+    """
+    Labels a single window. Defined at module level such that windows can be labeled in worker processes.
+    :return: The K-labeling of the window, or None if the solver found no labeling.
+    """
+    # The logs of the many small problems are not kept
+    log = config.log
+    config.log = Log()
+    try:
+        k_labeling = KLabeling(graph, layers, fixed_assignments=fixed, initial_labeling=initial_labeling,
+                               layer_offsets=offsets)
+        return k_labeling.label()
+    except InfeasibleSolutionException:
+        return None
+    finally:
+        config.log = log
+
+
+class LargeNeighborhoodSearch:
+
+    def __init__(self, graph: DiGraph, layers: int, labeling, window_size: int = None, time_limit: float = 10,
+                 patience: int = 8, seed: int = 0):
+        """
+        Improves a K-labeling by a large neighborhood search.
+        In every round, a window of nodes is freed and the rest of the labeling is fixed. The window is either a band
+        of consecutive levels (the distance from the root nodes) or a ball around a random node. The ILP of the window
+        and its neighbors is solved exactly, where the neighbors keep their layers and the nanowires used by the
+        other nodes are counted as offsets, such that the semiperimeter of the ILP is the semiperimeter of the
+        complete labeling. A new labeling is only accepted if its semiperimeter is smaller.
+        With config.jobs > 1, windows that are not adjacent to each other are solved in parallel.
+        If several rounds in a row do not improve the labeling, the windows double in size. A window of the complete
+        graph is solved with the remaining time budget. The search stops as soon as the time budget (config.lns_time)
+        runs out, the semiperimeter matches the lower bound, or a window of the complete graph does not improve the
+        labeling.
+        :param graph: The graph of the labeling.
+        :param layers: The number of layers of memristors.
+        :param labeling: A feasible K-labeling of the graph.
+        :param window_size: The initial number of nodes of a window. By default, config.lns_window is used.
+        :param time_limit: The time limit in seconds of the ILP of a window.
+        :param patience: The number of rounds without improvement after which the windows grow.
+        :param seed: The seed for the choice of the windows.
+        """
+        self.graph = graph
+        self.layers = layers
+        self.labeling = labeling
+        if window_size is None:
+            window_size = config.lns_window
+        self.window_size = max(1, window_size)
+        self.time_limit = time_limit
+        self.patience = patience
+        self.random = random.Random(seed)
+        self.nodes = list(graph.nodes)
+        self.depths = None
+        self.rounds = 0
+        self.improvements = 0
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    def _get_neighbors(self, v) -> List:
+        return list(self.graph.predecessors(v)) + list(self.graph.successors(v))
+
+    def _get_depths(self) -> Dict:
+        """
+        Returns the distance of every node from the nearest root node, regardless of the direction of the edges.
+        """
+        roots = [v for (v, d) in self.graph.nodes(data=True) if d["root"]]
+        depths = dict()
+        queue = []
+        for v in roots + self.nodes:
+            if v in depths:
+                continue
+            depths[v] = 0
+            queue.append(v)
+            i = len(queue) - 1
+            while i < len(queue):
+                u = queue[i]
+                i += 1
+                for w in self._get_neighbors(u):
+                    if w not in depths:
+                        depths[w] = depths[u] + 1
+                        queue.append(w)
+        return depths
+
+    def _get_band(self) -> set:
+        order = sorted(self.nodes, key=lambda v: self.depths[v])
+        start = self.random.randrange(max(1, len(order) - self.window_size + 1))
+        return set(order[start:start + self.window_size])
+
+    def _get_ball(self) -> set:
+        center = self.random.choice(self.nodes)
+        window = {center}
+        queue = [center]
+        i = 0
+        while i < len(queue) and len(window) < self.window_size:
+            for w in self._get_neighbors(queue[i]):
+                if w not in window and len(window) < self.window_size:
+                    window.add(w)
+                    queue.append(w)
+            i += 1
+        return window
+
+    def _get_windows(self) -> List[set]:
+        """
+        Returns at most config.jobs windows, such that no window contains or is adjacent to a node of another window.
+        """
+        if self.window_size >= len(self.nodes):
+            return [set(self.nodes)]
+        jobs = max(1, config.jobs)
+        windows = []
+        closed = set()
+        for _ in range(4 * jobs):
+            if len(windows) == jobs:
+                break
+            if self.random.random() < 0.5:
+                window = self._get_band()
+            else:
+                window = self._get_ball()
+            neighborhood = set(window)
+            for v in window:
+                neighborhood.update(self._get_neighbors(v))
+            if any(v in closed for v in neighborhood):
+                continue
+            windows.append(window)
+            closed.update(neighborhood)
+        return windows
+
+    def _get_problem(self, window: set):
+        """
+        Returns the arguments of _solve_window for the given window.
+        """
+        (rows, columns, node_assignments, edge_assignments) = self.labeling
+        boundary = set()
+        for v in window:
+            boundary.update(w for w in self._get_neighbors(v) if w not in window)
+        subgraph = self.graph.subgraph(window | boundary).copy()
+
+        fixed = dict((v, node_assignments[v]) for v in boundary)
+        offsets = [0 for _ in range(self.layers + 1)]
+        for (v, node_layers) in node_assignments.items():
+            if v not in subgraph:
+                for l in node_layers:
+                    offsets[l] += 1
+
+        initial_labeling = (rows, columns,
+                            dict((v, node_assignments[v]) for v in subgraph.nodes),
+                            dict((e, edge_assignments[e]) for e in subgraph.edges))
+        return subgraph, self.layers, fixed, offsets, initial_labeling
+
+    def _merge(self, window: set, labeling):
+        (_, _, node_assignments, edge_assignments) = self.labeling
+        (_, _, window_node_assignments, window_edge_assignments) = labeling
+        node_assignments = dict(node_assignments)
+        edge_assignments = dict(edge_assignments)
+        for v in window:
+            node_assignments[v] = window_node_assignments[v]
+        for ((u, v), edge_layers) in window_edge_assignments.items():
+            if u in window or v in window:
+                edge_assignments[(u, v)] = edge_layers
+        rows, columns = KLabeling.get_dimensions(node_assignments, self.layers)
+        return rows, columns, node_assignments, edge_assignments
+
+    def label(self):
+        """
+        :return: The improved K-labeling.
+        """
+        self.start_time = time.time()
+        deadline = self.start_time + config.lns_time
+
+        self.depths = self._get_depths()
+        lower_bound = SemiperimeterBounds(self.graph, self.layers).get_k_bound()
+        (rows, columns, _, _) = self.labeling
+        initial_semiperimeter = rows + columns
+
+        executor = ParallelExecutor()
+        default_time_limit = config.time_limit
+        stalled = 0
+        try:
+            while time.time() < deadline and self.labeling[0] + self.labeling[1] > lower_bound:
+                windows = self._get_windows()
+                remaining = max(1, int(deadline - time.time()))
+                if self.window_size >= len(self.nodes):
+                    config.time_limit = remaining
+                else:
+                    config.time_limit = min(self.time_limit, remaining)
+                labelings = executor.map(_solve_window, [self._get_problem(window) for window in windows])
+                self.rounds += 1
+
+                improved = False
+                for (window, labeling) in zip(windows, labelings):
+                    if labeling is None:
+                        continue
+                    # Windows that are solved in parallel are accepted one by one, as each window counts the
+                    # nanowires of the other windows as before
+                    labeling = self._merge(window, labeling)
+                    if labeling[0] + labeling[1] < self.labeling[0] + self.labeling[1]:
+                        self.labeling = labeling
+                        self.improvements += 1
+                        improved = True
+
+                if improved:
+                    stalled = 0
+                elif self.window_size >= len(self.nodes):
+                    break
+                else:
+                    stalled += 1
+                    if stalled >= self.patience:
+                        self.window_size = min(len(self.nodes), 2 * self.window_size)
+                        stalled = 0
+        finally:
+            config.time_limit = default_time_limit
+
+        self.end_time = time.time()
+
+        (rows, columns, _, _) = self.labeling
+        self.log += 'LNS rounds: {}\n'.format(self.rounds)
+        self.log += 'LNS improvements: {}\n'.format(self.improvements)
+        self.log += 'LNS semiperimeter: {} -> {}\n'.format(initial_semiperimeter, rows + columns)
+        self.log += 'LNS time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        return self.labeling
@@ -0,0 +1,181 @@
+import time
+from typing import Dict, List, Tuple
+
+from networkx import DiGraph
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.ParallelExecutor import ParallelExecutor
+from core.MemristorCrossbar import MemristorCrossbar
+from synth.CrossbarMapping2D import CrossbarMapping2D
+from synth.Presolve import Presolve
+from synth.VHLabeling import VHLabeling
+
+
+def _label_point(graph: DiGraph, gamma: float, max_rows: int, max_columns: int, initial_labeling: Dict):
+    """
+    Labels a single point of the Pareto front. Defined at module level such that points can be labeled in worker
+    processes.
+    :return: The VH-labeling, or None if the point is infeasible.
+    """
+    default_gamma = config.gamma
+    default_max_rows = config.max_rows
+    default_max_columns = config.max_columns
+    config.gamma = gamma
+    config.max_rows = max_rows
+    config.max_columns = max_columns
+    try:
+        vh_labeling = VHLabeling(graph, initial_labeling=initial_labeling)
+        return vh_labeling.label()
+    except InfeasibleSolutionException:
+        return None
+    finally:
+        config.gamma = default_gamma
+        config.max_rows = default_max_rows
+        config.max_columns = default_max_columns
+
+
+class ParetoFront:
+
+    def __init__(self, graph: DiGraph):
+        """
+        Computes the Pareto front of VH-labelings between the semiperimeter S and the maximum dimension D.
+        Instead of one solve per value of gamma, the front is computed with the epsilon-constraint method:
+        - The end points minimize S and then D, and minimize D and then S (with a lexicographic value of gamma).
+        - Every point in between minimizes S and then D, with at most d rows and d columns for a value d between
+        the maximum dimensions of the end points.
+        The points are solved in parallel in batches of config.jobs by increasing d. The labeling of a point is
+        feasible for every larger d, such that each batch starts from the labeling of the previous batch.
+        The front is complete as soon as a point reaches the smallest semiperimeter.
+        :param graph: The graph to label.
+        """
+        self.graph = graph
+        self.presolve = None
+        self.front = []
+        self.solves = 0
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    @staticmethod
+    def get_values(labeling: Dict) -> Tuple[int, int]:
+        """
+        Returns the semiperimeter and the maximum dimension of a VH-labeling.
+        """
+        v, h, vh = VHLabeling.get_labels(labeling)
+        return v + h + 2 * vh, max(v + vh, h + vh)
+
+    def _get_offset(self) -> int:
+        if self.presolve is None:
+            return 0
+        return self.presolve.get_offset()
+
+    def _solve(self, graph: DiGraph, points: List[Tuple[float, int]], initial_labeling: Dict) -> List[Dict]:
+        """
+        Labels the given points (gamma, maximum dimension) of the graph in parallel.
+        """
+        offset = self._get_offset()
+        arguments = []
+        for (gamma, dimension) in points:
+            max_rows = min(config.max_rows, dimension) - offset
+            max_columns = min(config.max_columns, dimension) - offset
+            arguments.append((graph, gamma, max_rows, max_columns, initial_labeling))
+        self.solves += len(arguments)
+        executor = ParallelExecutor()
+        return executor.map(_label_point, arguments)
+
+    def label(self) -> List[Tuple[int, int, Dict]]:
+        """
+        :return: The non-dominated points as a list of tuples (S, D, VH-labeling) by increasing D.
+        """
+        self.start_time = time.time()
+
+        graph = self.graph
+        if config.presolve:
+            self.presolve = Presolve(self.graph)
+            graph = self.presolve.reduce()
+            config.log.add(self.presolve.get_log())
+
+        # Lexicographic values of gamma, as S is at most twice the number of nodes
+        n = len(graph.nodes)
+        semiperimeter_first = (2 * n + 1) / (2 * n + 2)
+        dimension_first = 1 / (2 * n + 2)
+
+        unbounded = max(config.max_rows, config.max_columns)
+        labelings = self._solve(graph, [(semiperimeter_first, unbounded), (dimension_first, unbounded)], None)
+        if labelings[0] is None or labelings[1] is None:
+            raise InfeasibleSolutionException("No labeling within the maximum dimensions found.")
+
+        points = []
+        for labeling in labelings:
+            if self.presolve is not None:
+                labeling = self.presolve.expand(labeling)
+            (s, d) = self.get_values(labeling)
+            points.append((s, d, labeling))
+        (min_semiperimeter, max_dimension, _) = points[0]
+        (_, min_dimension, _) = points[1]
+        # The labeling of the reduced graph with the smallest maximum dimension is feasible for every point
+        previous_labeling = labelings[1]
+
+        dimension = min_dimension + 1
+        jobs = max(1, config.jobs)
+        while dimension < max_dimension:
+            batch = list(range(dimension, min(dimension + jobs, max_dimension)))
+            labelings = self._solve(graph, [(semiperimeter_first, d) for d in batch], previous_labeling)
+            done = False
+            for labeling in labelings:
+                if labeling is None:
+                    continue
+                previous_labeling = labeling
+                if self.presolve is not None:
+                    labeling = self.presolve.expand(labeling)
+                (s, d) = self.get_values(labeling)
+                points.append((s, d, labeling))
+                if s <= min_semiperimeter:
+                    done = True
+            if done:
+                break
+            dimension += jobs
+
+        # Only the non-dominated points are kept
+        points.sort(key=lambda point: (point[1], point[0]))
+        for (s, d, labeling) in points:
+            if len(self.front) == 0 or s < self.front[-1][0]:
+                self.front.append((s, d, labeling))
+
+        self.end_time = time.time()
+
+        for (s, d, _) in self.front:
+            self.log += 'Pareto point: S {}, D {}\n'.format(s, d)
+        self.log += 'Pareto points: {}\n'.format(len(self.front))
+        self.log += 'Pareto solves: {}\n'.format(self.solves)
+        self.log += 'Pareto time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        return self.front
+
+    def map(self) -> List[Tuple[int, int, MemristorCrossbar]]:
+        """
+        :return: The crossbars of the non-dominated points as a list of tuples (S, D, crossbar) by increasing D.
+        """
+        if len(self.front) == 0:
+            self.label()
+        if self.presolve is not None:
+            graph = self.presolve.graph
+        else:
+            graph = self.graph
+        crossbars = []
+        for (s, d, labeling) in self.front:
+            crossbar_mapping = CrossbarMapping2D(graph)
+            crossbars.append((s, d, crossbar_mapping.map(labeling)))
+        return crossbars
+
+    def select(self) -> int:
+        """
+        Returns the index of the point of the front that minimizes the objective for config.gamma.
+        """
+        values = [config.gamma * s + (1 - config.gamma) * d for (s, d, _) in self.front]
+        return values.index(min(values))
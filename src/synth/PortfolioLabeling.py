@@ -0,0 +1,245 @@
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from typing import List
+
+from networkx import DiGraph
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.Log import Log
+from aux.ParallelExecutor import ParallelExecutor
+from aux.SolverMonitor import SolverMonitor
+from synth.BranchAndBoundKLabeling import BranchAndBoundKLabeling
+from synth.CombinatorialVHLabeling import CombinatorialVHLabeling
+from synth.GreedyKLabeling import GreedyKLabeling
+from synth.KLabeling import KLabeling
+from synth.SemiperimeterBounds import SemiperimeterBounds
+from synth.VHLabeling import VHLabeling
+from synth.Z3KLabeling import Z3KLabeling
+
+# The strategies whose solver minimizes the objective of the portfolio, such that their bounds are shared
+_EXACT_STRATEGIES = ["k", "vh"]
+
+
+def _label(name: str, graph: DiGraph, layers: int):
+    if name == "k":
+        return KLabeling(graph, layers).label()
+    elif name == "k-alt":
+        return KLabeling(graph, layers).label_alt()
+    elif name == "z3":
+        return Z3KLabeling(graph, layers).label()
+    elif name == "bb":
+        return BranchAndBoundKLabeling(graph, layers).label()
+    elif name == "greedy":
+        return GreedyKLabeling(graph, layers).label()
+    elif name == "vh":
+        return VHLabeling(graph).label()
+    elif name == "comb":
+        return CombinatorialVHLabeling(graph).label()
+    elif name == "trivial":
+        if config.vh_labeling:
+            labeling = VHLabeling.get_trivial_labeling(graph)
+        else:
+            labeling = KLabeling.get_trivial_labeling(graph, layers)
+        if labeling is None:
+            raise InfeasibleSolutionException("No trivial labeling.")
+        return labeling
+    else:
+        raise Exception("Unsupported strategy: {}".format(name))
+
+
+def _race(index: int, strategy: str, graph: DiGraph, layers: int, settings: dict, messages):
+    """
+    Runs a single strategy. Defined at module level such that strategies can be run in separate processes.
+    The process leads its own process group, such that it can be killed together with its solver.
+    """
+    os.setpgrp()
+    ParallelExecutor.initialize(settings)
+    config.log = Log()
+
+    (name, _, seed) = strategy.partition(":")
+    if seed != "":
+        config.solver_seed = int(seed)
+
+    if name in _EXACT_STRATEGIES and (config.vh_labeling or config.objective == "semi"):
+        def report(record):
+            messages.put(("progress", index, record["incumbent"], record["bound"]))
+        SolverMonitor.add_callback(report)
+
+    start_time = time.time()
+    try:
+        labeling = _label(name, graph, layers)
+    except Exception as e:
+        messages.put(("error", index, str(e), time.time() - start_time, config.log.content))
+        return
+    messages.put(("result", index, labeling, time.time() - start_time, config.log.content))
+
+
+class PortfolioLabeling:
+
+    def __init__(self, graph: DiGraph, layers: int = 1, strategies: List[str] = None, grace: float = 10):
+        """
+        Races several labeling strategies concurrently, each in a separate process, and returns the best labeling.
+        A strategy is one of "k", "k-alt", "z3", "bb", "greedy" and "trivial" for K-labeling, or "vh", "comb" and "trivial" for
+        VH-labeling, optionally followed by ":SEED" for the random seed of the solver, e.g. "k:1".
+        Labelings are compared by their semiperimeter (K-labeling) or by the objective of VH-labeling.
+        The incumbents and bounds of the strategies that minimize this objective are streamed to the portfolio.
+        The race ends as soon as the best labeling matches the best bound (which includes the combinatorial lower
+        bound), or as soon as all strategies are done. Strategies whose bound does not allow them to improve on the
+        best labeling are stopped early.
+        :param graph: The graph to label.
+        :param layers: The number of layers of memristors (only for K-labeling).
+        :param strategies: The strategies to race. By default, config.portfolio is used.
+        :param grace: The time in seconds that strategies may run beyond the time limit before they are stopped.
+        """
+        self.graph = graph
+        self.layers = layers
+        if strategies is None:
+            strategies = config.portfolio
+        self.strategies = strategies
+        self.grace = grace
+        self.winner = None
+        self.labeling = None
+        self.value = None
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    def _get_value(self, labeling) -> float:
+        """
+        Returns the objective value of a labeling.
+        """
+        if config.vh_labeling:
+            v, h, vh = VHLabeling.get_labels(labeling)
+            s = v + h + 2 * vh
+            d = max(v + vh, h + vh)
+            return config.gamma * s + (1 - config.gamma) * d
+        (rows, columns, _, _) = labeling
+        return rows + columns
+
+    @staticmethod
+    def _fits(labeling) -> bool:
+        if config.vh_labeling:
+            v, h, vh = VHLabeling.get_labels(labeling)
+            return h + vh <= config.max_rows and v + vh <= config.max_columns
+        (rows, columns, _, _) = labeling
+        return rows <= config.max_rows and columns <= config.max_columns
+
+    def _get_bound(self) -> float:
+        """
+        Returns the combinatorial lower bound on the objective value.
+        """
+        semiperimeter_bounds = SemiperimeterBounds(self.graph, self.layers)
+        if config.vh_labeling:
+            s = semiperimeter_bounds.get_vh_bound()
+            return config.gamma * s + (1 - config.gamma) * math.ceil(s / 2)
+        return semiperimeter_bounds.get_k_bound()
+
+    @staticmethod
+    def _kill(process):
+        if not process.is_alive():
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except OSError:
+            process.terminate()
+
+    def label(self):
+        self.start_time = time.time()
+
+        best_bound = self._get_bound()
+        self.log += 'Portfolio lower bound: {}\n'.format(best_bound)
+
+        context = multiprocessing.get_context()
+        messages = context.Queue()
+        settings = ParallelExecutor.get_settings()
+        processes = []
+        for (index, strategy) in enumerate(self.strategies):
+            process = context.Process(target=_race,
+                                      args=(index, strategy, self.graph, self.layers, settings, messages))
+            process.start()
+            processes.append(process)
+
+        deadline = None
+        if config.time_limit is not None:
+            deadline = self.start_time + config.time_limit + self.grace
+
+        done = set()
+        winner_log = ''
+        while len(done) < len(processes):
+            if self.value is not None and self.value <= best_bound + 1e-6:
+                self.log += 'Portfolio optimal: True\n'
+                break
+            if deadline is not None and time.time() > deadline:
+                self.log += 'Portfolio budget exhausted\n'
+                break
+
+            try:
+                message = messages.get(timeout=0.5)
+            except queue.Empty:
+                # A process that died without a message (e.g. out of memory) is done
+                for (index, process) in enumerate(processes):
+                    if index not in done and not process.is_alive() and messages.empty():
+                        done.add(index)
+                        self.log += 'Portfolio strategy {}: died\n'.format(self.strategies[index])
+                continue
+
+            index = message[1]
+            strategy = self.strategies[index]
+            if message[0] == "progress":
+                (_, _, incumbent, bound) = message
+                if bound is None:
+                    continue
+                if not config.vh_labeling:
+                    # The semiperimeter is integral
+                    bound = math.ceil(bound - 1e-6)
+                # The bound of an exact strategy is a bound of the portfolio
+                best_bound = max(best_bound, bound)
+                # A strategy that cannot improve on the best labeling is stopped
+                if self.value is not None and bound >= self.value - 1e-6 and index not in done:
+                    self._kill(processes[index])
+                    done.add(index)
+                    self.log += 'Portfolio strategy {}: stopped (bound {})\n'.format(strategy, bound)
+            elif message[0] == "result":
+                (_, _, labeling, duration, log) = message
+                done.add(index)
+                if not self._fits(labeling):
+                    self.log += 'Portfolio strategy {}: exceeds the maximum dimensions\n'.format(strategy)
+                    continue
+                value = self._get_value(labeling)
+                self.log += 'Portfolio strategy {}: value {}, time (s) {}\n'.format(strategy, value, duration)
+                if self.value is None or value < self.value:
+                    self.value = value
+                    self.labeling = labeling
+                    self.winner = strategy
+                    winner_log = log
+            else:
+                (_, _, error, duration, log) = message
+                done.add(index)
+                self.log += 'Portfolio strategy {}: failed ({}), time (s) {}\n'.format(strategy, error, duration)
+
+        for process in processes:
+            self._kill(process)
+        for process in processes:
+            process.join()
+
+        self.end_time = time.time()
+
+        if self.labeling is None:
+            config.log.add(self.get_log())
+            raise InfeasibleSolutionException("No strategy of the portfolio found a labeling.")
+
+        config.log.add(winner_log)
+        self.log += 'Portfolio winner: {}\n'.format(self.winner)
+        self.log += 'Portfolio value: {}\n'.format(self.value)
+        self.log += 'Portfolio time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        return self.labeling
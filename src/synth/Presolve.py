@@ -0,0 +1,150 @@
+import time
+from typing import List
+
+from networkx import DiGraph
+
+from aux import config
+
+
+class Presolve:
+
+    def __init__(self, graph: DiGraph, layers: int = 1):
+        """
+        Reduces a graph before it is labeled, and expands the labeling of the reduced graph afterwards.
+        The reductions are exact: the expanded labeling of an optimal labeling of the reduced graph is optimal.
+        - Nodes that are not on a path from a root node to a terminal one node never conduct the input to an output,
+        and are removed (for all labelings). The remaining graph is mapped instead of the given graph.
+        - Two adjacent nodes of degree two between two non-adjacent nodes u and w are contracted into an edge between
+        u and w (only for VH-labeling). The path u - a - b - w has the same parity as the edge u - w, and the nodes
+        a and b are always labeled V and H, which adds one row and one column to the crossbar.
+        :param graph: The graph to reduce.
+        :param layers: The number of layers of memristors (only for K-labeling).
+        """
+        self.graph = graph
+        self.layers = layers
+        self.reduced_graph = None
+        self.removed_nodes = []
+        self.contractions = []
+        self.start_time = None
+        self.end_time = None
+
+    def get_log(self) -> str:
+        log = ''
+        log += 'Presolve removed nodes: {}\n'.format(len(self.removed_nodes))
+        log += 'Presolve contracted chains: {}\n'.format(len(self.contractions))
+        log += 'Presolve nodes: {}\n'.format(len(self.reduced_graph.nodes))
+        log += 'Presolve edges: {}\n'.format(len(self.reduced_graph.edges))
+        log += 'Presolve time (s): {}\n'.format(self.end_time - self.start_time)
+        return log
+
+    def get_offset(self) -> int:
+        """
+        Returns the number of rows and the number of columns the expansion adds to the labeling of the reduced graph.
+        """
+        return len(self.contractions)
+
+    def _remove_dead_nodes(self):
+        roots = [v for (v, d) in self.graph.nodes(data=True) if d["root"]]
+        terminal_ones = [v for (v, d) in self.graph.nodes(data=True) if d["terminal"] and d["variable"] == '1']
+
+        forward = set(roots)
+        stack = list(roots)
+        while len(stack) > 0:
+            for v in self.graph.successors(stack.pop()):
+                if v not in forward:
+                    forward.add(v)
+                    stack.append(v)
+
+        backward = set(terminal_ones)
+        stack = list(terminal_ones)
+        while len(stack) > 0:
+            for v in self.graph.predecessors(stack.pop()):
+                if v not in backward:
+                    backward.add(v)
+                    stack.append(v)
+
+        # Root nodes are kept for their output variables
+        self.removed_nodes = [v for (v, d) in self.graph.nodes(data=True)
+                              if not d["root"] and (v not in forward or v not in backward)]
+        if len(self.removed_nodes) > 0:
+            removed_nodes = set(self.removed_nodes)
+            self.graph = self.graph.subgraph([v for v in self.graph.nodes if v not in removed_nodes]).copy()
+
+    def _is_internal(self, v) -> bool:
+        d = self.reduced_graph.nodes[v]
+        return not d["root"] and not d["terminal"]
+
+    def _get_neighbors(self, v) -> List:
+        return list(self.reduced_graph.predecessors(v)) + list(self.reduced_graph.successors(v))
+
+    def _contract_chains(self):
+        contracted = True
+        while contracted:
+            contracted = False
+            for a in list(self.reduced_graph.nodes):
+                if a not in self.reduced_graph or not self._is_internal(a):
+                    continue
+                neighbors = self._get_neighbors(a)
+                if len(neighbors) != 2 or neighbors[0] == neighbors[1]:
+                    continue
+                for (u, b) in [(neighbors[0], neighbors[1]), (neighbors[1], neighbors[0])]:
+                    if not self._is_internal(b):
+                        continue
+                    b_neighbors = self._get_neighbors(b)
+                    if len(b_neighbors) != 2 or a not in b_neighbors:
+                        continue
+                    w = b_neighbors[0] if b_neighbors[1] == a else b_neighbors[1]
+                    if w == u or w == a or self.reduced_graph.has_edge(u, w) or self.reduced_graph.has_edge(w, u):
+                        continue
+                    self.reduced_graph.remove_nodes_from([a, b])
+                    self.reduced_graph.add_edge(u, w)
+                    self.contractions.append((u, a, b, w))
+                    contracted = True
+                    break
+
+    def reduce(self) -> DiGraph:
+        """
+        :return: The reduced graph.
+        """
+        self.start_time = time.time()
+
+        if not config.full_bdd:
+            self._remove_dead_nodes()
+        self.reduced_graph = self.graph
+        if config.vh_labeling:
+            self.reduced_graph = self.graph.copy()
+            self._contract_chains()
+
+        self.end_time = time.time()
+        return self.reduced_graph
+
+    def reduce_labeling(self, labeling):
+        """
+        Restricts a labeling of the graph to the reduced graph, e.g. to warm start the solver.
+        """
+        if labeling is None:
+            return None
+        if config.vh_labeling:
+            return dict((v, label) for (v, label) in labeling.items() if v in self.reduced_graph)
+        (rows, columns, node_assignments, edge_assignments) = labeling
+        node_assignments = dict((v, layers) for (v, layers) in node_assignments.items() if v in self.reduced_graph)
+        edge_assignments = dict((e, layers) for (e, layers) in edge_assignments.items()
+                                if self.reduced_graph.has_edge(*e))
+        return rows, columns, node_assignments, edge_assignments
+
+    def expand(self, labeling):
+        """
+        Expands a labeling of the reduced graph to a labeling of the graph (without the removed nodes).
+        """
+        if not config.vh_labeling:
+            return labeling
+        labeling = dict(labeling)
+        # Later contractions may contain the nodes of earlier contractions
+        for (u, a, b, w) in reversed(self.contractions):
+            if labeling[u] >= 0 and labeling[w] <= 0:
+                labeling[a] = -1
+                labeling[b] = 1
+            else:
+                labeling[a] = 1
+                labeling[b] = -1
+        return labeling
@@ -0,0 +1,180 @@
+import math
+import time
+from typing import Dict
+
+from networkx import Graph
+
+from aux import config
+
+
+class SemiperimeterBounds:
+
+    def __init__(self, graph: Graph, layers: int = 1):
+        """
+        Computes lower bounds on the semiperimeter of VH- and K-labelings from the graph alone.
+        Every edge connects a nanowire at an even layer with a nanowire at an odd layer (a row with a column).
+        A node that is assigned to nanowires of a single parity can therefore only be adjacent to nodes of the other
+        parity, and every odd cycle holds at least one node that is assigned to nanowires of both parities.
+        The same holds for every edge between two nodes that the I/O constraints force to the same parity.
+        Vertex-disjoint odd cycles and conflicting edges are packed greedily; each of them requires one additional
+        nanowire.
+        :param graph: The graph to label.
+        :param layers: The number of layers of memristors (only for K-labeling).
+        """
+        self.graph = graph
+        self.layers = layers
+        self.conflicts = None
+        self.start_time = None
+        self.end_time = None
+
+    def _get_forced_layers(self) -> Dict:
+        """
+        Returns the layers of nanowires the I/O constraints assign the root and terminal nodes to.
+        For VH-labeling, all these nodes must be labeled H, which corresponds to layer 0.
+        """
+        forced_layers = dict()
+        if not config.io_constraints:
+            return forced_layers
+        for (v, d) in self.graph.nodes(data=True):
+            if config.vh_labeling:
+                if d["root"] or d["terminal"]:
+                    forced_layers[v] = 0
+            elif d["root"]:
+                if config.output_layer is not None:
+                    forced_layers[v] = config.output_layer
+                elif self.layers % 2 == 0:
+                    forced_layers[v] = self.layers
+                else:
+                    forced_layers[v] = self.layers - 1
+            elif d["terminal"]:
+                if config.input_layer is not None:
+                    forced_layers[v] = config.input_layer
+                else:
+                    forced_layers[v] = 0
+        return forced_layers
+
+    def _find_odd_cycles(self, graph: Graph, used: set) -> int:
+        """
+        Finds vertex-disjoint odd cycles among the unused nodes with a breadth-first 2-coloring.
+        Every edge between two nodes of the same color closes an odd cycle with the paths of the search tree.
+        :return: The number of odd cycles that were found. The nodes of these cycles are added to the used nodes.
+        """
+        found = 0
+        color = dict()
+        parent = dict()
+        depth = dict()
+        for start in graph.nodes:
+            if start in used or start in color:
+                continue
+            color[start] = 0
+            parent[start] = None
+            depth[start] = 0
+            queue = [start]
+            while len(queue) > 0:
+                u = queue.pop(0)
+                for v in graph.neighbors(u):
+                    if v in used:
+                        continue
+                    if v not in color:
+                        color[v] = 1 - color[u]
+                        parent[v] = u
+                        depth[v] = depth[u] + 1
+                        queue.append(v)
+                    elif color[v] == color[u] and u not in used:
+                        # We walk up the search tree from both ends until the paths meet
+                        cycle = [u, v]
+                        a, b = u, v
+                        while a != b:
+                            if depth[a] >= depth[b]:
+                                a = parent[a]
+                                cycle.append(a)
+                            else:
+                                b = parent[b]
+                                cycle.append(b)
+                        if not any(w in used for w in cycle):
+                            used.update(cycle)
+                            found += 1
+        return found
+
+    def get_conflicts(self) -> int:
+        """
+        Returns the number of vertex-disjoint conflicts, i.e. odd cycles and edges between nodes forced to the
+        same parity. Every conflict requires one node that is assigned to nanowires of both parities.
+        """
+        if self.conflicts is not None:
+            return self.conflicts
+
+        self.start_time = time.time()
+
+        undirected = Graph(self.graph.to_undirected(as_view=True))
+        undirected.remove_edges_from(list((v, v) for v in undirected.nodes if undirected.has_edge(v, v)))
+
+        used = set()
+        conflicts = 0
+
+        forced_layers = self._get_forced_layers()
+        for (u, v) in undirected.edges:
+            if u in forced_layers and v in forced_layers and u not in used and v not in used:
+                if forced_layers[u] % 2 == forced_layers[v] % 2:
+                    used.update([u, v])
+                    conflicts += 1
+
+        # Removing the nodes of the cycles may uncover new odd cycles in the next pass
+        while True:
+            found = self._find_odd_cycles(undirected, used)
+            if found == 0:
+                break
+            conflicts += found
+
+        self.conflicts = conflicts
+        self.end_time = time.time()
+        return self.conflicts
+
+    def get_assignment_bound(self) -> int:
+        """
+        Returns a lower bound on the total number of nanowires, i.e. the sum of the number of layers of nanowires
+        each node is assigned to.
+        """
+        return len(self.graph.nodes) + self.get_conflicts()
+
+    def get_vh_bound(self) -> int:
+        """
+        Returns a lower bound on the semiperimeter of a VH-labeling (the number of labels V and H).
+        """
+        return self.get_assignment_bound()
+
+    def get_k_bound(self) -> int:
+        """
+        Returns a lower bound on the semiperimeter of a K-labeling (the maximum number of rows over the even layers
+        plus the maximum number of columns over the odd layers).
+        The total number of nanowires is distributed over the even and odd layers of nanowires.
+        """
+        even_layers = self.layers // 2 + 1
+        odd_layers = (self.layers + 1) // 2
+        total = self.get_assignment_bound()
+
+        # The I/O constraints fix nodes to given layers
+        layer_count = dict()
+        for l in self._get_forced_layers().values():
+            layer_count[l] = layer_count.get(l, 0) + 1
+        min_rows = max([n for (l, n) in layer_count.items() if l % 2 == 0], default=0)
+        min_columns = max([n for (l, n) in layer_count.items() if l % 2 == 1], default=0)
+        if len(self.graph.edges) > 0:
+            min_rows = max(min_rows, 1)
+            min_columns = max(min_columns, 1)
+
+        if odd_layers == 0:
+            return max(min_rows, total)
+
+        bound = None
+        for rows in range(min_rows, max(min_rows, math.ceil(total / even_layers)) + 1):
+            columns = max(min_columns, math.ceil((total - even_layers * rows) / odd_layers))
+            if bound is None or rows + columns < bound:
+                bound = rows + columns
+        return bound
+
+    def get_log(self) -> str:
+        log = ''
+        log += 'Conflicts: {}\n'.format(self.get_conflicts())
+        log += 'Bounds time (s): {}\n'.format(self.end_time - self.start_time)
+        return log
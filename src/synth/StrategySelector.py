@@ -0,0 +1,180 @@
+import time
+from typing import Dict
+
+from networkx import DiGraph
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.RuntimeModel import RuntimeModel
+from synth.CombinatorialVHLabeling import CombinatorialVHLabeling
+from synth.GraphDecomposition import GraphDecomposition
+from synth.KLabeling import KLabeling
+from synth.LargeNeighborhoodSearch import LargeNeighborhoodSearch
+from synth.VHLabeling import VHLabeling
+
+
+class StrategySelector:
+
+    def __init__(self, graph: DiGraph, layers: int = 1, initial_labeling=None, warm_factor: float = 10,
+                 heuristic_share: float = 0.25):
+        """
+        Chooses a labeling strategy before any ILP is built, from the predicted solve time of the exact ILP and the
+        time limit (config.time_limit):
+        - "exact": the ILP is predicted to be solved within the time limit.
+        - "decompose": the graph has several blocks (see GraphDecomposition), and the ILPs of all blocks are
+        predicted to be solved within the time limit.
+        - "warm": the ILP is predicted to take at most warm_factor times the time limit. A heuristic labeling is
+        computed first, and the ILP starts from it in anytime mode.
+        - "heuristic": only a heuristic labeling is computed, with the large neighborhood search (K-labeling) or
+        the combinatorial solver (VH-labeling).
+        Without a time limit, the exact ILP is always chosen. The solve times of the exact and warm-started ILPs are
+        recorded, such that the predictions improve with every run (see RuntimeModel).
+        :param graph: The graph to label.
+        :param layers: The number of layers of memristors (only for K-labeling).
+        :param initial_labeling: Optionally, a feasible labeling the solver starts from.
+        :param warm_factor: The largest ratio between the predicted solve time and the time limit for "warm".
+        :param heuristic_share: The share of the time limit for the heuristic labeling of "warm".
+        """
+        self.graph = graph
+        self.layers = layers
+        self.initial_labeling = initial_labeling
+        self.warm_factor = warm_factor
+        self.heuristic_share = heuristic_share
+        if config.vh_labeling:
+            self.runtime_model = RuntimeModel("vh")
+        else:
+            self.runtime_model = RuntimeModel("k")
+        self.statistics = None
+        self.prediction = None
+        self.strategy = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    @staticmethod
+    def get_statistics(graph: DiGraph, layers: int = 1) -> Dict:
+        """
+        Returns the number of variables, constraints and nonzeros of the ILP of KLabeling or VHLabeling for the
+        graph, without building it.
+        """
+        n = len(graph.nodes)
+        m = len(graph.edges)
+        io = 0
+        if config.io_constraints:
+            io = len([v for (v, d) in graph.nodes(data=True) if d["root"] or d["terminal"]])
+        if config.vh_labeling:
+            variables = 2 * n + m + 4
+            constraints = 2 * m + io + 8
+            nonzeros = 6 * m + io + 4 * n + 13
+            layers = 1
+        else:
+            pairs = layers * (layers + 1) // 2
+            variables = n * (layers + 2) + 2 * m * layers + 3
+            constraints = m * (2 * layers + 1) + n * (1 + pairs) + 2 * (layers + 1) + io + 2
+            nonzeros = 8 * m * layers + n * (layers + 2 + 3 * pairs) + 2 * (layers + 1) * (n + 1) + io + 4
+        return {"nodes": n, "edges": m, "layers": layers, "variables": variables, "constraints": constraints,
+                "nonzeros": nonzeros}
+
+    def _get_decomposition_time(self) -> float:
+        """
+        Returns the predicted time to label the blocks of the graph, or None if the graph has a single block.
+        """
+        graph_decomposition = GraphDecomposition(self.graph, self.layers)
+        blocks = graph_decomposition.decompose()
+        if len(blocks) <= 1:
+            return None
+        predictions = [self.runtime_model.predict(self.get_statistics(block, self.layers)) for block in blocks]
+        # The blocks are labeled in parallel, but no faster than the largest block
+        return max(max(predictions), sum(predictions) / max(1, config.jobs))
+
+    def select(self) -> str:
+        """
+        :return: The strategy, one of "exact", "decompose", "warm" and "heuristic".
+        """
+        self.statistics = self.get_statistics(self.graph, self.layers)
+        self.prediction = self.runtime_model.predict(self.statistics)
+        budget = config.time_limit
+
+        if budget is None or self.prediction <= budget:
+            self.strategy = "exact"
+        else:
+            decomposition_time = self._get_decomposition_time()
+            if decomposition_time is not None and decomposition_time <= budget:
+                self.strategy = "decompose"
+            elif self.prediction <= self.warm_factor * budget:
+                self.strategy = "warm"
+            else:
+                self.strategy = "heuristic"
+
+        self.log += 'Selector variables: {}\n'.format(self.statistics["variables"])
+        self.log += 'Selector constraints: {}\n'.format(self.statistics["constraints"])
+        self.log += 'Selector nonzeros: {}\n'.format(self.statistics["nonzeros"])
+        self.log += 'Selector runtime model: {}\n'.format("fitted" if self.runtime_model.fitted else "default")
+        self.log += 'Selector predicted time (s): {}\n'.format(self.prediction)
+        self.log += 'Selector time limit (s): {}\n'.format(budget)
+        self.log += 'Selector strategy: {}\n'.format(self.strategy)
+        config.log.add(self.get_log())
+        print("Selected strategy: {} (predicted time (s): {})".format(self.strategy, self.prediction))
+
+        return self.strategy
+
+    def _label_exact(self, initial_labeling):
+        start_time = time.time()
+        if config.vh_labeling:
+            labeling_method = VHLabeling(self.graph, initial_labeling=initial_labeling)
+        else:
+            labeling_method = KLabeling(self.graph, self.layers, initial_labeling=initial_labeling)
+        labeling = labeling_method.label()
+        duration = time.time() - start_time
+        # A labeling from the cache was not solved, such that its time says nothing about the ILP
+        if labeling_method.start_time is None:
+            return labeling
+        # A run that was stopped by the time limit did not finish
+        solved = config.time_limit is None or duration < 0.95 * config.time_limit
+        self.runtime_model.add(self.statistics, duration, solved)
+        return labeling
+
+    def _label_heuristic(self, time_limit: float):
+        if config.vh_labeling:
+            return CombinatorialVHLabeling(self.graph).label()
+        labeling = self.initial_labeling
+        if labeling is None:
+            labeling = KLabeling.get_trivial_labeling(self.graph, self.layers)
+        default_lns_time = config.lns_time
+        config.lns_time = time_limit
+        try:
+            large_neighborhood_search = LargeNeighborhoodSearch(self.graph, self.layers, labeling)
+            labeling = large_neighborhood_search.label()
+        finally:
+            config.lns_time = default_lns_time
+        if labeling[0] > config.max_rows or labeling[1] > config.max_columns:
+            raise InfeasibleSolutionException("No labeling within the maximum dimensions found.")
+        return labeling
+
+    def label(self):
+        """
+        Labels the graph with the selected strategy.
+        """
+        if self.strategy is None:
+            self.select()
+
+        if self.strategy == "exact":
+            return self._label_exact(self.initial_labeling)
+        if self.strategy == "decompose":
+            graph_decomposition = GraphDecomposition(self.graph, self.layers)
+            return graph_decomposition.label()
+        if self.strategy == "heuristic":
+            return self._label_heuristic(config.time_limit)
+
+        start_time = time.time()
+        labeling = self._label_heuristic(self.heuristic_share * config.time_limit)
+        default_time_limit = config.time_limit
+        default_anytime = config.anytime
+        config.time_limit = max(1, int(default_time_limit - (time.time() - start_time)))
+        config.anytime = True
+        try:
+            return self._label_exact(labeling)
+        finally:
+            config.time_limit = default_time_limit
+            config.anytime = default_anytime
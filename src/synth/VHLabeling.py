@@ -1,7 +1,6 @@
 import math
 import os
 import time
-import re
 from datetime import datetime
 from itertools import product
 from pathlib import Path
@@ -9,18 +8,32 @@ from typing import Dict
 
 import numpy as np
 from networkx import Graph, complete_graph, cartesian_product
-from pulp import LpVariable, LpProblem, LpMinimize, LpInteger, lpSum, PULP_CBC_CMD, LpStatus, LpStatusInfeasible, \
-    CPLEX_CMD
+from pulp import LpVariable, LpProblem, LpMinimize, LpInteger, lpSum, PULP_CBC_CMD, LpStatus
 
 from aux import config
+from aux.SolverFactory import SolverFactory
 from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.LabelingCache import LabelingCache
+from synth.SemiperimeterBounds import SemiperimeterBounds
 
 
 class VHLabeling:
 
-    def __init__(self, g: Graph, layers: int = 1):
+    def __init__(self, g: Graph, layers: int = 1, fixed_labeling: Dict = None, initial_labeling: Dict = None):
+        """
+        :param g: The graph to label.
+        :param layers: Unused for VH-labeling.
+        :param fixed_labeling: Optionally, a dictionary from nodes to the labels these nodes must be given
+        (1 for V, -1 for H, and 0 for VH).
+        :param initial_labeling: Optionally, a feasible VH-labeling the solver starts from.
+        """
         self.g = g
         self.layers = layers
+        if fixed_labeling is None:
+            self.fixed_labeling = dict()
+        else:
+            self.fixed_labeling = fixed_labeling
+        self.initial_labeling = initial_labeling
         self.labeling = dict()
         self.start_time = None
         self.stop_time = None
@@ -40,11 +53,64 @@ class VHLabeling:
 
         return v, h, vh
 
+    @staticmethod
+    def get_trivial_labeling(g: Graph, fixed_labeling: Dict = None):
+        """
+        Returns a VH-labeling that labels every node VH, which satisfies the I/O constraints.
+        :param g: The graph to label.
+        :param fixed_labeling: Optionally, a dictionary from nodes to the labels these nodes must be given.
+        :return: The VH-labeling, or None if an edge connects two nodes with the same fixed label V or H.
+        """
+        if fixed_labeling is None:
+            fixed_labeling = dict()
+        labeling = dict()
+        for v in g.nodes:
+            labeling[v] = fixed_labeling.get(v, 0)
+        for (u, v) in g.edges:
+            if labeling[u] != 0 and labeling[u] == labeling[v]:
+                return None
+        return labeling
+
+    def _label_fallback(self):
+        """
+        In anytime mode, falls back to the initial labeling or else the trivial labeling if the solver found no
+        solution.
+        """
+        if self.initial_labeling is not None:
+            labeling = self.initial_labeling
+        else:
+            labeling = VHLabeling.get_trivial_labeling(self.g, self.fixed_labeling)
+        if labeling is None:
+            raise InfeasibleSolutionException("No solution found.")
+        v, h, vh = VHLabeling.get_labels(labeling)
+        if h + vh > config.max_rows or v + vh > config.max_columns:
+            raise InfeasibleSolutionException("No solution found.")
+
+        self.stop_time = time.time()
+
+        config.log.add('Anytime: fallback labeling\n')
+        config.log.add("Label V: {}\n".format(v))
+        config.log.add("Label H: {}\n".format(h))
+        config.log.add("Label VH: {}\n".format(vh))
+        config.log.add(self.get_log())
+
+        self.labeling = labeling
+        return self.labeling
+
     def label(self):
+        # Labelings with fixed assignments are never cached
+        use_cache = config.cache and len(self.fixed_labeling) == 0
+        if use_cache:
+            labeling_cache = LabelingCache("vh")
+            labeling = labeling_cache.get(self.g)
+            if labeling is not None:
+                config.log.add('Cache: hit\n')
+                self.labeling = labeling
+                return self.labeling
+
         self.start_time = time.time()
 
-        solver = CPLEX_CMD(path=config.cplex_path, msg=False, keepFiles=config.keep_files, timeLimit=config.time_limit,
-                           logPath=str(config.root.joinpath("cplex.log")))
+        solver = SolverFactory.get_solver(warm_start=self.initial_labeling is not None)
 
         cmbs = ['V', 'H']
         # Variables
@@ -59,15 +125,25 @@ class VHLabeling:
         R = LpVariable("R", 0, cat=LpInteger)
         C = LpVariable("C", 0, cat=LpInteger)
 
-        lpvc = LpProblem("VC", LpMinimize)
+        lpvc = LpProblem(SolverFactory.get_problem_name("VC"), LpMinimize)
 
         lpvc += config.gamma * S + (1 - config.gamma) * D
         lpvc += S == lpSum([x_vars])
+
+        # The solver stops as soon as the incumbent matches the lower bound
+        semiperimeter_bounds = SemiperimeterBounds(self.g)
+        lower_bound = semiperimeter_bounds.get_vh_bound()
+        lpvc += S >= lower_bound
+        config.log.add('Lower bound (semiperimeter): {}\n'.format(lower_bound))
+        config.log.add(semiperimeter_bounds.get_log())
         lpvc += D >= R
         lpvc += D >= C
 
         lpvc += R == sum([x_vars[v]['V'] for v in self.g.nodes])
         lpvc += C == sum([x_vars[v]['H'] for v in self.g.nodes])
+        # Horizontal nanowires are rows and vertical nanowires are columns
+        lpvc += C <= config.max_rows
+        lpvc += R <= config.max_columns
 
         for e in self.g.edges:
             lpvc += lpSum(x_vars[e[0]]['V'] + x_vars[e[1]]['H']) >= 2 - 2 * s_vars[e]
@@ -81,14 +157,23 @@ class VHLabeling:
                 if d["terminal"]:
                     lpvc += x_vars[v]['H'] == 1
 
+        for (v, label) in self.fixed_labeling.items():
+            lpvc += x_vars[v]['V'] == int(label >= 0)
+            lpvc += x_vars[v]['H'] == int(label <= 0)
+
+        if self.initial_labeling is not None:
+            for (v, label) in self.initial_labeling.items():
+                x_vars[v]['V'].setInitialValue(int(label >= 0))
+                x_vars[v]['H'].setInitialValue(int(label <= 0))
+
         print("\tStarted ILP solver")
         print("\t{}".format(datetime.now()))
-        lpvc.solve(solver)
+        solver_monitor = SolverFactory.solve(lpvc, solver)
         print("\tStopped ILP solver")
         print("\t{}".format(datetime.now()))
 
-        if lpvc.status == LpStatusInfeasible:
-            raise InfeasibleSolutionException("Infeasible solution.")
+        if not SolverFactory.has_solution(lpvc, solver_monitor):
+            return self._label_fallback()
 
         vertical = []
         horizontal = []
@@ -120,16 +205,12 @@ class VHLabeling:
         config.log.add("Label H: {}\n".format(hs))
         config.log.add("Label VH: {}\n".format(vhs))
 
-        gap = 0
-        cplex_log_file_name = config.root.joinpath("cplex.log")
-        if cplex_log_file_name.is_file():
-            with open(str(cplex_log_file_name), 'r') as f:
-                for line in f.readlines():
-                    if "gap" in line:
-                        gap = float(re.findall(r'(\d+\.\d+)\%', line)[0])
-        config.log.add("Gap (%): {}\n".format(gap))
+        config.log.add("Gap (%): {}\n".format(solver_monitor.get_gap()))
         # print('Labeling: {}\n'.format(self.labeling))
 
         config.log.add(self.get_log())
 
+        if use_cache and SolverFactory.is_optimal(lpvc, solver_monitor):
+            labeling_cache.put(self.g, self.labeling)
+
         return self.labeling
@@ -0,0 +1,342 @@
+import time
+from typing import List
+
+from networkx import DiGraph, NetworkXUnfeasible, topological_sort
+
+from aux import config
+
+
+class VariableReordering:
+
+    def __init__(self, graph: DiGraph, method: str = None, cost: str = None, time_limit: float = None):
+        """
+        Reorders the variables of a BDD in memory, to reduce the size of the graph before labeling.
+        The BDD is loaded into a table of unique nodes per variable, in which two adjacent variables are swapped in place
+        (only the nodes of the upper variable that depend on the lower variable are rewritten, such that the parents of
+        a node remain valid). On top of the swap, two methods are supported:
+        - "sift": every variable is moved through all levels, and is placed at the level of the lowest cost (Rudell).
+        A variable stops moving in a direction when the cost grows beyond config.max_growth times the lowest cost.
+        - "window": all permutations of every window of three adjacent variables are tried, until no window improves.
+        The cost is either the number of nodes ("nodes"), or the predicted semiperimeter ("semi"). When the variables
+        are labeled by the parity of their levels, an edge that skips an odd number of levels connects two nodes on
+        nanowires of the same direction, such that one of both nodes becomes a VH node. The predicted semiperimeter is
+        the number of nodes plus the number of nodes with such an edge.
+        :param graph: The BDD. A node without a positive or a negative edge points to the terminal zero node.
+        :param method: The reordering method, "sift" or "window". By default, config.reorder is used.
+        :param cost: The cost, "nodes" or "semi". By default, config.reorder_cost is used.
+        :param time_limit: The time in seconds after which no more variables are moved (None for no limit).
+        """
+        self.graph = graph
+        if method is None:
+            method = config.reorder
+        self.method = method
+        if cost is None:
+            cost = config.reorder_cost
+        self.cost = cost
+        self.time_limit = time_limit
+
+        self.order = []
+        self.levels = dict()
+        self.variables = dict()
+        self.lows = dict()
+        self.highs = dict()
+        self.references = dict()
+        self.tables = dict()
+        self.roots = []
+        self.next_id = 2
+        self.has_terminal_zero = False
+        self.swaps = 0
+
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    def get_order(self) -> List[str]:
+        return list(self.order)
+
+    def _get_initial_order(self):
+        """
+        Returns the order of the variables in the graph from the top to the bottom, or None if the graph is not
+        ordered.
+        """
+        precedence = DiGraph()
+        for (v, d) in self.graph.nodes(data=True):
+            if not self._is_constant(v):
+                precedence.add_node(d["variable"])
+        for (u, v) in self.graph.edges:
+            if self._is_constant(u) or self._is_constant(v):
+                continue
+            if self.graph.nodes[u]["variable"] == self.graph.nodes[v]["variable"]:
+                return None
+            precedence.add_edge(self.graph.nodes[u]["variable"], self.graph.nodes[v]["variable"])
+        try:
+            return list(topological_sort(precedence))
+        except NetworkXUnfeasible:
+            return None
+
+    def _is_constant(self, v) -> bool:
+        return self.graph.nodes[v]["variable"] in ['0', '1'] and self.graph.out_degree(v) == 0
+
+    def _get_level(self, node: int) -> int:
+        if node < 2:
+            return len(self.order)
+        return self.levels[self.variables[node]]
+
+    def _make(self, variable: str, low: int, high: int) -> int:
+        """
+        Returns the unique node of the given variable and children. A new node has no references yet.
+        """
+        if low == high:
+            return low
+        table = self.tables[variable]
+        node = table.get((low, high))
+        if node is not None:
+            return node
+        node = self.next_id
+        self.next_id += 1
+        table[(low, high)] = node
+        self.variables[node] = variable
+        self.lows[node] = low
+        self.highs[node] = high
+        self.references[node] = 0
+        self.references[low] += 1
+        self.references[high] += 1
+        return node
+
+    def _dereference(self, node: int):
+        stack = [node]
+        while len(stack) > 0:
+            node = stack.pop()
+            self.references[node] -= 1
+            if node < 2 or self.references[node] > 0:
+                continue
+            del self.tables[self.variables[node]][(self.lows[node], self.highs[node])]
+            stack.append(self.lows.pop(node))
+            stack.append(self.highs.pop(node))
+            del self.variables[node]
+            del self.references[node]
+
+    def _load(self, order: List[str]):
+        self.order = list(order)
+        self.levels = dict((variable, level) for (level, variable) in enumerate(self.order))
+        self.tables = dict((variable, dict()) for variable in self.order)
+        self.references = {0: 0, 1: 0}
+
+        ids = dict()
+        for v in reversed(list(topological_sort(self.graph))):
+            d = self.graph.nodes[v]
+            if self._is_constant(v):
+                ids[v] = int(d["variable"])
+                if d["terminal"] and d["variable"] == '0':
+                    self.has_terminal_zero = True
+                continue
+            low = 0
+            high = 0
+            for (_, w, e) in self.graph.out_edges(v, data=True):
+                if e.get("positive") is True or e.get("positive") == "True":
+                    high = ids[w]
+                else:
+                    low = ids[w]
+            ids[v] = self._make(d["variable"], low, high)
+        for (v, d) in self.graph.nodes(data=True):
+            if d["root"]:
+                self.references[ids[v]] += 1
+                self.roots.append((ids[v], list(d.get("output_variables", []))))
+
+    def _swap(self, level: int):
+        """
+        Swaps the variables at the given level and the level below.
+        """
+        x = self.order[level]
+        y = self.order[level + 1]
+        for node in list(self.tables[x].values()):
+            f0 = self.lows[node]
+            f1 = self.highs[node]
+            f0_y = f0 >= 2 and self.variables[f0] == y
+            f1_y = f1 >= 2 and self.variables[f1] == y
+            if not f0_y and not f1_y:
+                continue
+            (f00, f01) = (self.lows[f0], self.highs[f0]) if f0_y else (f0, f0)
+            (f10, f11) = (self.lows[f1], self.highs[f1]) if f1_y else (f1, f1)
+            del self.tables[x][(f0, f1)]
+            low = self._make(x, f00, f10)
+            high = self._make(x, f01, f11)
+            self.references[low] += 1
+            self.references[high] += 1
+            self._dereference(f0)
+            self._dereference(f1)
+            self.variables[node] = y
+            self.lows[node] = low
+            self.highs[node] = high
+            self.tables[y][(low, high)] = node
+        self.order[level] = y
+        self.order[level + 1] = x
+        self.levels[x] = level + 1
+        self.levels[y] = level
+        self.swaps += 1
+
+    def _get_cost(self) -> int:
+        nodes = len(self.variables)
+        if self.cost == "nodes":
+            return nodes
+        conflicts = 0
+        for (node, variable) in self.variables.items():
+            level = self.levels[variable]
+            for child in [self.lows[node], self.highs[node]]:
+                if child == 0 and not self.has_terminal_zero:
+                    continue
+                if (self._get_level(child) - level) % 2 == 0:
+                    conflicts += 1
+                    break
+        return nodes + conflicts
+
+    def _is_out_of_time(self) -> bool:
+        return self.time_limit is not None and time.time() - self.start_time > self.time_limit
+
+    def _move(self, variable: str, level: int):
+        while self.levels[variable] < level:
+            self._swap(self.levels[variable])
+        while self.levels[variable] > level:
+            self._swap(self.levels[variable] - 1)
+
+    def _sift(self):
+        variables = sorted(self.order, key=lambda variable: len(self.tables[variable]), reverse=True)
+        for variable in variables:
+            if self._is_out_of_time():
+                break
+            best_cost = self._get_cost()
+            best_level = self.levels[variable]
+            # The variable is first moved towards the nearest end
+            if self.levels[variable] >= len(self.order) / 2:
+                directions = [1, -1]
+            else:
+                directions = [-1, 1]
+            for direction in directions:
+                while 0 <= self.levels[variable] + direction < len(self.order):
+                    self._move(variable, self.levels[variable] + direction)
+                    cost = self._get_cost()
+                    if cost < best_cost:
+                        best_cost = cost
+                        best_level = self.levels[variable]
+                    elif cost > config.max_growth * best_cost:
+                        break
+            self._move(variable, best_level)
+
+    def _permute_windows(self):
+        if len(self.order) < 3:
+            if len(self.order) == 2:
+                cost = self._get_cost()
+                self._swap(0)
+                if self._get_cost() >= cost:
+                    self._swap(0)
+            return
+        # The swaps at the first and the second level of a window visit all six permutations of the window
+        improved = True
+        while improved and not self._is_out_of_time():
+            improved = False
+            for level in range(len(self.order) - 2):
+                swaps = [level, level + 1, level, level + 1, level]
+                best_cost = self._get_cost()
+                best_swap = 0
+                for i in range(len(swaps)):
+                    self._swap(swaps[i])
+                    cost = self._get_cost()
+                    if cost < best_cost:
+                        best_cost = cost
+                        best_swap = i + 1
+                for i in reversed(range(best_swap, len(swaps))):
+                    self._swap(swaps[i])
+                if best_swap > 0:
+                    improved = True
+
+    def _to_graph(self) -> DiGraph:
+        graph = DiGraph()
+        output_variables = dict()
+        for (node, outputs) in self.roots:
+            output_variables.setdefault(node, []).extend(outputs)
+
+        # The nodes are numbered from the root nodes to the terminal nodes
+        reachable = set()
+        stack = [node for (node, _) in self.roots]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node in reachable:
+                continue
+            reachable.add(node)
+            if node >= 2:
+                stack.extend([self.lows[node], self.highs[node]])
+        internal_nodes = sorted([node for node in reachable if node >= 2], key=lambda node: self._get_level(node))
+        ids = dict((node, i) for (i, node) in enumerate(internal_nodes))
+        for node in internal_nodes:
+            graph.add_node(ids[node], variable=self.variables[node], terminal=False, root=node in output_variables,
+                           output_variables=output_variables.get(node, []))
+        ids[1] = len(ids)
+        graph.add_node(ids[1], variable='1', terminal=True, root=1 in output_variables,
+                       output_variables=output_variables.get(1, []))
+        if self.has_terminal_zero or 0 in output_variables:
+            ids[0] = len(ids)
+            graph.add_node(ids[0], variable='0', terminal=self.has_terminal_zero, root=0 in output_variables,
+                           output_variables=output_variables.get(0, []))
+        for node in internal_nodes:
+            variable = self.variables[node]
+            if self.highs[node] != 0 or self.has_terminal_zero:
+                graph.add_edge(ids[node], ids[self.highs[node]], variable=variable, positive=True)
+            if self.lows[node] != 0 or self.has_terminal_zero:
+                graph.add_edge(ids[node], ids[self.lows[node]], variable=variable, positive=False)
+        return graph
+
+    def reorder(self, order: List[str] = None) -> DiGraph:
+        """
+        Reorders the variables of the BDD.
+        :param order: An order of the variables from the top to the bottom, e.g. from a previous run. If given, the
+        variables are moved to this order instead of searching for an order.
+        :return: The BDD in the new order. If the graph is not an ordered BDD, the graph is returned unchanged.
+        """
+        self.start_time = time.time()
+        initial_order = self._get_initial_order()
+        if initial_order is None:
+            self.log += 'Reorder skipped: the graph is not an ordered BDD\n'
+            config.log.add(self.get_log())
+            return self.graph
+        self._load(initial_order)
+        initial_cost = self._get_cost()
+        initial_nodes = len(self.variables)
+
+        if order is not None and sorted(order) == sorted(self.order):
+            for (level, variable) in enumerate(order):
+                self._move(variable, level)
+        elif self.method == "sift":
+            self._sift()
+        elif self.method == "window":
+            self._permute_windows()
+        else:
+            raise Exception("Unsupported reordering method.")
+
+        graph = self._to_graph()
+        self.end_time = time.time()
+
+        self.log += 'Reorder method: {}\n'.format(self.method if order is None else "cached")
+        self.log += 'Reorder outputs: {}\n'.format(sum([len(outputs) for (_, outputs) in self.roots]))
+        self.log += 'Reorder nodes before: {}\n'.format(initial_nodes)
+        self.log += 'Reorder nodes after: {}\n'.format(len(self.variables))
+        self.log += 'Reorder cost before: {}\n'.format(initial_cost)
+        self.log += 'Reorder cost after: {}\n'.format(self._get_cost())
+        self.log += 'Reorder swaps: {}\n'.format(self.swaps)
+        self.log += 'Reorder time (s): {}\n'.format(self.end_time - self.start_time)
+        config.log.add(self.get_log())
+
+        return graph
+
+    @staticmethod
+    def get_key(graph: DiGraph) -> str:
+        """
+        Returns a key of the graph from its output variables, under which its order is cached.
+        """
+        outputs = []
+        for (_, d) in graph.nodes(data=True):
+            if d["root"]:
+                outputs.extend(d.get("output_variables", []))
+        return ','.join(sorted(outputs))
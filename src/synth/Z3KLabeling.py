@@ -0,0 +1,219 @@
+import time
+from typing import Dict, List
+
+from networkx import Graph
+from z3 import Bool, Solver, Or, And, Not, Implies, PbLe, AtMost, sat, unsat, is_true
+
+from aux import config
+from aux.InfeasibleSolutionException import InfeasibleSolutionException
+from aux.LabelingCache import LabelingCache
+from synth.KLabeling import KLabeling
+from synth.SemiperimeterBounds import SemiperimeterBounds
+
+
+class Z3KLabeling:
+
+    def __init__(self, g: Graph, layers: int = 1, fixed_assignments: Dict[object, List[int]] = None,
+                 initial_labeling=None):
+        """
+        Computes a K-labeling with the pseudo-Boolean solver of z3 instead of an ILP solver.
+        The variable x_v_l denotes that node v is assigned to layer of nanowires l. The number of rows and the number
+        of columns are encoded in unary with the variables r_k (at least k rows) and c_k (at least k columns), such
+        that every constraint is a cardinality or pseudo-Boolean constraint.
+        The semiperimeter is minimized by a binary search between the combinatorial lower bound and the best
+        labeling found so far. The bound on the semiperimeter is a cardinality constraint on the unary variables,
+        which is pushed and popped on a single incremental solver.
+        With config.objective = "cs", a single feasibility check is done.
+        :param g: The graph to label.
+        :param layers: The number of layers of memristors.
+        :param fixed_assignments: Optionally, a dictionary from nodes to the layers of nanowires these nodes must be
+        assigned to.
+        :param initial_labeling: Optionally, a feasible K-labeling, whose semiperimeter is the initial upper bound.
+        """
+        self.g = g
+        self.layers = layers
+        if fixed_assignments is None:
+            self.fixed_assignments = dict()
+        else:
+            self.fixed_assignments = fixed_assignments
+        self.initial_labeling = initial_labeling
+        self.labeling = None
+        self.checks = 0
+        self.start_time = None
+        self.end_time = None
+        self.log = ''
+
+    def get_log(self) -> str:
+        return self.log
+
+    def _get_output_layer(self) -> int:
+        if config.output_layer is not None:
+            return config.output_layer
+        if self.layers % 2 == 0:
+            return self.layers
+        return self.layers - 1
+
+    def _encode(self, solver: Solver, x_vars: Dict, r_vars: List, c_vars: List):
+        layers = range(self.layers + 1)
+
+        for (u, v) in self.g.edges:
+            cmbs = []
+            for l in range(self.layers):
+                cmbs.append(And(x_vars[u][l], x_vars[v][l + 1]))
+                cmbs.append(And(x_vars[u][l + 1], x_vars[v][l]))
+            solver.add(Or(cmbs))
+
+        # The layers of a node are consecutive
+        for v in self.g.nodes:
+            for l in range(1, self.layers):
+                below = Or([x_vars[v][k] for k in range(l)])
+                above = Or([x_vars[v][k] for k in range(l + 1, self.layers + 1)])
+                solver.add(Implies(And(below, above), x_vars[v][l]))
+
+        # The number of rows (columns) is at least the number of nodes on each even (odd) layer
+        for k in range(1, len(r_vars)):
+            solver.add(Implies(r_vars[k], r_vars[k - 1]))
+        for k in range(1, len(c_vars)):
+            solver.add(Implies(c_vars[k], c_vars[k - 1]))
+        for l in layers:
+            if l % 2 == 0:
+                units = r_vars
+            else:
+                units = c_vars
+            solver.add(PbLe([(x_vars[v][l], 1) for v in self.g.nodes] + [(unit, -1) for unit in units], 0))
+
+        if config.io_constraints:
+            for (v, d) in self.g.nodes(data=True):
+                if d["root"]:
+                    solver.add(x_vars[v][self._get_output_layer()])
+                elif d["terminal"]:
+                    if config.input_layer is not None:
+                        solver.add(x_vars[v][config.input_layer])
+                    else:
+                        solver.add(x_vars[v][0])
+
+        for (v, fixed_layers) in self.fixed_assignments.items():
+            for l in layers:
+                if l in fixed_layers:
+                    solver.add(x_vars[v][l])
+                else:
+                    solver.add(Not(x_vars[v][l]))
+
+    def _get_labeling(self, model, x_vars: Dict):
+        node_assignments = dict()
+        for v in self.g.nodes:
+            node_assignments[v] = [l for l in range(self.layers + 1) if is_true(model.eval(x_vars[v][l]))]
+
+        edge_assignments = dict()
+        for (u, v) in self.g.edges:
+            for l in range(self.layers):
+                if l in node_assignments[u] and l + 1 in node_assignments[v]:
+                    edge_assignments[(u, v)] = (l, l + 1)
+                    break
+                if l + 1 in node_assignments[u] and l in node_assignments[v]:
+                    edge_assignments[(u, v)] = (l + 1, l)
+                    break
+
+        rows, columns = KLabeling.get_dimensions(node_assignments, self.layers)
+        return rows, columns, node_assignments, edge_assignments
+
+    def _check(self, solver: Solver, deadline):
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            solver.set("timeout", int(remaining * 1000))
+        self.checks += 1
+        return solver.check()
+
+    def label(self):
+        print("Number of nodes: {}".format(len(self.g.nodes)))
+        print("Number of edges: {}".format(len(self.g.edges)))
+        print("Layers: {}".format(self.layers))
+
+        # Labelings with fixed assignments are never cached
+        use_cache = config.cache and len(self.fixed_assignments) == 0
+        if use_cache:
+            labeling_cache = LabelingCache("k", self.layers)
+            labeling = labeling_cache.get(self.g)
+            if labeling is not None:
+                config.log.add('Cache: hit\n')
+                self.labeling = labeling
+                return self.labeling
+
+        self.start_time = time.time()
+        deadline = None
+        if config.time_limit is not None:
+            deadline = self.start_time + config.time_limit
+
+        n = len(self.g.nodes)
+        x_vars = dict((v, [Bool("x_{}_{}".format(i, l)) for l in range(self.layers + 1)])
+                      for (i, v) in enumerate(self.g.nodes))
+        r_vars = [Bool("r_{}".format(k)) for k in range(min(n, config.max_rows))]
+        c_vars = [Bool("c_{}".format(k)) for k in range(min(n, config.max_columns))]
+
+        solver = Solver()
+        self._encode(solver, x_vars, r_vars, c_vars)
+
+        semiperimeter_bounds = SemiperimeterBounds(self.g, self.layers)
+        lower_bound = semiperimeter_bounds.get_k_bound()
+        config.log.add('Lower bound (semiperimeter): {}\n'.format(lower_bound))
+        config.log.add(semiperimeter_bounds.get_log())
+
+        optimal = False
+        if self.initial_labeling is not None:
+            self.labeling = self.initial_labeling
+        result = self._check(solver, deadline)
+        if result == unsat:
+            raise InfeasibleSolutionException("Infeasible solution.")
+        if result == sat:
+            labeling = self._get_labeling(solver.model(), x_vars)
+            if self.labeling is None or labeling[0] + labeling[1] < self.labeling[0] + self.labeling[1]:
+                self.labeling = labeling
+
+        if config.objective == "semi" and self.labeling is not None:
+            # Binary search on the semiperimeter between the lower bound and the best labeling
+            lower = lower_bound
+            upper = self.labeling[0] + self.labeling[1]
+            while lower < upper:
+                middle = (lower + upper) // 2
+                solver.push()
+                solver.add(AtMost(*(r_vars + c_vars), middle))
+                result = self._check(solver, deadline)
+                if result == sat:
+                    self.labeling = self._get_labeling(solver.model(), x_vars)
+                    upper = self.labeling[0] + self.labeling[1]
+                solver.pop()
+                if result == unsat:
+                    lower = middle + 1
+                elif result != sat:
+                    # The time limit is reached
+                    break
+            optimal = lower >= upper
+
+        if self.labeling is None:
+            if not config.anytime:
+                raise InfeasibleSolutionException("No solution found.")
+            self.labeling = KLabeling.get_trivial_labeling(self.g, self.layers, self.fixed_assignments)
+            if self.labeling is None or self.labeling[0] > config.max_rows or self.labeling[1] > config.max_columns:
+                raise InfeasibleSolutionException("No solution found.")
+            config.log.add('Anytime: fallback labeling\n')
+
+        self.end_time = time.time()
+
+        (rows, columns, _, _) = self.labeling
+        print("Optimal: {}".format(optimal))
+        print("Objective: {}".format(rows + columns))
+        self.log += 'Z3 checks: {}\n'.format(self.checks)
+        self.log += 'Z3 time (s): {}\n'.format(self.end_time - self.start_time)
+        self.log += 'Rows: {}\n'.format(rows)
+        self.log += 'Columns: {}\n'.format(columns)
+        self.log += 'Objective: {}\n'.format(rows + columns)
+        self.log += 'Optimal: {}\n'.format(optimal)
+
+        config.log.add(self.get_log())
+
+        if use_cache and optimal:
+            labeling_cache.put(self.g, self.labeling)
+
+        return self.labeling
@@ -3,6 +3,7 @@ import math
 import random
 import time
 from pathlib import Path
+from typing import Dict, List
 
 from z3 import Bool
 
@@ -11,6 +12,10 @@ from core.BooleanFunction import BooleanFunction
 from verf.EquivalenceChecker import EquivalenceChecker
 from aux.Z3Converter import Z3Converter
 from core.Literal import Literal
+from aux.UndecidedException import UndecidedException
+
+# The number of instances that are evaluated at once
+_BLOCK_SIZE = 64
 
 
 class Enumeration(EquivalenceChecker):
@@ -35,9 +40,13 @@ class Enumeration(EquivalenceChecker):
 
         return primary_input_map
 
-    def is_equivalent(self, benchmark: Benchmark, sampling_size: int = 0) -> bool:
+    def is_equivalent(self, benchmark: Benchmark, sampling_size: int = 0, time_limit: float = None) -> bool:
         print("Started enumeration")
         start_time = time.time()
+        if time_limit is not None:
+            deadline = start_time + time_limit
+        else:
+            deadline = None
 
         input_variables_a = set(self.boolean_function_a.get_input_variables())
         input_variables_b = set(self.boolean_function_b.get_input_variables())
@@ -51,41 +60,29 @@ class Enumeration(EquivalenceChecker):
         n = len(input_variables)
 
         if sampling_size == 0:
-            for i in range(int(math.pow(2, n))):
-                print("\t{}/{}".format(i + 1, int(math.pow(2, n))))
-                binary_string = format(int(i), '0' + str(n) + 'b')
-                instance = {}
-                for j in range(n):
-                    input_variable = input_variables[j]
-                    instance[input_variable] = bool(int(binary_string[n - j - 1]))
-                # print(instance)
-
-                evaluation_a = self.boolean_function_a.eval(instance)
-                evaluation_b = self.boolean_function_b.eval(instance)
-
-                for output_variable in output_variables:
-                    if evaluation_a[output_variable] != evaluation_b[output_variable]:
-                        print("Not equivalent.")
-                        print(output_variable)
-                        print(instance)
-                        print(evaluation_a[output_variable])
-                        print(evaluation_b[output_variable])
-                        print("Stopped enumeration")
-                        print()
-                        return False
+            number_of_instances = int(math.pow(2, n))
+            indices = range(number_of_instances)
         else:
-            for i in range(sampling_size):
-                r = random.randint(0, int(math.pow(2, n)))
-                print("\t{}/{}".format(i + 1, sampling_size))
-                binary_string = format(int(r), '0' + str(n) + 'b')
+            number_of_instances = sampling_size
+            indices = [random.randint(0, int(math.pow(2, n))) for _ in range(sampling_size)]
+
+        # The instances are evaluated in blocks, such that a specification with an AIG is simulated bit-parallel
+        for start in range(0, number_of_instances, _BLOCK_SIZE):
+            instances = []
+            for i in indices[start:start + _BLOCK_SIZE]:
+                binary_string = format(int(i), '0' + str(n) + 'b')
                 instance = {}
                 for j in range(n):
                     input_variable = input_variables[j]
                     instance[input_variable] = bool(int(binary_string[n - j - 1]))
-                # print(instance)
+                instances.append(instance)
+            evaluations_b = self._evaluate(self.boolean_function_b, instances)
 
+            for (k, instance) in enumerate(instances):
+                print("\t{}/{}".format(start + k + 1, number_of_instances))
+                self._check_deadline(deadline)
                 evaluation_a = self.boolean_function_a.eval(instance)
-                evaluation_b = self.boolean_function_b.eval(instance)
+                evaluation_b = evaluations_b[k]
 
                 for output_variable in output_variables:
                     if evaluation_a[output_variable] != evaluation_b[output_variable]:
@@ -103,6 +100,21 @@ class Enumeration(EquivalenceChecker):
         print()
         return True
 
+    @staticmethod
+    def _evaluate(boolean_function: BooleanFunction, instances: List[Dict[str, bool]]) -> List[Dict[str, bool]]:
+        aig = getattr(boolean_function, "aig", None)
+        if aig is not None:
+            return aig.eval_instances(instances)
+        return [boolean_function.eval(instance) for instance in instances]
+
+    @staticmethod
+    def _check_deadline(deadline: float):
+        if deadline is not None and time.time() > deadline:
+            print("Undecided.")
+            print("Stopped enumeration")
+            print()
+            raise UndecidedException("Enumeration exceeded its time limit.")
+
     def to_formula(self, output_variable: str) -> Bool:
         truth_table = list(map(lambda x: list(x), list(
             itertools.product([False, True], repeat=len(self.boolean_function_a.input_variables)))))